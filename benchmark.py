@@ -0,0 +1,178 @@
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import tempfile
+import subprocess
+
+from empresas import EMPRESAS
+from metricas import exportar_prometheus
+from portales_simulados import PortalesSimulados, filas_de_ejemplo, cargar_filas
+
+# Mide la automatización completa contra portales_simulados.py (sin red).
+# Cada corrida queda como una línea en BENCHMARK_FILE para comparar cambios de rendimiento.
+DIRECTORIO = os.path.dirname(os.path.abspath(__file__))
+BENCHMARK_FILE = os.getenv("BENCHMARK_FILE", "benchmark.jsonl")
+# Variables que cambian el comportamiento de los scripts y se guardan con cada resultado
+PREFIJOS_CONFIGURACION = ("MODO_", "PREVIRED_WORKERS", "SIGO_SESIONES", "EXTRACCION_TABLA", "CORTE_POR_ORDEN", "MAX_")
+SCRIPTS = ("sigo_login", "previred_ingreso", "sigo_upload")
+
+def entorno_benchmark(portales, directorio):
+    """
+    Entorno de los scripts: portales simulados, credenciales ficticias y todos los
+    archivos de estado (bitácora, métricas, cookies, descargas) dentro de 'directorio'.
+    """
+    env = dict(os.environ)
+    env.update(portales.entorno())
+    env.update({
+        "SIGO_USER": "benchmark",
+        "SIGO_PASS": "benchmark",
+        "PREVIRED_USER": "11111111-1",
+        "PREVIRED_PASS": "benchmark",
+        "DESCARGA_DIR": os.path.join(directorio, "descarga"),
+        "BITACORA_DB": os.path.join(directorio, "bitacora.sqlite3"),
+        "METRICAS_FILE": os.path.join(directorio, "metricas.jsonl"),
+        "METRICAS_PROM": os.path.join(directorio, "metricas.prom"),
+        "METRICAS_CORRIDA": f"benchmark-{time.strftime('%Y%m%d-%H%M%S')}",
+        "TRAZA_FILE": os.path.join(directorio, "traza_webdriver.jsonl"),
+        "SIGO_COOKIES_FILE": os.path.join(directorio, "sigo_cookies.json"),
+        "PREVIRED_SECUENCIA": os.path.join(directorio, "previred_secuencia.json"),
+        "PYTHONPATH": os.pathsep.join(p for p in (DIRECTORIO, os.environ.get("PYTHONPATH")) if p),
+    })
+    portales.guardar_secuencia(env["PREVIRED_SECUENCIA"])
+    return env
+
+def ejecutar_etapa(nombre, comando, env, directorio):
+    """
+    Ejecuta 'comando' con 'directorio' como carpeta de trabajo y retorna (segundos, código de salida).
+    """
+    logging.info(f"Benchmark: iniciando {nombre}")
+    inicio = time.perf_counter()
+    codigo = subprocess.call(comando, env=env, cwd=directorio)
+    segundos = time.perf_counter() - inicio
+    logging.info(f"Benchmark: {nombre} terminó en {segundos:.2f}s (código {codigo}).")
+    return segundos, codigo
+
+def etapas(modo, empresas, scripts=SCRIPTS):
+    """
+    (nombre, comando) de cada etapa: la cadena de 'scripts' por empresa o el motor en un proceso.
+    """
+    if modo == "motor":
+        codigo = f"from motor import ejecutar_motor; ejecutar_motor({list(empresas)!r})"
+        return [("motor", [sys.executable, "-c", codigo])]
+    lista = []
+    for empresa in empresas:
+        for script in scripts:
+            lista.append((f"{script}_{empresa}", [sys.executable, os.path.join(DIRECTORIO, f"{script}_{empresa}.py")]))
+    return lista
+
+def ejecutar_benchmark(filas, empresas, modo="cadena", directorio=None, scripts=SCRIPTS, monitor=None, **config):
+    """
+    Levanta los portales con 'filas', ejecuta las etapas y retorna el resultado
+    (tiempos, registros avanzados a cálculo y registros por minuto). 'monitor'
+    (iniciar()/detener() -> dict) mide los procesos mientras corren las etapas.
+    """
+    directorio = directorio or tempfile.mkdtemp(prefix="benchmark_")
+    os.makedirs(directorio, exist_ok=True)
+    portales = PortalesSimulados(filas, puerto_sigo=0, puerto_previred=0, **config).iniciar()
+    try:
+        env = entorno_benchmark(portales, directorio)
+        tiempos, fallidas = {}, []
+        if monitor:
+            monitor.iniciar()
+        inicio = time.perf_counter()
+        try:
+            for nombre, comando in etapas(modo, empresas, scripts):
+                tiempos[nombre], codigo = ejecutar_etapa(nombre, comando, env, directorio)
+                if codigo != 0:
+                    fallidas.append(nombre)
+        finally:
+            total = time.perf_counter() - inicio
+            memoria = monitor.detener() if monitor else None
+        estado = portales.estado()
+    finally:
+        portales.detener()
+    # Las etapas heredan la corrida y no exportan: el resumen de Prometheus se arma aquí
+    exportar_prometheus(env["METRICAS_CORRIDA"], env["METRICAS_PROM"], env["METRICAS_FILE"])
+
+    avanzados = estado["sigo"].get("avanzados", 0)
+    resultado = {
+        "ts": time.time(),
+        "modo": modo,
+        "empresas": list(empresas),
+        "filas": len(filas),
+        "config": config,
+        "entorno": {k: v for k, v in os.environ.items() if k.startswith(PREFIJOS_CONFIGURACION)},
+        "segundos": round(total, 2),
+        "etapas": {k: round(v, 2) for k, v in tiempos.items()},
+        "etapas_fallidas": fallidas,
+        "certificados": estado["previred"].get("pdf_descargados", 0),
+        "avanzados": avanzados,
+        "registros_por_minuto": round(avanzados / (total / 60), 2) if total else 0.0,
+        "portales": estado,
+        "directorio": directorio,
+    }
+    if memoria is not None:
+        resultado["memoria"] = memoria
+    return resultado
+
+def imprimir_resultado(resultado):
+    print(f"Modo {resultado['modo']} | {resultado['filas']} filas | empresas {', '.join(resultado['empresas'])}")
+    for nombre, segundos in resultado["etapas"].items():
+        marca = " (falló)" if nombre in resultado["etapas_fallidas"] else ""
+        print(f"  {nombre:<32} {segundos:>9.2f}s{marca}")
+    print(f"  {'total':<32} {resultado['segundos']:>9.2f}s")
+    print(
+        f"Certificados descargados: {resultado['certificados']} | avanzados a cálculo: {resultado['avanzados']} | "
+        f"{resultado['registros_por_minuto']} registros/minuto"
+    )
+    errores = resultado["portales"]["sigo"]["errores_inyectados"] + resultado["portales"]["previred"]["errores_inyectados"]
+    if errores:
+        print(f"Errores inyectados por los portales: {errores}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sin red contra los portales simulados.")
+    parser.add_argument("--registros", type=int, default=20, help="filas generadas para la tabla de SIGO")
+    parser.add_argument("--datos", help="JSON con las filas de SIGO (en vez de generarlas)")
+    parser.add_argument("--empresas", default="EST", help="empresas separadas por coma (empresas.py)")
+    parser.add_argument("--modo", choices=("cadena", "motor"), default="cadena")
+    parser.add_argument("--scripts", default=",".join(SCRIPTS), help="scripts de la cadena a ejecutar, en orden")
+    parser.add_argument("--latencia-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--tasa-error", type=float, default=0.0, help="fracción de respuestas HTTP 503")
+    parser.add_argument("--tasa-rechazo", type=float, default=0.0, help="fracción de formularios rechazados por Previred")
+    parser.add_argument("--semilla", default="benchmark")
+    parser.add_argument("--directorio", help="carpeta de trabajo (por defecto una temporal)")
+    parser.add_argument("--conservar", action="store_true", help="no borrar la carpeta de trabajo temporal")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    empresas = [e.strip() for e in args.empresas.split(",") if e.strip()]
+    for empresa in empresas:
+        if empresa not in EMPRESAS:
+            parser.error(f"Empresa desconocida: {empresa}. Opciones: {', '.join(EMPRESAS)}")
+    filas = cargar_filas(args.datos) if args.datos else filas_de_ejemplo(args.registros, empresas, args.semilla)
+
+    resultado = ejecutar_benchmark(
+        filas,
+        empresas,
+        args.modo,
+        args.directorio,
+        [s.strip() for s in args.scripts.split(",") if s.strip()],
+        latencia_ms=args.latencia_ms,
+        jitter_ms=args.jitter_ms,
+        tasa_error=args.tasa_error,
+        tasa_rechazo=args.tasa_rechazo,
+        semilla=args.semilla,
+    )
+    imprimir_resultado(resultado)
+    with open(BENCHMARK_FILE, "a", encoding="utf-8") as f:
+        f.write(json.dumps(resultado, ensure_ascii=False) + "\n")
+    if not (args.directorio or args.conservar):
+        shutil.rmtree(resultado["directorio"], ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+import os
+import time
+import sqlite3
+import logging
+import threading
+
+from enrutador_descargas import sha256_archivo
+
+# Base SQLite con el avance de cada folio; sobrevive a caídas entre corridas
+BITACORA_DB = os.getenv("BITACORA_DB", os.path.join(os.getcwd(), "bitacora.sqlite3"))
+
+# Estados en el orden en que avanza un folio; un folio nunca retrocede de estado
+ESTADOS = ("extraido", "enviado_previred", "descargado", "subido", "avanzado")
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS folios (
+    folio TEXT PRIMARY KEY,
+    empresa TEXT,
+    rut TEXT,
+    fecha TEXT,
+    estado TEXT NOT NULL,
+    sha256 TEXT,
+    ruta_pdf TEXT,
+    intentos_previred INTEGER NOT NULL DEFAULT 0,
+    intentos_sigo INTEGER NOT NULL DEFAULT 0,
+    ultimo_error TEXT,
+    creado REAL NOT NULL,
+    actualizado REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS eventos (
+    folio TEXT NOT NULL,
+    estado TEXT NOT NULL,
+    ts REAL NOT NULL,
+    detalle TEXT
+);
+CREATE INDEX IF NOT EXISTS eventos_folio ON eventos (folio);
+"""
+
+class Bitacora:
+    """
+    Estado por folio (extraído, enviado a Previred, PDF descargado con su hash, subido
+    a SIGO, avanzado a cálculo), con fecha de cada cambio y contadores de intentos.
+    Cada etapa consulta la bitácora para saltarse el trabajo ya hecho.
+    Se comparte entre hilos (pools) y entre procesos (una cadena por empresa).
+    """
+
+    def __init__(self, ruta=BITACORA_DB):
+        self.ruta = ruta
+        self._lock = threading.Lock()
+        self._con = sqlite3.connect(ruta, timeout=30, check_same_thread=False, isolation_level=None)
+        self._con.execute("PRAGMA journal_mode=WAL")
+        self._con.executescript(ESQUEMA)
+
+    def _ejecutar(self, sql, parametros=()):
+        with self._lock:
+            return self._con.execute(sql, parametros).fetchall()
+
+    def estado(self, folio):
+        filas = self._ejecutar("SELECT estado FROM folios WHERE folio = ?", (str(folio),))
+        return filas[0][0] if filas else None
+
+    def alcanzo(self, folio, estado):
+        """
+        True si el folio ya llegó a 'estado' (o a uno posterior).
+        """
+        actual = self.estado(folio)
+        return actual is not None and ESTADOS.index(actual) >= ESTADOS.index(estado)
+
+    def marcar(self, folio, estado, detalle=None, **campos):
+        """
+        Avanza el folio a 'estado' (si ya está más adelante no lo retrocede) y
+        actualiza 'campos' (empresa, rut, fecha, sha256, ruta_pdf).
+        """
+        folio, ahora = str(folio), time.time()
+        with self._lock:
+            self._con.execute("BEGIN IMMEDIATE")
+            try:
+                fila = self._con.execute("SELECT estado FROM folios WHERE folio = ?", (folio,)).fetchone()
+                if fila is None:
+                    self._con.execute(
+                        "INSERT INTO folios (folio, estado, creado, actualizado) VALUES (?, ?, ?, ?)",
+                        (folio, estado, ahora, ahora),
+                    )
+                elif ESTADOS.index(estado) > ESTADOS.index(fila[0]):
+                    self._con.execute(
+                        "UPDATE folios SET estado = ?, ultimo_error = NULL, actualizado = ? WHERE folio = ?",
+                        (estado, ahora, folio),
+                    )
+                for columna, valor in campos.items():
+                    self._con.execute(f"UPDATE folios SET {columna} = ? WHERE folio = ?", (valor, folio))
+                self._con.execute(
+                    "INSERT INTO eventos (folio, estado, ts, detalle) VALUES (?, ?, ?, ?)",
+                    (folio, estado, ahora, detalle),
+                )
+                self._con.execute("COMMIT")
+            except Exception:
+                self._con.execute("ROLLBACK")
+                raise
+
+    def intento(self, folio, etapa):
+        """
+        Suma un intento en 'etapa' ("previred" o "sigo") y retorna el total de intentos.
+        """
+        self._ejecutar(
+            f"UPDATE folios SET intentos_{etapa} = intentos_{etapa} + 1, actualizado = ? WHERE folio = ?",
+            (time.time(), str(folio)),
+        )
+        filas = self._ejecutar(f"SELECT intentos_{etapa} FROM folios WHERE folio = ?", (str(folio),))
+        return filas[0][0] if filas else 1
+
+    def error(self, folio, mensaje):
+        self._ejecutar(
+            "UPDATE folios SET ultimo_error = ?, actualizado = ? WHERE folio = ?",
+            (mensaje, time.time(), str(folio)),
+        )
+        self._ejecutar(
+            "INSERT INTO eventos (folio, estado, ts, detalle) VALUES (?, 'error', ?, ?)",
+            (str(folio), time.time(), mensaje),
+        )
+
+    def registrar_extraidos(self, empresa, registros):
+        """
+        Generador: registra cada registro leído desde SIGO y lo deja pasar.
+        """
+        for reg in registros:
+            self.marcar(
+                reg["id"], "extraido", empresa=empresa, rut=reg.get("rut"), fecha=reg.get("fecha_ultimo_dia")
+            )
+            yield reg
+
+    def marcar_descargado(self, folio, ruta_pdf, sha=None):
+        self.marcar(folio, "descargado", sha256=sha or sha256_archivo(ruta_pdf), ruta_pdf=ruta_pdf)
+
+    def folios_en_estado(self, *estados):
+        marcas = ", ".join("?" for _ in estados)
+        return {f for (f,) in self._ejecutar(f"SELECT folio FROM folios WHERE estado IN ({marcas})", estados)}
+
+    def resumen(self):
+        return dict(self._ejecutar("SELECT estado, COUNT(*) FROM folios GROUP BY estado"))
+
+_bitacora = None
+_lock_bitacora = threading.Lock()
+
+def obtener_bitacora():
+    """
+    Bitácora del proceso (una conexión por proceso).
+    """
+    global _bitacora
+    with _lock_bitacora:
+        if _bitacora is None:
+            _bitacora = Bitacora()
+            logging.info(f"Bitácora de folios: {_bitacora.ruta} {_bitacora.resumen()}")
+        return _bitacora
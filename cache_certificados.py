@@ -0,0 +1,179 @@
+import os
+import time
+import sqlite3
+import logging
+import threading
+
+from espera_descarga import tiene_trailer_pdf
+from enrutador_descargas import sha256_archivo, _publicar_atomico
+
+# Política de retención del caché de certificados
+CACHE_MAX_DIAS = float(os.getenv("CACHE_MAX_DIAS", "30"))
+CACHE_MAX_MB = float(os.getenv("CACHE_MAX_MB", "500"))
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS certificados (
+    folio TEXT PRIMARY KEY,
+    empresa TEXT,
+    rut TEXT,
+    fecha TEXT,
+    sha256 TEXT NOT NULL,
+    bytes INTEGER NOT NULL,
+    creado REAL NOT NULL,
+    usado REAL NOT NULL
+);
+"""
+# Después de la migración: en cachés anteriores la columna empresa aún no existe
+INDICES = """
+DROP INDEX IF EXISTS certificados_rut_fecha;
+CREATE INDEX IF NOT EXISTS certificados_empresa_rut_fecha ON certificados (empresa, rut, fecha);
+"""
+
+def _normalizar_rut(rut):
+    return (rut or "").replace(".", "").upper()
+
+class CacheCertificados:
+    """
+    Índice de los certificados del almacén (descarga/.almacen) por folio y por
+    empresa + RUT + fecha_ultimo_dia. Un certificado en caché evita repetir el flujo de Previred;
+    antes de usarlo se verifica que el archivo exista, sea un PDF completo y conserve su sha256.
+    """
+
+    def __init__(self, enrutador):
+        self.enrutador = enrutador
+        self.ruta = os.path.join(enrutador.almacen_dir, "cache.sqlite3")
+        self._lock = threading.Lock()
+        self._con = sqlite3.connect(self.ruta, timeout=30, check_same_thread=False, isolation_level=None)
+        self._con.execute("PRAGMA journal_mode=WAL")
+        self._con.executescript(ESQUEMA)
+        columnas = {c[1] for c in self._con.execute("PRAGMA table_info(certificados)")}
+        if "empresa" not in columnas:
+            # Las entradas antiguas quedan sin empresa: solo se encuentran por folio
+            self._con.execute("ALTER TABLE certificados ADD COLUMN empresa TEXT")
+        self._con.executescript(INDICES)
+
+    def _ejecutar(self, sql, parametros=()):
+        with self._lock:
+            return self._con.execute(sql, parametros).fetchall()
+
+    def registrar(self, reg, sha):
+        """
+        Asocia el certificado 'sha' (ya en el almacén) al folio y a la empresa + RUT + fecha de 'reg'.
+        """
+        ahora = time.time()
+        self._ejecutar(
+            "INSERT OR REPLACE INTO certificados (folio, empresa, rut, fecha, sha256, bytes, creado, usado) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                str(reg.get("id", "NOID")), reg.get("empresa"), _normalizar_rut(reg.get("rut")), reg.get("fecha_ultimo_dia"),
+                sha, os.path.getsize(self.enrutador.ruta_almacen(sha)), ahora, ahora,
+            ),
+        )
+
+    def integro(self, sha):
+        ruta = self.enrutador.ruta_almacen(sha)
+        return os.path.exists(ruta) and tiene_trailer_pdf(ruta) and sha256_archivo(ruta) == sha
+
+    def _candidatos(self, reg):
+        """
+        (folio, sha256) de las entradas de 'reg': por folio o, si no hay, por empresa + RUT + fecha.
+        Sin empresa no se busca por RUT: el certificado de una empresa no sirve para otra.
+        """
+        filas = self._ejecutar("SELECT folio, sha256 FROM certificados WHERE folio = ?", (str(reg.get("id", "NOID")),))
+        if not filas and reg.get("empresa") and reg.get("rut") and reg.get("fecha_ultimo_dia"):
+            filas = self._ejecutar(
+                "SELECT folio, sha256 FROM certificados WHERE empresa = ? AND rut = ? AND fecha = ? ORDER BY creado DESC",
+                (reg["empresa"], _normalizar_rut(reg["rut"]), reg["fecha_ultimo_dia"]),
+            )
+        return filas
+
+    def consultar(self, reg):
+        """
+        (folio, sha256) de un certificado válido para 'reg' o None, sin publicar nada ni
+        modificar el caché (para planificar).
+        """
+        return next(((folio, sha) for folio, sha in self._candidatos(reg) if self.integro(sha)), None)
+
+    def publicar(self, reg, folio, sha):
+        """
+        Publica el certificado 'sha' (entrada 'folio' del caché) como descarga/<folio de reg>.pdf,
+        registra su uso y retorna la ruta publicada.
+        """
+        folio_id = str(reg.get("id", "NOID"))
+        publicada = os.path.join(self.enrutador.descarga_dir, f"{folio_id}.pdf")
+        _publicar_atomico(self.enrutador.ruta_almacen(sha), publicada)
+        if folio != folio_id:
+            self.registrar(reg, sha)
+        else:
+            self._ejecutar("UPDATE certificados SET usado = ? WHERE folio = ?", (time.time(), folio_id))
+        logging.info(f"Certificado del folio {folio_id} tomado del caché ({sha[:12]}…).")
+        return publicada
+
+    def buscar(self, reg):
+        """
+        Si hay un certificado válido para 'reg' (por folio o por empresa + RUT + fecha), lo publica como
+        descarga/<folio>.pdf y retorna (ruta_publicada, sha256); si no, None.
+        """
+        for folio, sha in self._candidatos(reg):
+            if not self.integro(sha):
+                logging.warning(f"Certificado en caché {sha[:12]}… (folio {folio}) dañado o ausente, se descarta.")
+                self._ejecutar("DELETE FROM certificados WHERE sha256 = ?", (sha,))
+                continue
+            return self.publicar(reg, folio, sha), sha
+        return None
+
+    def aplicar_retencion(self, max_dias=CACHE_MAX_DIAS, max_mb=CACHE_MAX_MB, conservar=()):
+        """
+        Quita del caché las entradas con más de 'max_dias' y luego las menos usadas hasta
+        bajar de 'max_mb'. Borra los PDF del almacén que ya no usa ninguna entrada y los
+        descarga/<folio>.pdf que no están en caché. Los folios de 'conservar' no se tocan.
+        """
+        conservar = {str(f) for f in conservar}
+        limite = time.time() - max_dias * 86400
+        quitados = 0
+        for folio, usado in self._ejecutar("SELECT folio, usado FROM certificados ORDER BY usado"):
+            if usado < limite and folio not in conservar:
+                self._ejecutar("DELETE FROM certificados WHERE folio = ?", (folio,))
+                quitados += 1
+
+        # Tamaño real: cada sha se cuenta una vez aunque lo usen varios folios
+        filas = self._ejecutar("SELECT sha256, MAX(usado), bytes FROM certificados GROUP BY sha256 ORDER BY MAX(usado)")
+        total = sum(f[2] for f in filas)
+        for sha, _, tamaño in filas:
+            if total <= max_mb * 1024 * 1024:
+                break
+            folios_sha = {f for (f,) in self._ejecutar("SELECT folio FROM certificados WHERE sha256 = ?", (sha,))}
+            if folios_sha & conservar:
+                continue
+            self._ejecutar("DELETE FROM certificados WHERE sha256 = ?", (sha,))
+            quitados += len(folios_sha)
+            total -= tamaño
+
+        vigentes = {sha for (sha,) in self._ejecutar("SELECT DISTINCT sha256 FROM certificados")}
+        folios = {f for (f,) in self._ejecutar("SELECT folio FROM certificados")} | conservar
+        borrados = 0
+        for raiz, _, archivos in os.walk(self.enrutador.almacen_dir):
+            for f in archivos:
+                if f.endswith(".pdf") and f[:-4] not in vigentes:
+                    os.remove(os.path.join(raiz, f))
+                    borrados += 1
+        for f in os.listdir(self.enrutador.descarga_dir):
+            if f.lower().endswith(".pdf") and f[:-4] not in folios:
+                os.remove(os.path.join(self.enrutador.descarga_dir, f))
+                borrados += 1
+        logging.info(
+            f"Retención del caché en {self.enrutador.descarga_dir}: {quitados} entradas quitadas, "
+            f"{borrados} PDF borrados, {len(folios)} folios en caché ({total / 1024 / 1024:.1f} MB)."
+        )
+
+_caches = {}
+_lock_caches = threading.Lock()
+
+def obtener_cache(enrutador):
+    """
+    CacheCertificados del almacén de 'enrutador' (uno por carpeta de descarga y proceso).
+    """
+    with _lock_caches:
+        if enrutador.almacen_dir not in _caches:
+            _caches[enrutador.almacen_dir] = CacheCertificados(enrutador)
+        return _caches[enrutador.almacen_dir]
@@ -0,0 +1,122 @@
+import os
+import time
+import json
+import queue
+import logging
+
+# Marca que indica al consumidor que el productor terminó
+FIN = {"fin": True}
+
+class ColaPDF:
+    """
+    Cola de PDFs descargados compartida entre procesos, respaldada por un archivo JSONL.
+    previred_ingreso_* publica cada PDF apenas se renombra y sigo_upload_* lo consume
+    de inmediato, sin esperar a que termine todo el lote de descargas.
+    """
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+
+    def reiniciar(self):
+        """
+        Deja la cola vacía (se llama antes de lanzar productor y consumidor).
+        """
+        directorio = os.path.dirname(self.ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        open(self.ruta, "w", encoding="utf-8").close()
+
+    def _escribir(self, entrada):
+        # Una sola escritura en modo append por línea: los lectores nunca ven líneas a medias.
+        with open(self.ruta, "a", encoding="utf-8") as f:
+            f.write(json.dumps(entrada, ensure_ascii=False) + "\n")
+            f.flush()
+
+    def publicar(self, folio_id, ruta_pdf):
+        """
+        Agrega un PDF listo para subir.
+        """
+        self._escribir({"id": folio_id, "ruta": ruta_pdf, "ts": time.time()})
+        logging.info(f"PDF {folio_id} publicado en la cola {self.ruta}.")
+
+    def cerrar(self):
+        """
+        Indica que no se publicarán más PDFs.
+        """
+        self._escribir(FIN)
+
+    def consumir(self, intervalo=0.5, timeout_inactividad=900):
+        """
+        Generador que entrega cada entrada publicada ({"id", "ruta", "ts"}) en orden,
+        hasta encontrar la marca de fin o pasar 'timeout_inactividad' segundos sin novedades.
+        """
+        offset = 0
+        ultimo = time.monotonic()
+        while True:
+            nuevas = []
+            if os.path.exists(self.ruta):
+                with open(self.ruta, "r", encoding="utf-8") as f:
+                    f.seek(offset)
+                    for linea in f:
+                        if not linea.endswith("\n"):
+                            break  # línea aún incompleta, se relee en la próxima vuelta
+                        offset += len(linea.encode("utf-8"))
+                        if linea.strip():
+                            nuevas.append(json.loads(linea))
+
+            for entrada in nuevas:
+                if entrada.get("fin"):
+                    logging.info("Cola de PDFs cerrada por el productor.")
+                    return
+                espera = time.time() - entrada.get("ts", time.time())
+                logging.info(f"PDF {entrada['id']} tomado de la cola ({espera:.1f}s en espera).")
+                yield entrada
+
+            if nuevas:
+                ultimo = time.monotonic()
+            elif time.monotonic() - ultimo > timeout_inactividad:
+                logging.warning(f"Cola {self.ruta} sin novedades por {timeout_inactividad}s. Se termina el consumo.")
+                return
+            else:
+                time.sleep(intervalo)
+
+class ColaMemoria:
+    """
+    Misma interfaz que ColaPDF pero en memoria, para productor y consumidor
+    que corren en el mismo proceso (motor.py).
+    """
+
+    def __init__(self):
+        self.ruta = "<memoria>"
+        self._cola = queue.Queue()
+
+    def reiniciar(self):
+        self._cola = queue.Queue()
+
+    def publicar(self, folio_id, ruta_pdf):
+        self._cola.put({"id": folio_id, "ruta": ruta_pdf, "ts": time.time()})
+        logging.info(f"PDF {folio_id} publicado en la cola en memoria.")
+
+    def cerrar(self):
+        self._cola.put(FIN)
+
+    def consumir(self, intervalo=0.5, timeout_inactividad=900):
+        while True:
+            try:
+                entrada = self._cola.get(timeout=timeout_inactividad)
+            except queue.Empty:
+                logging.warning(f"Cola en memoria sin novedades por {timeout_inactividad}s. Se termina el consumo.")
+                return
+            if entrada.get("fin"):
+                logging.info("Cola de PDFs cerrada por el productor.")
+                return
+            espera = time.time() - entrada["ts"]
+            logging.info(f"PDF {entrada['id']} tomado de la cola ({espera:.1f}s en espera).")
+            yield entrada
+
+def cola_desde_entorno():
+    """
+    Retorna la ColaPDF indicada en la variable COLA_PDFS, o None si no se usa el modo pipeline.
+    """
+    ruta = os.getenv("COLA_PDFS")
+    return ColaPDF(ruta) if ruta else None
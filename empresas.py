@@ -0,0 +1,31 @@
+# Datos de cada empresa procesada. Los scripts *_Asesorias/_Business/_EST
+# y el motor en proceso toman de aquí todo lo que antes estaba copiado en cada script.
+EMPRESAS = {
+    "Asesorias": {
+        "rut_previred": "76.071.027-K",
+        "nombre_previred": "Asesorías e Inversiones MV Services S.A.",
+        "nombre_sigo": "Asesorías e Inversiones MV Services S.A.",
+        "archivo_json": "finiquitos_filtrados_Asesorias.json",
+    },
+    "Business": {
+        "rut_previred": "76.077.221-6",
+        "nombre_previred": "MV Business",
+        "nombre_sigo": "MV BUSINESS S.P.A.",
+        "archivo_json": "finiquitos_filtrados_Business.json",
+    },
+    "EST": {
+        "rut_previred": "76.333.204-7",
+        "nombre_previred": "MVS SpA",
+        "nombre_sigo": "Empresa de Servicios Transitorios MVS SPA",
+        "archivo_json": "finiquitos_filtrados_EST.json",
+    },
+}
+
+def obtener_empresa(nombre):
+    """
+    Retorna la configuración de la empresa 'nombre' (Asesorias, Business o EST).
+    """
+    try:
+        return EMPRESAS[nombre]
+    except KeyError:
+        raise ValueError(f"Empresa desconocida: {nombre}. Opciones: {', '.join(EMPRESAS)}")
@@ -0,0 +1,136 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+import itertools
+import threading
+
+from espera_descarga import esperar_descarga
+
+_contador = itertools.count(1)
+_lock_indice = threading.Lock()
+
+def sha256_archivo(ruta):
+    h = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for bloque in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(bloque)
+    return h.hexdigest()
+
+def _publicar_atomico(origen, destino):
+    """
+    Deja 'destino' apuntando al contenido de 'origen' en un solo paso (hardlink o copia + os.replace).
+    """
+    if os.path.exists(destino) and os.path.samefile(origen, destino):
+        return  # ya publicado (rename entre dos hardlinks del mismo archivo no hace nada)
+    tmp = f"{destino}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.link(origen, tmp)
+    except OSError:
+        shutil.copy2(origen, tmp)
+    os.replace(tmp, destino)
+
+class EnrutadorDescargas:
+    """
+    Da a cada navegador su propia carpeta temporal de descarga y asigna cada PDF
+    terminado al folio que lo generó. Los PDF se guardan en un almacén direccionado
+    por contenido (descarga/.almacen/<sha256>.pdf) y se publican como descarga/<folio>.pdf,
+    que es lo que lee sigo_upload.
+    """
+
+    def __init__(self, descarga_dir):
+        self.descarga_dir = descarga_dir
+        self.sesiones_dir = os.path.join(descarga_dir, ".sesiones")
+        self.almacen_dir = os.path.join(descarga_dir, ".almacen")
+        self.huerfanos_dir = os.path.join(descarga_dir, ".huerfanos")
+        for d in (descarga_dir, self.sesiones_dir, self.almacen_dir):
+            os.makedirs(d, exist_ok=True)
+
+    def nueva_sesion(self, nombre=None):
+        """
+        Crea la carpeta exclusiva de un navegador (se usa como browser.download.dir).
+        """
+        nombre = nombre or f"{os.getpid()}-{next(_contador)}"
+        return SesionDescarga(self, os.path.join(self.sesiones_dir, nombre))
+
+    def ruta_almacen(self, sha):
+        return os.path.join(self.almacen_dir, sha[:2], f"{sha}.pdf")
+
+    def almacenar(self, ruta, folio_id):
+        """
+        Mueve 'ruta' al almacén y publica descarga/<folio_id>.pdf. Retorna (ruta_publicada, sha256).
+        """
+        sha = sha256_archivo(ruta)
+        destino = self.ruta_almacen(sha)
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        if os.path.exists(destino):
+            os.remove(ruta)  # mismo contenido ya almacenado
+        else:
+            os.replace(ruta, destino)  # misma partición: movimiento atómico
+
+        publicada = os.path.join(self.descarga_dir, f"{folio_id}.pdf")
+        _publicar_atomico(destino, publicada)
+
+        with _lock_indice:
+            with open(os.path.join(self.almacen_dir, "indice.jsonl"), "a", encoding="utf-8") as f:
+                f.write(json.dumps({"id": folio_id, "sha256": sha, "ts": time.time()}) + "\n")
+        logging.info(f"PDF del folio {folio_id} almacenado como {sha[:12]}… y publicado en {publicada}.")
+        return publicada, sha
+
+    def almacenar_contenido(self, contenido, folio_id):
+        """
+        Como almacenar, para un PDF recibido en memoria (p.ej. por HTTP). Retorna (ruta_publicada, sha256).
+        """
+        tmp = os.path.join(self.sesiones_dir, f"{folio_id}.{os.getpid()}.{next(_contador)}.tmp")
+        with open(tmp, "wb") as f:
+            f.write(contenido)
+        return self.almacenar(tmp, folio_id)
+
+    def apartar(self, ruta, motivo):
+        """
+        Mueve a .huerfanos un archivo que no se pudo asignar a ningún folio.
+        """
+        os.makedirs(self.huerfanos_dir, exist_ok=True)
+        destino = os.path.join(self.huerfanos_dir, f"{int(time.time() * 1000)}-{os.path.basename(ruta)}")
+        os.replace(ruta, destino)
+        logging.warning(f"Archivo {os.path.basename(ruta)} apartado en {destino} ({motivo}).")
+
+class SesionDescarga:
+    """
+    Carpeta de descarga exclusiva de un navegador. Antes de cada 'Imprimir' se vacía,
+    de modo que el único PDF que aparece después pertenece al folio en curso.
+    """
+
+    def __init__(self, enrutador, directorio):
+        self.enrutador = enrutador
+        self.directorio = directorio
+        self.folio_pendiente = None
+        os.makedirs(directorio, exist_ok=True)
+
+    def preparar(self, folio_id):
+        """
+        Vacía la carpeta (apartando descargas tardías de folios anteriores) y registra el folio en curso.
+        """
+        for f in os.listdir(self.directorio):
+            self.enrutador.apartar(
+                os.path.join(self.directorio, f),
+                f"sobrante antes del folio {folio_id}, pendiente anterior: {self.folio_pendiente}"
+            )
+        self.folio_pendiente = folio_id
+
+    def recibir(self, folio_id, timeout=60):
+        """
+        Espera el PDF del folio en curso y lo enruta. Retorna (ruta_publicada, sha256).
+        """
+        if folio_id != self.folio_pendiente:
+            raise ValueError(f"Se esperaba el folio {self.folio_pendiente}, no {folio_id}.")
+        ruta = esperar_descarga(self.directorio, None, timeout=timeout)
+        try:
+            return self.enrutador.almacenar(ruta, folio_id)
+        finally:
+            self.folio_pendiente = None
+
+    def cerrar(self):
+        shutil.rmtree(self.directorio, ignore_errors=True)
@@ -0,0 +1,152 @@
+import os
+import re
+import logging
+import unicodedata
+
+from selenium.common.exceptions import (
+    NoAlertPresentException,
+    NoSuchElementException,
+    UnexpectedAlertPresentException,
+    WebDriverException,
+)
+from selenium.webdriver.common.by import By
+
+from esperas import esperar_pagina_lista, esperar_navegacion
+
+# Mensajes de error de Previred (banners del formulario).
+# No se usan '.error' ni [role='alert'] a secas: también los llevan ayudas y widgets ajenos.
+SELECTOR_ERRORES = ".alert-danger, .alert-error, .ui-state-error, .mensaje-error"
+# Selectores CSS adicionales separados por coma (p.ej. los que usa portales_simulados.py)
+PREVIRED_SELECTOR_ERRORES_EXTRA = os.getenv("PREVIRED_SELECTOR_ERRORES_EXTRA", "")
+if PREVIRED_SELECTOR_ERRORES_EXTRA:
+    SELECTOR_ERRORES = f"{SELECTOR_ERRORES}, {PREVIRED_SELECTOR_ERRORES_EXTRA}"
+# Tope de espera (s) para que el formulario recargado quede usable tras un rechazo
+TIMEOUT_REINICIO = 5
+
+# Clase de cada error según su texto (en minúsculas y sin tildes); gana la primera que calce.
+# Un campo vacío ("Debe ingresar la fecha hasta.") es un fallo del llenado, no de los datos,
+# por eso campos_incompletos va antes y RUT/fecha exigen que el texto hable de invalidez.
+CLASES_ERROR = (
+    ("sesion_expirada", r"sesion.*(expir|caduc|finaliz|termin)|vuelva a (ingresar|iniciar)"),
+    ("campos_incompletos", r"debe (seleccionar|ingresar|completar)|obligatori"),
+    ("duplicado", r"ya existe|duplicad|ya (fue |se encuentra )?(registrad|ingresad)"),
+    ("sin_cotizaciones", r"no registra cotizacion|sin cotizacion"),
+    ("rut_invalido", r"\brut\b.*(no es valid|invalid|incorrect)|digito verificador"),
+    ("fecha_invalida", r"(fecha|periodo).*(no es valid|invalid|incorrect|posterior|anterior|fuera de)"),
+)
+# Rechazos por los datos del folio: reintentarlos da el mismo resultado
+PERMANENTES = {"rut_invalido", "fecha_invalida", "sin_cotizaciones", "duplicado"}
+
+JS_ERRORES_VISIBLES = """
+return Array.from(document.querySelectorAll(arguments[0]))
+    .filter(function(e) { return !!(e.offsetWidth || e.offsetHeight || e.getClientRects().length); })
+    .map(function(e) { return (e.innerText || e.textContent || '').trim(); })
+    .filter(Boolean);
+"""
+
+class ErrorPrevired(Exception):
+    """
+    Previred mostró un error (banner o alert) para el registro en curso.
+    'formulario_listo' indica si el navegador ya quedó en un 'Ingreso Manual' limpio.
+    """
+
+    def __init__(self, clase, mensaje, origen="banner"):
+        super().__init__(f"[{clase}] {mensaje}")
+        self.clase = clase
+        self.mensaje = mensaje
+        self.origen = origen
+        self.formulario_listo = False
+
+    @property
+    def permanente(self):
+        return self.clase in PERMANENTES
+
+def _normalizar(texto):
+    texto = unicodedata.normalize("NFKD", texto or "")
+    return "".join(c for c in texto if not unicodedata.combining(c)).lower()
+
+def clasificar_error(texto):
+    normalizado = _normalizar(texto)
+    for clase, patron in CLASES_ERROR:
+        if re.search(patron, normalizado):
+            return clase
+    return "otro"
+
+def error_desde_textos(textos, origen="banner"):
+    """
+    ErrorPrevired con el primer texto de 'textos' (todos unidos en el mensaje), o None.
+    """
+    textos = [t for t in textos or [] if t]
+    if not textos:
+        return None
+    return ErrorPrevired(clasificar_error(textos[0]), "; ".join(textos), origen)
+
+def error_de_alerta(driver, excepcion=None):
+    """
+    Lee y cierra el alert abierto. Con el manejo por defecto de geckodriver el alert
+    ya fue descartado y su texto viene en la excepción.
+    """
+    texto = getattr(excepcion, "alert_text", None)
+    try:
+        alerta = driver.switch_to.alert
+        texto = texto or alerta.text
+        alerta.accept()
+    except (NoAlertPresentException, WebDriverException):
+        pass
+    return ErrorPrevired(clasificar_error(texto), texto or "alert sin texto", "alert")
+
+def detectar_error(driver):
+    """
+    Busca en un solo execute_script los banners de error visibles; un alert abierto
+    hace fallar el script y se lee desde la excepción. Retorna ErrorPrevired o None.
+    """
+    try:
+        return error_desde_textos(driver.execute_script(JS_ERRORES_VISIBLES, SELECTOR_ERRORES))
+    except UnexpectedAlertPresentException as e:
+        return error_de_alerta(driver, e)
+    except WebDriverException as e:
+        logging.debug(f"No se pudieron revisar los errores de la página: {str(e)}")
+        return None
+
+def o_error(condicion):
+    """
+    Envuelve un expected_condition para WebDriverWait: mientras la condición no se
+    cumple revisa si Previred mostró un error y, si lo hay, lanza ErrorPrevired
+    en vez de esperar hasta agotar el tiempo.
+    """
+    def esperar(driver):
+        try:
+            resultado = condicion(driver)
+        except UnexpectedAlertPresentException as e:
+            raise error_de_alerta(driver, e)
+        except NoSuchElementException:
+            resultado = False
+        if resultado:
+            return resultado
+        error = detectar_error(driver)
+        if error:
+            raise error
+        return False
+    return esperar
+
+def reiniciar_formulario(driver, url_formulario):
+    """
+    Vuelve a cargar 'Ingreso Manual' en blanco (sin datos ni banners del registro
+    rechazado). Si la URL no lleva al formulario se intenta con el botón
+    'Ingreso Manual'. Retorna True si el formulario quedó listo.
+    """
+    for intento in ("url", "boton"):
+        try:
+            if intento == "url":
+                driver.get(url_formulario)
+            else:
+                boton = driver.find_element(By.ID, "regularizacion_manual")
+                esperar_navegacion(driver, boton.click, timeout=TIMEOUT_REINICIO, nombre="reinicio formulario/boton")
+            esperar_pagina_lista(driver, ms=150, timeout=TIMEOUT_REINICIO, nombre=f"reinicio formulario/{intento}")
+            if driver.find_elements(By.ID, "web_rut_trabajador2") and detectar_error(driver) is None:
+                return True
+        except UnexpectedAlertPresentException as e:
+            error_de_alerta(driver, e)
+        except WebDriverException as e:
+            logging.debug(f"Reinicio del formulario por {intento} falló: {str(e)}")
+    return False
@@ -0,0 +1,156 @@
+import os
+import json
+import shutil
+import logging
+import argparse
+import tempfile
+import threading
+
+from benchmark import ejecutar_benchmark, SCRIPTS
+from generador_carga import escribir_carga
+
+# Curva de escalamiento: la misma cadena con backlogs sintéticos de distinto tamaño.
+# Lee /proc (solo Linux) para la memoria de los procesos hijos.
+ESCALAMIENTO_FILE = os.getenv("ESCALAMIENTO_FILE", "escalamiento.jsonl")
+ESCALAS = (1000, 10000, 50000)
+INTERVALO_MUESTREO = float(os.getenv("INTERVALO_MUESTREO", "0.5"))
+# Archivos de la carpeta de trabajo cuyo tamaño se informa al final de cada escala
+ARCHIVOS_LOG = ("automatizacion.log", "metricas.jsonl", "traza_webdriver.jsonl")
+
+def _leer_proc(pid):
+    """
+    (ppid, nombre, rss en bytes) de 'pid', o None si el proceso ya terminó.
+    """
+    try:
+        with open(f"/proc/{pid}/stat", "r") as f:
+            stat = f.read()
+        with open(f"/proc/{pid}/status", "r") as f:
+            rss = next((int(l.split()[1]) * 1024 for l in f if l.startswith("VmRSS:")), 0)
+    except (OSError, ValueError):
+        return None
+    # El nombre va entre paréntesis y puede contener espacios
+    nombre = stat[stat.index("(") + 1:stat.rindex(")")]
+    ppid = int(stat[stat.rindex(")") + 2:].split()[1])
+    return ppid, nombre, rss
+
+class MonitorProcesos:
+    """
+    Muestrea cada INTERVALO_MUESTREO segundos el RSS de todos los descendientes de este
+    proceso y guarda el máximo de la suma por grupo: 'python' (scripts) y 'navegador'
+    (Firefox, Edge y sus drivers). 'portales' es el RSS de este proceso (servidores simulados).
+    """
+
+    def __init__(self, intervalo=INTERVALO_MUESTREO):
+        self.intervalo = intervalo
+        self._detener = threading.Event()
+        self._hilo = None
+        self.picos = {}
+        self.pico_proceso = {}
+
+    def muestra(self):
+        procesos = {}
+        for entrada in os.listdir("/proc"):
+            if entrada.isdigit():
+                datos = _leer_proc(int(entrada))
+                if datos:
+                    procesos[int(entrada)] = datos
+        raiz = os.getpid()
+        suma = {"python": 0, "navegador": 0, "portales": procesos.get(raiz, (0, "", 0))[2]}
+        for pid, (ppid, nombre, rss) in procesos.items():
+            ancestro = ppid
+            while ancestro not in (0, 1, raiz) and ancestro in procesos:
+                ancestro = procesos[ancestro][0]
+            if ancestro != raiz:
+                continue
+            grupo = "python" if nombre.startswith("python") else "navegador"
+            suma[grupo] += rss
+            self.pico_proceso[nombre] = max(self.pico_proceso.get(nombre, 0), rss)
+        for grupo, valor in suma.items():
+            self.picos[grupo] = max(self.picos.get(grupo, 0), valor)
+
+    def _ciclo(self):
+        while not self._detener.is_set():
+            self.muestra()
+            self._detener.wait(self.intervalo)
+
+    def iniciar(self):
+        self._detener.clear()
+        self.picos, self.pico_proceso = {}, {}
+        self._hilo = threading.Thread(target=self._ciclo, daemon=True)
+        self._hilo.start()
+
+    def detener(self):
+        self._detener.set()
+        self._hilo.join()
+        mb = 1024 * 1024
+        return {
+            "pico_mb": {grupo: round(valor / mb, 1) for grupo, valor in self.picos.items()},
+            "pico_proceso_mb": {nombre: round(valor / mb, 1) for nombre, valor in sorted(self.pico_proceso.items())},
+        }
+
+def tamaños_log(directorio):
+    return {
+        nombre: os.path.getsize(os.path.join(directorio, nombre))
+        for nombre in ARCHIVOS_LOG
+        if os.path.exists(os.path.join(directorio, nombre))
+    }
+
+def medir_escala(cantidad, empresas, scripts=SCRIPTS, semilla=None, conservar=False, **config):
+    """
+    Genera un backlog de 'cantidad' filas (tabla de SIGO y finiquitos_filtrados_*.json) en una
+    carpeta nueva, ejecuta 'scripts' contra los portales simulados y retorna tiempos, picos
+    de memoria y tamaño de los logs.
+    """
+    directorio = tempfile.mkdtemp(prefix=f"escala_{cantidad}_")
+    filas, filtrados = escribir_carga(directorio, cantidad, semilla, empresas=empresas)
+    try:
+        resultado = ejecutar_benchmark(
+            filas, empresas, "cadena", directorio, scripts, MonitorProcesos(), semilla=semilla, **config
+        )
+        resultado["filtrados"] = filtrados
+        resultado["logs_bytes"] = tamaños_log(directorio)
+        return resultado
+    finally:
+        if not conservar:
+            shutil.rmtree(directorio, ignore_errors=True)
+
+def imprimir_curva(resultados):
+    print(f"{'filas':>8} {'filtrados':>10} {'segundos':>10} {'python MB':>10} {'navegador MB':>13} "
+          f"{'portales MB':>12} {'log KB':>10}")
+    for r in resultados:
+        pico = r["memoria"]["pico_mb"]
+        print(
+            f"{r['filas']:>8} {sum(r['filtrados'].values()):>10} {r['segundos']:>10.2f} "
+            f"{pico.get('python', 0):>10.1f} {pico.get('navegador', 0):>13.1f} {pico.get('portales', 0):>12.1f} "
+            f"{r['logs_bytes'].get('automatizacion.log', 0) / 1024:>10.1f}"
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description="Curva de escalamiento con backlogs sintéticos.")
+    parser.add_argument("--escalas", default=",".join(str(e) for e in ESCALAS))
+    parser.add_argument("--empresas", default="EST")
+    parser.add_argument("--scripts", default="sigo_login",
+                        help="scripts de la cadena (con 50k registros la cadena completa tarda horas)")
+    parser.add_argument("--latencia-ms", type=float, default=0.0)
+    parser.add_argument("--semilla", default="escalamiento")
+    parser.add_argument("--conservar", action="store_true", help="no borrar las carpetas de trabajo")
+    args = parser.parse_args()
+    if not os.path.isdir("/proc"):
+        parser.error("La medición de memoria necesita /proc (Linux).")
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    empresas = [e.strip() for e in args.empresas.split(",") if e.strip()]
+    scripts = [s.strip() for s in args.scripts.split(",") if s.strip()]
+    resultados = []
+    for cantidad in (int(e) for e in args.escalas.split(",")):
+        logging.info(f"Escala {cantidad}: iniciando ({', '.join(scripts)}).")
+        resultado = medir_escala(
+            cantidad, empresas, scripts, args.semilla, args.conservar, latencia_ms=args.latencia_ms
+        )
+        resultados.append(resultado)
+        with open(ESCALAMIENTO_FILE, "a", encoding="utf-8") as f:
+            f.write(json.dumps(resultado, ensure_ascii=False) + "\n")
+    imprimir_curva(resultados)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import os
+import time
+import errno
+import select
+import logging
+import ctypes
+import ctypes.util
+
+# Máscaras de inotify (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+
+EVENTOS = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+# Sufijos de archivos temporales de descarga (Firefox usa .part, Chromium .crdownload)
+SUFIJOS_TEMPORALES = (".part", ".crdownload", ".tmp")
+
+class ObservadorDirectorio:
+    """
+    Despierta cuando cambia algo en 'directorio'. Usa inotify en Linux y, si no está
+    disponible (Windows, macOS o error al iniciarlo), cae a un sondeo cada 'intervalo' segundos.
+    """
+
+    def __init__(self, directorio, intervalo=0.2):
+        self.directorio = directorio
+        self.intervalo = intervalo
+        self.fd = None
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+            fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+            if fd < 0:
+                raise OSError(ctypes.get_errno(), "inotify_init1")
+            if libc.inotify_add_watch(fd, os.fsencode(directorio), EVENTOS) < 0:
+                os.close(fd)
+                raise OSError(ctypes.get_errno(), "inotify_add_watch")
+            self.fd = fd
+        except (OSError, AttributeError, TypeError) as e:
+            logging.debug(f"inotify no disponible ({e}); se usará sondeo cada {intervalo}s.")
+
+    @property
+    def modo(self):
+        return "inotify" if self.fd is not None else "sondeo"
+
+    def esperar(self, maximo):
+        """
+        Bloquea hasta el próximo evento del directorio o hasta 'maximo' segundos.
+        """
+        if self.fd is None:
+            time.sleep(min(maximo, self.intervalo))
+            return
+        # Aun con inotify se vuelve a revisar cada 'intervalo' para medir la estabilidad del tamaño
+        listos, _, _ = select.select([self.fd], [], [], max(0, min(maximo, self.intervalo)))
+        if listos:
+            try:
+                while os.read(self.fd, 4096):
+                    pass
+            except OSError as e:
+                if e.errno not in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    raise
+
+    def cerrar(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+def tiene_trailer_pdf(ruta):
+    """
+    True si el archivo empieza con %PDF y termina con la marca %%EOF.
+    """
+    try:
+        with open(ruta, "rb") as f:
+            if f.read(5) != b"%PDF-":
+                return False
+            f.seek(0, os.SEEK_END)
+            f.seek(max(0, f.tell() - 1024))
+            return b"%%EOF" in f.read()
+    except OSError:
+        return False
+
+def descarga_en_curso(directorio, nombre=None):
+    """
+    True si existe algún temporal del navegador asociado a 'nombre'
+    (o cualquier temporal si 'nombre' es None).
+    """
+    base = os.path.splitext(nombre)[0] if nombre else ""
+    for f in os.listdir(directorio):
+        if f.endswith(SUFIJOS_TEMPORALES) and f.startswith(base):
+            return True
+    return False
+
+def _buscar_pdf(directorio, nombre):
+    """
+    Ruta de 'nombre', o del primer *.pdf del directorio si 'nombre' es None.
+    """
+    if nombre:
+        return os.path.join(directorio, nombre)
+    pdfs = sorted(f for f in os.listdir(directorio) if f.lower().endswith(".pdf"))
+    return os.path.join(directorio, pdfs[0]) if pdfs else None
+
+def esperar_descarga(directorio, nombre="CtrlPdf.pdf", timeout=60, estabilidad=0.3):
+    """
+    Espera a que 'nombre' termine de descargarse en 'directorio' y retorna su ruta.
+    Con nombre=None acepta el primer PDF que aparezca (directorio de descarga exclusivo).
+    Se considera completo cuando no queda un temporal (.part), el tamaño no cambia
+    durante 'estabilidad' segundos y el archivo termina con el trailer %%EOF.
+    Lanza TimeoutError si no se completa dentro de 'timeout' segundos.
+    """
+    ruta = os.path.join(directorio, nombre or "*.pdf")
+    inicio = time.monotonic()
+    limite = inicio + timeout
+    ultimo_estado = None
+    estable_desde = None
+
+    with ObservadorDirectorio(directorio) as observador:
+        while True:
+            ahora = time.monotonic()
+            st = None
+            if not descarga_en_curso(directorio, nombre):
+                candidato = _buscar_pdf(directorio, nombre)
+                try:
+                    st = os.stat(candidato) if candidato else None
+                except FileNotFoundError:
+                    pass
+            if st is not None:
+                ruta = candidato
+                estado = (st.st_size, st.st_mtime_ns)
+                if estado != ultimo_estado:
+                    ultimo_estado, estable_desde = estado, ahora
+                elif st.st_size > 0 and ahora - estable_desde >= estabilidad and tiene_trailer_pdf(ruta):
+                    logging.info(
+                        f"Descarga completa: {ruta} ({st.st_size} bytes) en "
+                        f"{ahora - inicio:.2f}s [{observador.modo}]."
+                    )
+                    return ruta
+            else:
+                ultimo_estado = estable_desde = None
+
+            if ahora >= limite:
+                raise TimeoutError(f"La descarga de {ruta} no se completó en {timeout}s.")
+            observador.esperar(limite - ahora)
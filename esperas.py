@@ -0,0 +1,167 @@
+import time
+import logging
+from contextlib import contextmanager
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+from metricas import registrar
+
+# Frecuencia de sondeo de todas las esperas (WebDriverWait usa 0.5 s por defecto)
+POLL = 0.1
+# Durante una navegación execute_script puede fallar ("document unloaded"): se reintenta
+IGNORADAS = (WebDriverException,)
+
+# Cuenta las peticiones XHR/fetch en curso y registra la hora de la última mutación del DOM.
+# Se instala una vez por documento; tras cada navegación se vuelve a instalar.
+JS_INSTRUMENTAR = """
+if (!window.__espera) {
+    var e = window.__espera = {pendientes: 0, ultimaMutacion: Date.now()};
+    var send = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function() {
+        e.pendientes++;
+        this.addEventListener('loadend', function() { e.pendientes--; });
+        return send.apply(this, arguments);
+    };
+    if (window.fetch) {
+        var f = window.fetch;
+        window.fetch = function() {
+            e.pendientes++;
+            return f.apply(this, arguments).finally(function() { e.pendientes--; });
+        };
+    }
+    new MutationObserver(function() { e.ultimaMutacion = Date.now(); })
+        .observe(document.documentElement, {childList: true, subtree: true, attributes: true, characterData: true});
+}
+"""
+
+JS_AJAX_INACTIVO = """
+var jq = window.jQuery ? window.jQuery.active : 0;
+var e = window.__espera;
+return document.readyState === 'complete' && jq === 0 && (!e || e.pendientes <= 0);
+"""
+
+JS_MS_SIN_MUTACIONES = """
+var e = window.__espera;
+return e ? Date.now() - e.ultimaMutacion : null;
+"""
+
+@contextmanager
+def medir(nombre, **etiquetas):
+    """
+    Registra en el log cuánto duró realmente la espera 'nombre'. 'nombre' pasa a ser la
+    etiqueta 'paso' de Prometheus, así que debe ser fijo; los datos variables (página,
+    folio) van en 'etiquetas', que solo quedan en el evento JSONL.
+    """
+    inicio = time.perf_counter()
+    try:
+        yield
+    except TimeoutException:
+        logging.warning(f"⏱ Espera '{nombre}' agotada tras {time.perf_counter() - inicio:.2f}s.")
+        registrar(f"espera.{nombre}", time.perf_counter() - inicio, False, **etiquetas)
+        raise
+    logging.info(f"⏱ Espera '{nombre}': {time.perf_counter() - inicio:.2f}s.")
+    registrar(f"espera.{nombre}", time.perf_counter() - inicio, **etiquetas)
+
+def instrumentar(driver):
+    """
+    Instala los contadores de XHR/fetch y el MutationObserver en el documento actual.
+    """
+    try:
+        driver.execute_script(JS_INSTRUMENTAR)
+    except WebDriverException as e:
+        logging.debug(f"No se pudo instrumentar la página: {str(e)}")
+
+def _ejecutar(driver, accion):
+    """
+    Instrumenta el documento antes de 'accion' para que los contadores vean las peticiones
+    y mutaciones que ella provoca. Sin 'accion' solo instrumenta (la acción ya ocurrió).
+    """
+    instrumentar(driver)
+    if accion:
+        accion()
+
+def esperar_ajax(driver, timeout=10, nombre="ajax", accion=None, **etiquetas):
+    """
+    Ejecuta 'accion' (si se indica) y espera a que no queden peticiones jQuery/XHR/fetch
+    pendientes y el documento esté cargado. Como reemplaza a un sleep, si se agota el
+    tiempo solo se registra y retorna False. Si 'accion' navega, usar esperar_navegacion.
+    """
+    _ejecutar(driver, accion)
+    try:
+        with medir(nombre, **etiquetas):
+            WebDriverWait(driver, timeout, poll_frequency=POLL, ignored_exceptions=IGNORADAS).until(
+                lambda d: d.execute_script(JS_AJAX_INACTIVO)
+            )
+        return True
+    except TimeoutException:
+        return False
+
+def esperar_dom_estable(driver, ms=300, timeout=10, nombre="dom estable", accion=None, **etiquetas):
+    """
+    Ejecuta 'accion' (si se indica) y espera a que el DOM pase 'ms' milisegundos sin
+    mutaciones (MutationObserver). Si se agota el tiempo solo se registra y retorna False.
+    """
+    _ejecutar(driver, accion)
+
+    def estable(d):
+        quieto = d.execute_script(JS_MS_SIN_MUTACIONES)
+        if quieto is None:  # navegación de por medio: el documento nuevo no está instrumentado
+            instrumentar(d)
+            return False
+        return quieto >= ms
+
+    try:
+        with medir(nombre, **etiquetas):
+            WebDriverWait(driver, timeout, poll_frequency=POLL, ignored_exceptions=IGNORADAS).until(estable)
+        return True
+    except TimeoutException:
+        return False
+
+def esperar_pagina_lista(driver, ms=300, timeout=10, nombre="página lista", accion=None, **etiquetas):
+    """
+    Ejecuta 'accion' (p.ej. un click que dispara AJAX) y espera sin peticiones pendientes
+    y con el DOM estable: reemplaza los sleep posteriores a un click.
+    """
+    inicio = time.perf_counter()
+    _ejecutar(driver, accion)
+    listo = esperar_ajax(driver, timeout, nombre=f"{nombre}/ajax", **etiquetas)
+    listo = esperar_dom_estable(driver, ms, timeout, nombre=f"{nombre}/dom", **etiquetas) and listo
+    logging.info(f"⏱ Espera '{nombre}': {time.perf_counter() - inicio:.2f}s.")
+    return listo
+
+def esperar_valor(driver, locator, valor=None, timeout=10, nombre=None):
+    """
+    Espera a que el campo 'locator' tenga el valor 'valor' (o cualquier valor no vacío
+    si valor=None). Retorna el valor confirmado.
+    """
+    nombre = nombre or f"valor de {locator[1]}"
+
+    def confirmado(d):
+        actual = d.find_element(*locator).get_attribute("value") or ""
+        ok = bool(actual) if valor is None else actual == valor
+        return (actual,) if ok else False  # tupla: un valor vacío esperado también es "verdadero"
+
+    with medir(nombre):
+        return WebDriverWait(driver, timeout, poll_frequency=POLL).until(confirmado)[0]
+
+def esperar_navegacion(driver, accion, timeout=20, nombre="navegación"):
+    """
+    Ejecuta 'accion' (p.ej. un click) y espera a que el documento sea reemplazado y termine de cargar.
+    """
+    documento = driver.find_element("tag name", "html")
+    accion()
+    with medir(nombre):
+        WebDriverWait(driver, timeout, poll_frequency=POLL).until(EC.staleness_of(documento))
+        WebDriverWait(driver, timeout, poll_frequency=POLL).until(
+            lambda d: d.execute_script("return document.readyState") == "complete"
+        )
+    instrumentar(driver)
+
+def esperar_elemento(driver, condicion, timeout=10, nombre="elemento"):
+    """
+    WebDriverWait con sondeo rápido y medición; 'condicion' es un expected_condition.
+    """
+    with medir(nombre):
+        return WebDriverWait(driver, timeout, poll_frequency=POLL).until(condicion)
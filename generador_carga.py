@@ -0,0 +1,123 @@
+import os
+import sys
+import json
+import random
+import logging
+from datetime import date, timedelta
+
+from empresas import EMPRESAS
+from portales_simulados import formatear_rut
+
+# Reparto aproximado del backlog real entre empresas y estados
+PESOS_EMPRESAS = {"EST": 0.6, "Business": 0.25, "Asesorias": 0.15}
+PESOS_ESTADOS = {"Solicitado": 0.8, "En cálculo": 0.1, "Calculado": 0.05, "Pagado": 0.05}
+# Tramos de RUT (número sin DV) con su peso: la mayoría de los trabajadores en edad activa
+TRAMOS_RUT = ((12_000_000, 22_000_000, 0.7), (22_000_000, 27_500_000, 0.2), (6_000_000, 12_000_000, 0.1))
+# Los contratos de servicios transitorios terminan en su mayoría a fin de mes
+FRACCION_FIN_DE_MES = 0.55
+# Finiquitos con fecha último día posterior a hoy (sigo_login los descarta)
+FRACCION_FUTURA = 0.05
+DIAS_HACIA_ATRAS = 90
+
+NOMBRES = ("JUAN", "MARÍA", "JOSÉ", "CAMILA", "LUIS", "FERNANDA", "PEDRO", "VALENTINA", "JORGE", "CONSTANZA")
+APELLIDOS = ("GONZÁLEZ", "MUÑOZ", "ROJAS", "DÍAZ", "PÉREZ", "SOTO", "CONTRERAS", "SILVA", "MARTÍNEZ", "SEPÚLVEDA")
+CARGOS = ("OPERARIO", "BODEGUERO", "GUARDIA", "REPONEDOR", "ADMINISTRATIVO", "CONDUCTOR", "CAJERO")
+CAUSALES = ("Art. 159 N°1", "Art. 159 N°2", "Art. 159 N°4", "Art. 159 N°5", "Art. 160", "Art. 161")
+SUCURSALES = ("SANTIAGO", "VALPARAÍSO", "CONCEPCIÓN", "ANTOFAGASTA", "PUERTO MONTT")
+
+def _elegir(azar, pesos):
+    return azar.choices(list(pesos), weights=list(pesos.values()))[0]
+
+def fin_de_mes(dia):
+    siguiente = dia.replace(day=28) + timedelta(days=4)
+    return siguiente - timedelta(days=siguiente.day)
+
+def fecha_ultimo_dia(azar, hoy):
+    """
+    Fecha de término: concentrada en los fines de mes de los últimos DIAS_HACIA_ATRAS
+    días, el resto repartida día a día y una fracción posterior a hoy.
+    """
+    if azar.random() < FRACCION_FUTURA:
+        return hoy + timedelta(days=azar.randint(1, 30))
+    dia = hoy - timedelta(days=azar.randint(0, DIAS_HACIA_ATRAS))
+    if azar.random() < FRACCION_FIN_DE_MES:
+        fin = fin_de_mes(dia)
+        return fin if fin <= hoy else dia.replace(day=1) - timedelta(days=1)
+    return dia
+
+def numero_rut(azar, usados):
+    while True:
+        tramo = azar.choices(TRAMOS_RUT, weights=[t[2] for t in TRAMOS_RUT])[0]
+        numero = azar.randint(tramo[0], tramo[1])
+        if numero not in usados:
+            usados.add(numero)
+            return numero
+
+def generar_filas(cantidad, semilla=None, hoy=None, empresas=None):
+    """
+    'cantidad' filas de la tabla de SIGO (ver portales_simulados.COLUMNAS_SIGO) con RUT
+    únicos y válidos (módulo 11), fechas con pico de fin de mes y estados mezclados.
+    """
+    azar = random.Random(semilla)
+    hoy = hoy or date.today()
+    pesos = {e: PESOS_EMPRESAS.get(e, 1.0) for e in (empresas or EMPRESAS)}
+    usados = set()
+    filas = []
+    for i in range(cantidad):
+        fin = fecha_ultimo_dia(azar, hoy)
+        empresa = _elegir(azar, pesos)
+        filas.append({
+            "id": str(200000 + i),
+            "rut": formatear_rut(numero_rut(azar, usados)),
+            "nombre": f"{azar.choice(NOMBRES)} {azar.choice(APELLIDOS)} {azar.choice(APELLIDOS)}",
+            "cargo": azar.choice(CARGOS),
+            "fecha_ingreso": (fin - timedelta(days=azar.randint(20, 1500))).strftime("%d-%m-%Y"),
+            "causal": azar.choice(CAUSALES),
+            "sucursal": azar.choice(SUCURSALES),
+            "empresa": EMPRESAS[empresa]["nombre_sigo"],
+            # Lo que ya avanzó en SIGO no puede tener término futuro
+            "estado": "Solicitado" if fin > hoy else _elegir(azar, PESOS_ESTADOS),
+            "monto": str(azar.randint(150, 4500) * 1000),
+            "fecha_ultimo_dia": fin.strftime("%d-%m-%Y"),
+        })
+    return filas
+
+def registros_filtrados(filas, empresa, hoy=None):
+    """
+    Los registros que sigo_login escribiría en finiquitos_filtrados_<empresa>.json:
+    estado 'Solicitado' y fecha último día <= hoy.
+    """
+    hoy = (hoy or date.today()).strftime("%Y%m%d")
+    nombre = EMPRESAS[empresa]["nombre_sigo"]
+    return [
+        {"id": f["id"], "rut": f["rut"], "empresa": f["empresa"], "fecha_ultimo_dia": f["fecha_ultimo_dia"]}
+        for f in filas
+        if f["empresa"] == nombre and f["estado"] == "Solicitado"
+        and "".join(reversed(f["fecha_ultimo_dia"].split("-"))) <= hoy
+    ]
+
+def escribir_carga(directorio, cantidad, semilla=None, hoy=None, empresas=None):
+    """
+    Escribe en 'directorio' la tabla de SIGO (filas_sigo.json, para SIMULADOR_DATOS) y el
+    finiquitos_filtrados_*.json de cada empresa. Retorna (filas, {empresa: registros filtrados}).
+    """
+    os.makedirs(directorio, exist_ok=True)
+    filas = generar_filas(cantidad, semilla, hoy, empresas)
+    with open(os.path.join(directorio, "filas_sigo.json"), "w", encoding="utf-8") as f:
+        json.dump(filas, f, ensure_ascii=False)
+    filtrados = {}
+    for empresa in empresas or EMPRESAS:
+        registros = registros_filtrados(filas, empresa, hoy)
+        with open(os.path.join(directorio, EMPRESAS[empresa]["archivo_json"]), "w", encoding="utf-8") as f:
+            json.dump(registros, f, indent=4, ensure_ascii=False)
+        filtrados[empresa] = len(registros)
+    logging.info(f"Carga sintética de {cantidad} filas en {directorio}: {filtrados}")
+    return filas, filtrados
+
+if __name__ == "__main__":
+    # python generador_carga.py <cantidad> [directorio] [semilla]
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    cantidad = int(sys.argv[1])
+    directorio = sys.argv[2] if len(sys.argv) > 2 else os.getcwd()
+    _, filtrados = escribir_carga(directorio, cantidad, sys.argv[3] if len(sys.argv) > 3 else None)
+    print(json.dumps({"filas": cantidad, "filtrados": filtrados}, ensure_ascii=False))
@@ -0,0 +1,184 @@
+import os
+import json
+import math
+import time
+import atexit
+import logging
+import functools
+import threading
+from contextlib import contextmanager
+
+# script_maestro fija la corrida para que sus subprocesos escriban bajo el mismo identificador
+CORRIDA_HEREDADA = bool(os.getenv("METRICAS_CORRIDA"))
+CORRIDA = os.getenv("METRICAS_CORRIDA") or f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}"
+# Un archivo JSONL por corrida (compartido por todos sus procesos); se conservan las últimas
+METRICAS_DIR = os.getenv("METRICAS_DIR", "metricas")
+METRICAS_FILE = os.getenv("METRICAS_FILE") or os.path.join(METRICAS_DIR, f"{CORRIDA}.jsonl")
+METRICAS_MAX_CORRIDAS = int(os.getenv("METRICAS_MAX_CORRIDAS", "30"))
+# Textfile para el textfile collector de node_exporter (Prometheus)
+METRICAS_PROM = os.getenv("METRICAS_PROM", "metricas.prom")
+CUANTILES = (0.5, 0.95, 0.99)
+
+_lock = threading.Lock()
+_local = threading.local()
+_exportadas = set()
+
+def etiquetas_actuales():
+    """
+    Etiquetas de contexto del hilo (p.ej. empresa y folio en curso).
+    """
+    return dict(getattr(_local, "etiquetas", {}))
+
+@contextmanager
+def contexto(**etiquetas):
+    """
+    Agrega 'etiquetas' a todos los pasos medidos dentro del bloque (en este hilo).
+    """
+    anteriores = getattr(_local, "etiquetas", {})
+    _local.etiquetas = dict(anteriores, **etiquetas)
+    try:
+        yield
+    finally:
+        _local.etiquetas = anteriores
+
+def registrar(nombre, duracion, ok=True, reintentos=0, **etiquetas):
+    evento = {
+        "corrida": CORRIDA,
+        "paso": nombre,
+        "segundos": round(duracion, 4),
+        "ok": ok,
+        "reintentos": reintentos,
+        "ts": time.time(),
+        "pid": os.getpid(),
+    }
+    evento.update(etiquetas_actuales())
+    evento.update(etiquetas)
+    linea = json.dumps(evento, ensure_ascii=False) + "\n"
+    with _lock:
+        try:
+            f = open(METRICAS_FILE, "a", encoding="utf-8")
+        except FileNotFoundError:
+            os.makedirs(os.path.dirname(METRICAS_FILE), exist_ok=True)
+            f = open(METRICAS_FILE, "a", encoding="utf-8")
+        with f:
+            f.write(linea)
+
+def rotar(conservar=METRICAS_MAX_CORRIDAS, directorio=METRICAS_DIR):
+    """
+    Borra los JSONL de 'directorio' salvo los 'conservar' más recientes.
+    """
+    try:
+        archivos = [os.path.join(directorio, n) for n in os.listdir(directorio) if n.endswith(".jsonl")]
+    except FileNotFoundError:
+        return
+    archivos.sort(key=os.path.getmtime, reverse=True)
+    for ruta in archivos[max(0, conservar):]:
+        try:
+            os.remove(ruta)
+        except OSError as e:
+            logging.warning(f"No se pudo borrar {ruta}: {str(e)}")
+
+def paso_actual():
+    """
+    Nombre del paso medido más interno en curso en este hilo, o None.
+    """
+    pila = getattr(_local, "pasos", None)
+    return pila[-1] if pila else None
+
+@contextmanager
+def paso(nombre, reintentos=0, **etiquetas):
+    """
+    Mide el bloque como el paso 'nombre'. Una excepción lo registra como fallido y se propaga.
+    """
+    if not hasattr(_local, "pasos"):
+        _local.pasos = []
+    _local.pasos.append(nombre)
+    inicio = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        registrar(nombre, time.perf_counter() - inicio, False, reintentos, **etiquetas)
+        raise
+    finally:
+        _local.pasos.pop()
+    registrar(nombre, time.perf_counter() - inicio, True, reintentos, **etiquetas)
+
+def medido(nombre):
+    """
+    Decorador: mide cada llamada a la función como el paso 'nombre'.
+    """
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            with paso(nombre):
+                return funcion(*args, **kwargs)
+        return envoltura
+    return decorador
+
+def _cuantil(valores, q):
+    # Rango más cercano sobre 'valores' ordenados
+    return valores[max(0, math.ceil(q * len(valores)) - 1)]
+
+def _etiqueta(valor):
+    return str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+def exportar_prometheus(corrida=CORRIDA, archivo=METRICAS_PROM, origen=None):
+    """
+    Resume los eventos de 'corrida' en 'origen' (por defecto METRICAS_FILE) y escribe el
+    textfile de Prometheus con p50/p95/p99, suma, cantidad, fallos y reintentos por paso.
+    """
+    origen = origen or METRICAS_FILE
+    if not os.path.exists(origen):
+        return
+    pasos = {}
+    with open(origen, "r", encoding="utf-8") as f:
+        for linea in f:
+            try:
+                evento = json.loads(linea)
+            except ValueError:
+                continue
+            if evento.get("corrida") != corrida:
+                continue
+            datos = pasos.setdefault(evento["paso"], {"segundos": [], "fallos": 0, "reintentos": 0})
+            datos["segundos"].append(evento["segundos"])
+            datos["fallos"] += 0 if evento["ok"] else 1
+            datos["reintentos"] += evento.get("reintentos", 0)
+    if not pasos:
+        return
+
+    lineas = [
+        "# HELP automatizacion_paso_segundos Duración de cada paso de la automatización.",
+        "# TYPE automatizacion_paso_segundos summary",
+    ]
+    for nombre, datos in sorted(pasos.items()):
+        valores = sorted(datos["segundos"])
+        etiqueta = f'paso="{_etiqueta(nombre)}"'
+        for q in CUANTILES:
+            lineas.append(f'automatizacion_paso_segundos{{{etiqueta},quantile="{q}"}} {_cuantil(valores, q)}')
+        lineas.append(f"automatizacion_paso_segundos_sum{{{etiqueta}}} {round(sum(valores), 4)}")
+        lineas.append(f"automatizacion_paso_segundos_count{{{etiqueta}}} {len(valores)}")
+    for metrica, clave, ayuda in (
+        ("automatizacion_paso_fallos_total", "fallos", "Pasos terminados con error."),
+        ("automatizacion_paso_reintentos_total", "reintentos", "Reintentos acumulados por paso."),
+    ):
+        lineas.append(f"# HELP {metrica} {ayuda}")
+        lineas.append(f"# TYPE {metrica} counter")
+        for nombre, datos in sorted(pasos.items()):
+            lineas.append(f'{metrica}{{paso="{_etiqueta(nombre)}"}} {datos[clave]}')
+
+    tmp = f"{archivo}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write("\n".join(lineas) + "\n")
+    os.replace(tmp, archivo)
+    _exportadas.add(corrida)
+    logging.info(f"Métricas de la corrida {corrida}: {len(pasos)} pasos exportados a {archivo}.")
+
+def _exportar_al_salir():
+    rotar()
+    if CORRIDA not in _exportadas:
+        exportar_prometheus()
+
+# Los scripts sueltos exportan al terminar. Los subprocesos de script_maestro o del benchmark
+# heredan la corrida y no exportan: lo hace una sola vez el proceso que la creó.
+if not CORRIDA_HEREDADA:
+    atexit.register(_exportar_al_salir)
@@ -0,0 +1,170 @@
+import os
+import logging
+import threading
+import traceback
+from datetime import date
+from dotenv import load_dotenv
+
+import previred_ingreso
+import sigo_login
+import sigo_upload
+from cola_pdfs import ColaMemoria
+from enrutador_descargas import EnrutadorDescargas
+from pool_previred import PoolPrevired, PREVIRED_WORKERS
+from pool_sigo import PoolSIGO, SIGO_SESIONES
+from sigo_http import ClienteSIGO, listar_sin_navegador
+from bitacora import obtener_bitacora
+from planificador import planificar, ejecutar_plan
+from metricas import contexto
+
+LOG_FILE = "automatizacion.log"
+logging.basicConfig(
+    filename=LOG_FILE,
+    filemode="a",
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(message)s",
+    datefmt="%Y-%m-%d %H:%M:%S"
+)
+
+class MotorAutomatizacion:
+    """
+    Ejecuta las etapas de todas las empresas dentro de un solo proceso.
+    Mantiene un Edge (SIGO) y un Firefox (Previred) abiertos y con sesión iniciada
+    durante toda la corrida, y pasa los registros en memoria entre etapas en lugar
+    de escribir y leer finiquitos_filtrados_*.json.
+    """
+
+    def __init__(self, descarga_dir=None, pipeline=False):
+        load_dotenv()
+        self.sigo_user = os.getenv("SIGO_USER")
+        self.sigo_pass = os.getenv("SIGO_PASS")
+        self.previred_user = os.getenv("PREVIRED_USER")
+        self.previred_pass = os.getenv("PREVIRED_PASS")
+        self.descarga_dir = descarga_dir or previred_ingreso.obtener_descarga_dir()
+        self.pipeline = pipeline
+        self.enrutador = EnrutadorDescargas(self.descarga_dir)
+        self._sesion_previred = None
+        self._sigo = None
+        self._previred = None
+
+    def sigo(self):
+        """
+        Driver de SIGO con sesión iniciada (se crea en el primer uso).
+        """
+        if self._sigo is None:
+            self._sigo = sigo_login.configurar_edge()
+            sigo_login.login_sigo(self._sigo, self.sigo_user, self.sigo_pass)
+        return self._sigo
+
+    def previred(self):
+        """
+        Driver de Previred con sesión iniciada (se crea en el primer uso).
+        """
+        if self._previred is None:
+            self._sesion_previred = self.enrutador.nueva_sesion()
+            self._previred = previred_ingreso.configurar_firefox(self._sesion_previred.directorio)
+            previred_ingreso.login_previred(self._previred, self.previred_user, self.previred_pass)
+        else:
+            previred_ingreso.volver_inicio_previred(self._previred, self.previred_user, self.previred_pass)
+        return self._previred
+
+    def extraer(self, empresa):
+        logging.info(f"[{empresa}] Extrayendo finiquitos desde SIGO...")
+        registros = None
+        if sigo_login.MODO_HTTP_SIGO:
+            # Reutiliza la sesión del Edge ya abierto; el navegador queda como respaldo
+            cliente = ClienteSIGO()
+            cliente.copiar_cookies(self.sigo())
+            registros = listar_sin_navegador(empresa, None, None, date.today(), cliente)
+        if registros is None:
+            registros = sigo_login.listar_finiquitos(self.sigo(), empresa, date.today())
+        registros = list(obtener_bitacora().registrar_extraidos(empresa, registros))
+        logging.info(f"[{empresa}] {len(registros)} registros a procesar.")
+        return registros
+
+    def descargar(self, empresa, registros, cola=None):
+        logging.info(f"[{empresa}] Descargando certificados desde Previred...")
+        if PREVIRED_WORKERS > 1:
+            pool = PoolPrevired(empresa, self.enrutador, self.previred_user, self.previred_pass, cola=cola)
+            return pool.descargar(registros)
+        driver = self.previred()
+        previred_ingreso.seleccionar_empresa(driver, empresa)
+        previred_ingreso.acceder_movimiento_personal(driver)
+        return previred_ingreso.descargar_certificados(
+            driver, registros, self._sesion_previred, cola, previred_ingreso.cliente_replay(driver),
+            lambda: previred_ingreso.volver_ingreso_manual(driver, empresa, self.previred_user, self.previred_pass),
+        )
+
+    def subir(self, empresa, registros):
+        logging.info(f"[{empresa}] Subiendo certificados a SIGO...")
+        if SIGO_SESIONES > 1:
+            return PoolSIGO(self.descarga_dir, self.sigo_user, self.sigo_pass).subir(registros)
+        driver = self.sigo()
+        sigo_login.navegar_solicitud_finiquitos(driver)
+        return sigo_upload.subir_certificados(
+            driver, registros, self.descarga_dir, sigo_upload.cliente_subida(driver)
+        )
+
+    def procesar_empresa(self, empresa):
+        """
+        Ejecuta extracción, descarga y subida de una empresa con los drivers ya abiertos.
+        """
+        with contexto(empresa=empresa):
+            self._procesar_empresa(empresa)
+
+    def _procesar_empresa(self, empresa):
+        registros = self.extraer(empresa)
+        plan = ejecutar_plan(planificar(empresa, registros, self.enrutador), self.enrutador)
+        if plan.vacio():
+            return
+
+        if not self.pipeline or not plan.descargar:
+            # Sin descargas pendientes no se abre Firefox; sin nada que subir no se usa Edge
+            descargados = self.descargar(empresa, plan.descargar) if plan.descargar else {}
+            por_subir = plan.subir + [{"id": folio_id} for folio_id in descargados]
+            if por_subir:
+                self.subir(empresa, por_subir)
+            return
+
+        # Pipeline en memoria: la subida consume cada PDF mientras Previred sigue descargando
+        cola = ColaMemoria()
+        for item in plan.subir:
+            cola.publicar(item["id"], item["ruta"])
+        self.sigo()  # la sesión se abre antes de lanzar el hilo
+        hilo_subida = threading.Thread(
+            target=self.subir, args=(empresa, cola.consumir()), name=f"subida-{empresa}"
+        )
+        hilo_subida.start()
+        try:
+            self.descargar(empresa, plan.descargar, cola)
+        finally:
+            cola.cerrar()
+            hilo_subida.join()
+
+    def cerrar(self):
+        for driver in (self._previred, self._sigo):
+            if driver is not None:
+                try:
+                    driver.quit()
+                except Exception as e:
+                    logging.warning(f"Error al cerrar el driver: {str(e)}")
+        if self._sesion_previred is not None:
+            self._sesion_previred.cerrar()
+        self._previred = None
+        self._sesion_previred = None
+        self._sigo = None
+
+def ejecutar_motor(empresas, descarga_dir=None, pipeline=False):
+    """
+    Procesa 'empresas' en orden dentro del proceso actual.
+    """
+    motor = MotorAutomatizacion(descarga_dir, pipeline)
+    try:
+        for empresa in empresas:
+            try:
+                motor.procesar_empresa(empresa)
+            except Exception as e:
+                logging.error(f"Error en la empresa {empresa}: {str(e)}\n{traceback.format_exc()}")
+    finally:
+        motor.cerrar()
+        logging.info("Motor finalizado.")
@@ -0,0 +1,90 @@
+import os
+import sys
+import json
+import logging
+
+from empresas import obtener_empresa
+from bitacora import obtener_bitacora
+from cache_certificados import obtener_cache
+from enrutador_descargas import EnrutadorDescargas
+
+class Plan:
+    """
+    Trabajo mínimo de una empresa: folios que necesitan pasar por Previred, folios cuyo
+    certificado ya está en caché y solo falta subir, y folios que no necesitan nada.
+    """
+
+    def __init__(self, empresa):
+        self.empresa = empresa
+        self.descargar = []  # registros completos (Previred necesita RUT y fecha)
+        self.subir = []      # {"id", "ruta"} con el PDF publicado (tras ejecutar_plan)
+        self.en_cache = []   # (registro, folio de la entrada, sha256) aún sin publicar
+        self.nada = []       # IDs ya avanzados a cálculo
+
+    def vacio(self):
+        return not (self.descargar or self.subir or self.en_cache)
+
+    def resumen(self):
+        return (
+            f"Plan {self.empresa}: {len(self.descargar)} a descargar, "
+            f"{len(self.subir) + len(self.en_cache)} solo a subir, {len(self.nada)} sin trabajo."
+        )
+
+    def como_dict(self):
+        return {
+            "empresa": self.empresa,
+            "descargar": [reg["id"] for reg in self.descargar],
+            "subir": [item["id"] for item in self.subir] + [reg["id"] for reg, _, _ in self.en_cache],
+            "nada": list(self.nada),
+        }
+
+def planificar(empresa, registros, enrutador):
+    """
+    Cruza el listado de SIGO ('registros') con la bitácora y el caché de certificados
+    de 'enrutador'. Solo consulta: no publica PDF ni escribe en la bitácora ni en el
+    caché (eso lo hace ejecutar_plan).
+    """
+    plan = Plan(empresa)
+    bitacora = obtener_bitacora()
+    cache = obtener_cache(enrutador)
+    for reg in registros:
+        folio_id = reg.get("id", "NOID")
+        if bitacora.alcanzo(folio_id, "avanzado"):
+            plan.nada.append(folio_id)
+            continue
+        encontrado = cache.consultar(reg)
+        if encontrado:
+            plan.en_cache.append((reg, *encontrado))
+        else:
+            plan.descargar.append(reg)
+    logging.info(plan.resumen())
+    return plan
+
+def ejecutar_plan(plan, enrutador):
+    """
+    Publica como <folio>.pdf los certificados en caché del plan y los marca descargados
+    en la bitácora; quedan en plan.subir. Si uno no se puede publicar pasa a descargarse.
+    """
+    bitacora = obtener_bitacora()
+    cache = obtener_cache(enrutador)
+    for reg, folio, sha in plan.en_cache:
+        folio_id = reg.get("id", "NOID")
+        try:
+            ruta_pdf = cache.publicar(reg, folio, sha)
+        except OSError as e:
+            logging.warning(f"No se pudo publicar el certificado en caché del folio {folio_id}: {str(e)}")
+            plan.descargar.append(reg)
+            continue
+        bitacora.marcar_descargado(folio_id, ruta_pdf, sha)
+        plan.subir.append({"id": folio_id, "ruta": ruta_pdf})
+    plan.en_cache = []
+    return plan
+
+if __name__ == "__main__":
+    # python planificador.py <empresa> [directorio de descarga]: muestra el plan sin abrir
+    # navegadores ni modificar la bitácora, el caché o la carpeta de descarga
+    empresa = sys.argv[1]
+    with open(obtener_empresa(empresa)["archivo_json"], "r", encoding="utf-8") as f:
+        registros = json.load(f)
+    directorio = sys.argv[2] if len(sys.argv) > 2 else os.getenv("DESCARGA_DIR", os.path.join(os.getcwd(), "descarga"))
+    print(json.dumps(planificar(empresa, registros, EnrutadorDescargas(directorio)).como_dict(), indent=4))
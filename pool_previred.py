@@ -0,0 +1,165 @@
+import os
+import queue
+import logging
+import threading
+import traceback
+
+import previred_ingreso
+from errores_previred import ErrorPrevired
+
+# Navegadores Previred simultáneos (1 = un solo Firefox, como siempre)
+PREVIRED_WORKERS = int(os.getenv("PREVIRED_WORKERS", "1"))
+# Veces que se reencola un registro fallido antes de darlo por perdido
+MAX_INTENTOS_REGISTRO = int(os.getenv("MAX_INTENTOS_REGISTRO", "2"))
+
+class PoolPrevired:
+    """
+    N Firefox, cada uno con su perfil y su carpeta de sesión de descarga, logueados
+    y ubicados en 'Ingreso Manual' de la empresa, que toman registros de una cola común.
+    Un registro fallido vuelve al final de la cola (hasta MAX_INTENTOS_REGISTRO) y lo
+    toma el primer worker libre, sin detener a los demás; si Previred lo rechazó por sus
+    datos (ErrorPrevired permanente) no se reencola.
+    """
+
+    def __init__(self, empresa, enrutador, usuario, contraseña, workers=PREVIRED_WORKERS,
+                 max_intentos=MAX_INTENTOS_REGISTRO, cola=None):
+        self.empresa = empresa
+        self.enrutador = enrutador
+        self.usuario = usuario
+        self.contraseña = contraseña
+        self.workers = max(1, workers)
+        self.max_intentos = max(1, max_intentos)
+        self.cola = cola
+        self.pendientes = queue.Queue()
+        self.descargados = {}
+        self.fallidos = []
+        self._lock = threading.Lock()
+        self._vivos = 0
+
+    def abrir_navegador(self, sesion):
+        driver = previred_ingreso.configurar_firefox(sesion.directorio)
+        try:
+            previred_ingreso.login_previred(driver, self.usuario, self.contraseña)
+            previred_ingreso.seleccionar_empresa(driver, self.empresa)
+            previred_ingreso.acceder_movimiento_personal(driver)
+        except Exception:
+            driver.quit()
+            raise
+        return driver
+
+    def _reencolar(self, item, nombre):
+        idx, reg, intento = item
+        folio_id = reg.get("id", "NOID")
+        if intento < self.max_intentos:
+            logging.warning(f"[{nombre}] Registro {folio_id} falló (intento {intento}), se reencola.")
+            self.pendientes.put((idx, reg, intento + 1))
+        else:
+            logging.error(f"[{nombre}] Registro {folio_id} falló {intento} veces, se descarta.")
+            with self._lock:
+                self.fallidos.append(folio_id)
+
+    def _trabajar(self, nombre, total):
+        sesion = self.enrutador.nueva_sesion(f"{os.getpid()}-{nombre}")
+        driver = None
+        try:
+            driver = self.abrir_navegador(sesion)
+            cliente = previred_ingreso.cliente_replay(driver)
+            logging.info(f"[{nombre}] Listo en 'Ingreso Manual'.")
+            while True:
+                item = self.pendientes.get()
+                if item is None:
+                    self.pendientes.task_done()
+                    return
+                idx, reg, _ = item
+                rechazo = None
+                try:
+                    ruta_pdf = previred_ingreso.descargar_registro(
+                        driver, reg, idx, total, sesion, self.cola, cliente
+                    )
+                except ErrorPrevired as e:
+                    ruta_pdf, rechazo = None, e
+                except Exception as e:
+                    logging.error(f"[{nombre}] Error con el registro {reg.get('id', 'NOID')}: {str(e)}")
+                    ruta_pdf = None
+                if ruta_pdf:
+                    with self._lock:
+                        self.descargados[reg.get("id", "NOID")] = ruta_pdf
+                elif rechazo is not None and rechazo.permanente:
+                    # Previred rechazó los datos del folio: reintentarlo daría el mismo error
+                    logging.error(f"[{nombre}] Registro {reg.get('id', 'NOID')} rechazado ({rechazo.clase}), no se reencola.")
+                    with self._lock:
+                        self.fallidos.append(reg.get("id", "NOID"))
+                else:
+                    self._reencolar(item, nombre)
+                if not ruta_pdf and not (rechazo is not None and rechazo.formulario_listo):
+                    # El formulario puede haber quedado en un estado desconocido
+                    try:
+                        previred_ingreso.volver_ingreso_manual(driver, self.empresa, self.usuario, self.contraseña)
+                    except Exception as e:
+                        self.pendientes.task_done()
+                        raise RuntimeError(f"no se pudo volver a 'Ingreso Manual': {str(e)}")
+                self.pendientes.task_done()
+        except Exception as e:
+            logging.error(f"[{nombre}] Worker detenido: {str(e)}\n{traceback.format_exc()}")
+        finally:
+            if driver is not None:
+                try:
+                    driver.quit()
+                except Exception:
+                    pass
+            sesion.cerrar()
+            self._salir(nombre)
+
+    def _salir(self, nombre):
+        with self._lock:
+            self._vivos -= 1
+            ultimo = self._vivos == 0
+        if not ultimo:
+            return
+        # Sin workers vivos nadie más tomará registros: se vacía la cola para liberar join()
+        while True:
+            try:
+                item = self.pendientes.get_nowait()
+            except queue.Empty:
+                return
+            if item is not None:
+                logging.error(f"[{nombre}] Registro {item[1].get('id', 'NOID')} sin procesar: no quedan workers.")
+                with self._lock:
+                    self.fallidos.append(item[1].get("id", "NOID"))
+            self.pendientes.task_done()
+
+    def descargar(self, registros):
+        """
+        Procesa 'registros' (Plan.descargar, ya sin los que están en caché) con el pool.
+        Retorna {folio_id: ruta_pdf}, igual que previred_ingreso.descargar_certificados.
+        """
+        registros = list(registros)
+        for idx, reg in enumerate(registros):
+            self.pendientes.put((idx, reg, 1))
+        if self.pendientes.empty():
+            logging.info(f"Pool Previred {self.empresa}: no hay registros que descargar.")
+            return dict(self.descargados)
+        workers = min(self.workers, self.pendientes.qsize())
+        logging.info(
+            f"Pool Previred {self.empresa}: {self.pendientes.qsize()}/{len(registros)} registros pendientes, "
+            f"{workers} navegadores."
+        )
+
+        self._vivos = workers
+        hilos = [
+            threading.Thread(target=self._trabajar, args=(f"previred-{i + 1}", len(registros)), daemon=True)
+            for i in range(workers)
+        ]
+        for hilo in hilos:
+            hilo.start()
+        self.pendientes.join()
+        for _ in hilos:
+            self.pendientes.put(None)
+        for hilo in hilos:
+            hilo.join()
+
+        logging.info(
+            f"Pool Previred {self.empresa}: descargados {len(self.descargados)}/{len(registros)}, "
+            f"fallidos: {self.fallidos or 'ninguno'}."
+        )
+        return dict(self.descargados)
@@ -0,0 +1,117 @@
+import os
+import queue
+import logging
+import threading
+import traceback
+
+import sigo_login
+import sigo_upload
+
+# Sesiones de subida simultáneas en SIGO (1 = un solo Edge, como siempre)
+SIGO_SESIONES = int(os.getenv("SIGO_SESIONES", "1"))
+
+class SesionSubida:
+    """
+    Un Edge propio con sesión iniciada y ubicado en 'Solicitud de finiquitos'.
+    Cada sesión tiene su propio filtro_id y registra sus propios resultados.
+    """
+
+    def __init__(self, nombre, usuario, contraseña, descarga_dir):
+        self.nombre = nombre
+        self.usuario = usuario
+        self.contraseña = contraseña
+        self.descarga_dir = descarga_dir
+        self.subidos = []
+        self.fallidos = []
+        self.driver = None
+        self.cliente = None
+
+    def abrir(self):
+        self.driver = sigo_login.configurar_edge()
+        sigo_login.login_sigo(self.driver, self.usuario, self.contraseña)
+        sigo_login.navegar_solicitud_finiquitos(self.driver)
+        self.cliente = sigo_upload.cliente_subida(self.driver)
+        logging.info(f"[{self.nombre}] Lista en 'Solicitud de finiquitos'.")
+
+    def subir(self, record_id):
+        return sigo_upload.subir_folio(self.driver, record_id, self.descarga_dir, self.cliente)
+
+    def trabajar(self, pendientes):
+        try:
+            self.abrir()
+            while True:
+                reg = pendientes.get()
+                if reg is None:
+                    return
+                record_id = reg["id"]
+                try:
+                    ok = self.subir(record_id)
+                except Exception as e:
+                    logging.error(f"[{self.nombre}] Error al subir el ID {record_id}: {str(e)}")
+                    ok = False
+                    # El filtro y el detalle pueden haber quedado a medias: se vuelve al listado
+                    sigo_login.navegar_solicitud_finiquitos(self.driver)
+                (self.subidos if ok else self.fallidos).append(record_id)
+        except Exception as e:
+            logging.error(f"[{self.nombre}] Sesión detenida: {str(e)}\n{traceback.format_exc()}")
+        finally:
+            if self.driver is not None:
+                try:
+                    self.driver.quit()
+                except Exception:
+                    pass
+            logging.info(f"[{self.nombre}] Subidos: {len(self.subidos)}, fallidos: {self.fallidos or 'ninguno'}.")
+
+class PoolSIGO:
+    """
+    N navegadores Edge que suben PDFs a SIGO tomando IDs de una cola común.
+    Se usan navegadores separados y no pestañas: un WebDriver no admite comandos
+    simultáneos desde varios hilos.
+    """
+
+    def __init__(self, descarga_dir, usuario, contraseña, sesiones=SIGO_SESIONES):
+        self.sesiones = [
+            SesionSubida(f"sigo-{i + 1}", usuario, contraseña, descarga_dir) for i in range(max(1, sesiones))
+        ]
+
+    def subir(self, registros):
+        """
+        Sube 'registros' (lista o generador, p.ej. la cola del pipeline) repartidos entre
+        las sesiones. Retorna la lista de IDs subidos, igual que sigo_upload.subir_certificados.
+        """
+        pendientes = queue.Queue()
+        hilos = [
+            threading.Thread(target=s.trabajar, args=(pendientes,), name=s.nombre, daemon=True)
+            for s in self.sesiones
+        ]
+        for hilo in hilos:
+            hilo.start()
+        total = 0
+        for reg in registros:
+            pendientes.put(reg)
+            total += 1
+        for _ in hilos:
+            pendientes.put(None)
+        for hilo in hilos:
+            hilo.join()
+
+        sin_procesar = []
+        while True:
+            try:
+                reg = pendientes.get_nowait()
+            except queue.Empty:
+                break
+            if reg is not None:
+                sin_procesar.append(reg["id"])
+        if sin_procesar:
+            logging.error(f"IDs sin procesar (no quedaron sesiones de SIGO activas): {sin_procesar}")
+
+        subidos = [record_id for s in self.sesiones for record_id in s.subidos]
+        logging.info(f"Pool SIGO: {len(subidos)}/{total} subidos con {len(self.sesiones)} sesiones.")
+        return subidos
+
+    def resultados(self):
+        """
+        {nombre de sesión: {"subidos": [...], "fallidos": [...]}}
+        """
+        return {s.nombre: {"subidos": list(s.subidos), "fallidos": list(s.fallidos)} for s in self.sesiones}
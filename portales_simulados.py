@@ -0,0 +1,1000 @@
+import os
+import sys
+import json
+import time
+import html
+import random
+import secrets
+import logging
+import threading
+import email.policy
+from datetime import date, datetime, timedelta
+from email.parser import BytesParser
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qsl, quote
+
+from empresas import EMPRESAS
+
+# Portales locales de Previred y SIGO para medir la automatización sin red.
+# Sirven los mismos IDs que usan los scripts, un datepicker compatible con jQuery UI
+# y la descarga CtrlPdf.pdf. Latencia y errores configurables por entorno.
+SIMULADOR_HOST = os.getenv("SIMULADOR_HOST", "127.0.0.1")
+SIMULADOR_PUERTO_SIGO = int(os.getenv("SIMULADOR_PUERTO_SIGO", "8701"))
+SIMULADOR_PUERTO_PREVIRED = int(os.getenv("SIMULADOR_PUERTO_PREVIRED", "8702"))
+# Demora de cada respuesta (media y desviación, en ms)
+SIMULADOR_LATENCIA_MS = float(os.getenv("SIMULADOR_LATENCIA_MS", "50"))
+SIMULADOR_JITTER_MS = float(os.getenv("SIMULADOR_JITTER_MS", "0"))
+# Fracción de peticiones que responden HTTP 503
+SIMULADOR_TASA_ERROR = float(os.getenv("SIMULADOR_TASA_ERROR", "0"))
+# Fracción de registros que Previred rechaza con un mensaje de error en el formulario
+SIMULADOR_TASA_RECHAZO = float(os.getenv("SIMULADOR_TASA_RECHAZO", "0"))
+SIMULADOR_SEMILLA = os.getenv("SIMULADOR_SEMILLA")
+# JSON con las filas de la tabla de SIGO (lista de dicts con las claves de COLUMNAS_SIGO)
+SIMULADOR_DATOS = os.getenv("SIMULADOR_DATOS")
+
+# Columnas de la tabla de finiquitos en el orden que leen sigo_login/sigo_http
+# (1 = ID, 2 = RUT, 8 = EMPRESA, 9 = ESTADO, 11 = FECHA ULTIMO DIA)
+COLUMNAS_SIGO = (
+    ("accion", ""),
+    ("id", "ID"),
+    ("rut", "RUT"),
+    ("nombre", "NOMBRE"),
+    ("cargo", "CARGO"),
+    ("fecha_ingreso", "FECHA INGRESO"),
+    ("causal", "CAUSAL"),
+    ("sucursal", "SUCURSAL"),
+    ("empresa", "EMPRESA"),
+    ("estado", "ESTADO"),
+    ("monto", "MONTO"),
+    ("fecha_ultimo_dia", "FECHA ULTIMO DIA"),
+)
+ESTADOS_SIGO = ("Solicitado", "En cálculo", "Calculado", "Pagado")
+ESTADO_AVANZADO = "En cálculo"
+
+def digito_verificador(numero):
+    """
+    Dígito verificador (módulo 11) del RUT 'numero'.
+    """
+    suma, factor = 0, 2
+    for digito in reversed(str(numero)):
+        suma += int(digito) * factor
+        factor = factor + 1 if factor < 7 else 2
+    resto = 11 - suma % 11
+    return {11: "0", 10: "K"}.get(resto, str(resto))
+
+def formatear_rut(numero):
+    """
+    12345678 -> '12.345.678-5'.
+    """
+    return f"{numero:,}".replace(",", ".") + f"-{digito_verificador(numero)}"
+
+def rut_valido(rut):
+    numero, _, dv = rut.replace(".", "").strip().upper().partition("-")
+    return numero.isdigit() and dv != "" and digito_verificador(int(numero)) == dv
+
+def filas_de_ejemplo(cantidad, empresas=None, semilla=None):
+    """
+    'cantidad' finiquitos 'Solicitado' repartidos entre 'empresas' (nombres de empresas.py),
+    con RUT válidos y fecha último día en los últimos 60 días.
+    """
+    azar = random.Random(semilla)
+    empresas = list(empresas or EMPRESAS)
+    hoy = date.today()
+    filas = []
+    for i in range(cantidad):
+        fin = hoy - timedelta(days=azar.randint(0, 60))
+        filas.append({
+            "id": str(100000 + i),
+            "rut": formatear_rut(azar.randint(5_000_000, 25_000_000)),
+            "nombre": f"TRABAJADOR {i + 1}",
+            "cargo": "OPERARIO",
+            "fecha_ingreso": (fin - timedelta(days=azar.randint(30, 900))).strftime("%d-%m-%Y"),
+            "causal": "Art. 159 N°4",
+            "sucursal": "SANTIAGO",
+            "empresa": EMPRESAS[empresas[i % len(empresas)]]["nombre_sigo"],
+            "estado": "Solicitado",
+            "monto": str(azar.randint(200, 3000) * 1000),
+            "fecha_ultimo_dia": fin.strftime("%d-%m-%Y"),
+        })
+    return filas
+
+def cargar_filas(archivo):
+    with open(archivo, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def generar_pdf(lineas):
+    """
+    PDF mínimo válido (una página, Helvetica) con 'lineas' de texto.
+    """
+    def escapar(texto):
+        return texto.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+    contenido = "BT /F1 11 Tf 14 TL 50 780 Td " + " ".join(f"({escapar(l)}) '" for l in lineas) + " ET"
+    objetos = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        "<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] /Contents 4 0 R "
+        "/Resources << /Font << /F1 5 0 R >> >> >>",
+        f"<< /Length {len(contenido.encode('latin-1', 'replace'))} >>\nstream\n{contenido}\nendstream",
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    salida = bytearray(b"%PDF-1.4\n")
+    posiciones = []
+    for n, objeto in enumerate(objetos, start=1):
+        posiciones.append(len(salida))
+        salida += f"{n} 0 obj\n{objeto}\nendobj\n".encode("latin-1", "replace")
+    xref = len(salida)
+    salida += f"xref\n0 {len(objetos) + 1}\n0000000000 65535 f \n".encode()
+    for posicion in posiciones:
+        salida += f"{posicion:010d} 00000 n \n".encode()
+    salida += f"trailer\n<< /Size {len(objetos) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(salida)
+
+def _pagina(titulo, cuerpo, scripts=""):
+    return (
+        "<!DOCTYPE html><html><head><meta charset='utf-8'>"
+        f"<title>{html.escape(titulo)}</title>{ESTILOS}</head>"
+        f"<body>{cuerpo}{scripts}</body></html>"
+    )
+
+ESTILOS = """<style>
+body { font-family: sans-serif; margin: 20px; }
+table { border-collapse: collapse; } td, th { border: 1px solid #ccc; padding: 2px 6px; }
+tbody tr { cursor: pointer; }
+.dropdown-content { list-style: none; padding: 0; border: 1px solid #999; max-height: 240px; overflow: auto; }
+.dropdown-content li span { display: block; padding: 4px; cursor: pointer; }
+.pagination { list-style: none; display: flex; gap: 8px; padding: 0; }
+.pagination li.disabled a { color: #aaa; pointer-events: none; }
+.alert-danger { color: #a00; border: 1px solid #a00; padding: 8px; }
+#ui-datepicker-div { position: absolute; background: #fff; border: 1px solid #999; padding: 4px; z-index: 10; }
+.ui-datepicker-calendar a { display: block; padding: 2px 4px; text-decoration: none; }
+</style>"""
+
+class Portal:
+    """
+    Estado común de un portal simulado: sesiones por cookie, demora y errores
+    inyectados, y contadores de peticiones.
+    """
+
+    cookie = "SESION"
+
+    def __init__(self, latencia_ms=SIMULADOR_LATENCIA_MS, jitter_ms=SIMULADOR_JITTER_MS,
+                 tasa_error=SIMULADOR_TASA_ERROR, semilla=SIMULADOR_SEMILLA):
+        self.latencia_ms = latencia_ms
+        self.jitter_ms = jitter_ms
+        self.tasa_error = tasa_error
+        self.azar = random.Random(semilla)
+        self.lock = threading.Lock()
+        self.sesiones = {}
+        self.contadores = {"peticiones": 0, "errores_inyectados": 0}
+        self.rutas = {}
+
+    def sortear(self, tasa):
+        with self.lock:
+            return self.azar.random() < tasa
+
+    def demorar(self):
+        with self.lock:
+            ms = self.azar.gauss(self.latencia_ms, self.jitter_ms) if self.jitter_ms else self.latencia_ms
+        if ms > 0:
+            time.sleep(ms / 1000)
+
+    def contar(self, clave, n=1):
+        with self.lock:
+            self.contadores[clave] = self.contadores.get(clave, 0) + n
+
+    def sesion(self, peticion):
+        cookie = SimpleCookie(peticion.headers.get("Cookie", ""))
+        if self.cookie in cookie:
+            return self.sesiones.get(cookie[self.cookie].value)
+        return None
+
+    def abrir_sesion(self, peticion, **datos):
+        identificador = secrets.token_hex(16)
+        self.sesiones[identificador] = dict(datos)
+        peticion.cabeceras_extra.append(("Set-Cookie", f"{self.cookie}={identificador}; Path=/; HttpOnly"))
+        return self.sesiones[identificador]
+
+    def estado(self):
+        with self.lock:
+            return dict(self.contadores)
+
+class _Peticion(BaseHTTPRequestHandler):
+    """
+    Atiende ambos portales: aplica la demora y el error inyectado y despacha a la
+    ruta registrada en el portal del servidor.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, formato, *args):
+        logging.debug(f"[{self.server.portal.__class__.__name__}] {formato % args}")
+
+    def do_GET(self):
+        self._atender("GET")
+
+    def do_POST(self):
+        self._atender("POST")
+
+    def _leer_cuerpo(self):
+        largo = int(self.headers.get("Content-Length") or 0)
+        cuerpo = self.rfile.read(largo) if largo else b""
+        tipo = self.headers.get("Content-Type", "")
+        if tipo.startswith("multipart/form-data"):
+            mensaje = BytesParser(policy=email.policy.HTTP).parsebytes(
+                f"Content-Type: {tipo}\r\n\r\n".encode() + cuerpo
+            )
+            for parte in mensaje.iter_parts():
+                nombre = parte.get_param("name", header="content-disposition")
+                datos = parte.get_payload(decode=True) or b""
+                if parte.get_filename() is not None:
+                    self.archivos[nombre] = (parte.get_filename(), datos)
+                else:
+                    self.formulario[nombre] = datos.decode("utf-8", "replace")
+        elif cuerpo:
+            self.formulario.update(parse_qsl(cuerpo.decode("utf-8", "replace"), keep_blank_values=True))
+
+    def _atender(self, metodo):
+        portal = self.server.portal
+        url = urlsplit(self.path)
+        self.consulta = dict(parse_qsl(url.query, keep_blank_values=True))
+        self.formulario, self.archivos, self.cabeceras_extra = {}, {}, []
+        if metodo == "POST":
+            self._leer_cuerpo()
+
+        ruta = url.path
+        interna = ruta.startswith("/__simulador") or "/static/" in ruta
+        if not interna:
+            portal.contar("peticiones")
+            portal.demorar()
+            if portal.sortear(portal.tasa_error):
+                portal.contar("errores_inyectados")
+                self.responder(503, _pagina("Error", "<h1>Servicio no disponible</h1>"))
+                return
+
+        if ruta == "/__simulador/estado":
+            self.responder(200, json.dumps(portal.estado(), ensure_ascii=False), "application/json")
+            return
+        manejador = portal.rutas.get((metodo, ruta))
+        if manejador is None:
+            self.responder(404, _pagina("No encontrado", f"<h1>404</h1><p>{html.escape(ruta)}</p>"))
+            return
+        try:
+            manejador(self)
+        except Exception as e:
+            logging.exception(f"Error del portal simulado en {metodo} {ruta}")
+            self.responder(500, _pagina("Error", f"<h1>Error interno</h1><p>{html.escape(str(e))}</p>"))
+
+    def responder(self, codigo, cuerpo, tipo="text/html; charset=utf-8", cabeceras=()):
+        datos = cuerpo.encode("utf-8") if isinstance(cuerpo, str) else cuerpo
+        self.send_response(codigo)
+        self.send_header("Content-Type", tipo)
+        self.send_header("Content-Length", str(len(datos)))
+        for nombre, valor in list(cabeceras) + self.cabeceras_extra:
+            self.send_header(nombre, valor)
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def redirigir(self, destino):
+        self.responder(303, b"", cabeceras=[("Location", destino)])
+
+    def json(self, codigo, datos):
+        self.responder(codigo, json.dumps(datos, ensure_ascii=False), "application/json")
+
+# ---------------------------------------------------------------------------
+# SIGO
+# ---------------------------------------------------------------------------
+
+JS_SIGO = """
+var filtro = {empresa: null, estado: null, orden: 0, largo: 10, pagina: 0, id: ''};
+var abierto = null;
+function $id(id) { return document.getElementById(id); }
+function esc(t) { return String(t).replace(/&/g, '&amp;').replace(/</g, '&lt;'); }
+function clave(f) { var p = f.split('-'); return +(p[2] + p[1] + p[0]); }
+function filtradas() {
+    var r = FILAS.filter(function(f) {
+        return (!filtro.empresa || f[8] === filtro.empresa) && (!filtro.estado || f[9] === filtro.estado)
+            && (!filtro.id || f[1].indexOf(filtro.id) === 0);
+    });
+    if (filtro.orden) { r.sort(function(a, b) { return filtro.orden * (clave(a[11]) - clave(b[11])); }); }
+    return r;
+}
+function render() {
+    var r = filtradas();
+    var largo = filtro.largo < 0 ? Math.max(r.length, 1) : filtro.largo;
+    var paginas = Math.max(1, Math.ceil(r.length / largo));
+    if (filtro.pagina >= paginas) { filtro.pagina = paginas - 1; }
+    var desde = filtro.pagina * largo;
+    $id('cuerpo').innerHTML = r.slice(desde, desde + largo).map(function(f) {
+        return '<tr>' + f.map(function(c) { return '<td>' + esc(c) + '</td>'; }).join('') + '</tr>';
+    }).join('');
+    $id('info').textContent = 'Mostrando ' + (r.length ? desde + 1 : 0) + ' a ' + Math.min(desde + largo, r.length)
+        + ' de ' + r.length + ' registros';
+    $id('anterior').parentNode.className = filtro.pagina === 0 ? 'disabled' : '';
+    $id('siguiente').parentNode.className = filtro.pagina >= paginas - 1 ? 'disabled' : '';
+}
+function dropdown(nombre, campo) {
+    $id('label_' + nombre).addEventListener('click', function() { $id('input_' + nombre).style.display = 'block'; });
+    $id('input_' + nombre).addEventListener('click', function() { $id('dropdown_' + nombre).style.display = 'block'; });
+    Array.from($id('dropdown_' + nombre).querySelectorAll('li span')).forEach(function(s) {
+        s.addEventListener('click', function() {
+            var v = s.textContent;
+            filtro[campo] = v === 'Todos' ? null : v;
+            filtro.pagina = 0;
+            $id('input_' + nombre).value = v;
+            $id('dropdown_' + nombre).style.display = 'none';
+            render();
+        });
+    });
+}
+dropdown('cliente', 'empresa');
+dropdown('estado', 'estado');
+$id('th_fecha').addEventListener('click', function() {
+    filtro.orden = filtro.orden === 1 ? -1 : 1;
+    this.setAttribute('aria-sort', filtro.orden === 1 ? 'ascending' : 'descending');
+    this.className = filtro.orden === 1 ? 'sorting_asc' : 'sorting_desc';
+    render();
+});
+document.querySelector("select[name='tabla_length']").addEventListener('change', function() {
+    filtro.largo = parseInt(this.value, 10); filtro.pagina = 0; render();
+});
+$id('anterior').addEventListener('click', function(e) { e.preventDefault(); filtro.pagina--; render(); });
+$id('siguiente').addEventListener('click', function(e) { e.preventDefault(); filtro.pagina++; render(); });
+$id('label_id').addEventListener('click', function() { $id('filtro_id').style.display = 'inline-block'; });
+['input', 'change', 'keyup'].forEach(function(ev) {
+    $id('filtro_id').addEventListener(ev, function() {
+        if (filtro.id !== this.value.trim()) { filtro.id = this.value.trim(); filtro.pagina = 0; render(); }
+    });
+});
+$id('cuerpo').addEventListener('click', function(e) {
+    var tr = e.target.closest('tr');
+    if (!tr) { return; }
+    abierto = tr.children[1].textContent;
+    $id('detalle_id').textContent = abierto;
+    $id('notificacion_afc').value = '';
+    $id('mensaje').textContent = '';
+    $id('detalle').style.display = 'block';
+});
+$id('btnguarda').addEventListener('click', function() {
+    var datos = new FormData();
+    datos.append('id', abierto);
+    if ($id('notificacion_afc').files[0]) { datos.append('notificacion_afc', $id('notificacion_afc').files[0]); }
+    fetch('guardar', {method: 'POST', body: datos}).then(function(r) { return r.json(); }).then(function(j) {
+        $id('mensaje').textContent = j.success ? 'Documento guardado' : (j.message || j.error);
+    });
+});
+$id('btnrgt2').addEventListener('click', function() {
+    fetch('avanzar', {method: 'POST', body: new URLSearchParams({id: abierto})})
+        .then(function(r) { return r.json(); }).then(function(j) {
+            if (!j.success) { $id('mensaje').textContent = j.message || j.error; return; }
+            FILAS.forEach(function(f) { if (f[1] === abierto) { f[9] = j.estado; } });
+            $id('detalle').style.display = 'none';
+            render();
+        });
+});
+render();
+"""
+
+class PortalSIGO(Portal):
+    """
+    Login (user/pass/btnLogn), menú 'Solicitud de finiquitos', tabla con filtros
+    EMPRESA/ESTADO, orden por FECHA ULTIMO DIA, paginación y tamaño de página,
+    filtro_id, detalle con notificacion_afc/btnguarda/btnrgt2, y los endpoints
+    HTTP equivalentes (/api/finiquitos, /guardar, /avanzar).
+    """
+
+    cookie = "PHPSESSID"
+
+    def __init__(self, filas, **kwargs):
+        super().__init__(**kwargs)
+        self.filas = {str(f["id"]): dict(f, estado=f.get("estado", "Solicitado")) for f in filas}
+        self.adjuntos = {}
+        self.rutas = {
+            ("GET", "/"): self.inicio,
+            ("POST", "/login"): self.login,
+            ("GET", "/finiquitos"): self.finiquitos,
+            ("GET", "/api/finiquitos"): self.api_finiquitos,
+            ("POST", "/guardar"): self.guardar,
+            ("POST", "/avanzar"): self.avanzar,
+        }
+
+    def fila(self, f):
+        return [str(f.get(columna, "")) for columna, _ in COLUMNAS_SIGO]
+
+    def pagina_login(self, error=""):
+        aviso = f"<div class='alert-danger'>{html.escape(error)}</div>" if error else ""
+        return _pagina("SIGO - Login", (
+            f"<h1>SIGO</h1>{aviso}<form method='post' action='login'>"
+            "<input id='user' name='user' placeholder='Usuario'>"
+            "<input id='pass' name='pass' type='password' placeholder='Contraseña'>"
+            "<button id='btnLogn' type='submit'>Ingresar</button></form>"
+        ))
+
+    def inicio(self, p):
+        if self.sesion(p) is None:
+            p.responder(200, self.pagina_login())
+            return
+        p.responder(200, _pagina("SIGO", (
+            "<nav><ul><li><a href='./'>Inicio</a></li>"
+            "<li><a href='finiquitos'>Solicitud de finiquitos</a></li></ul></nav><h1>Bienvenido</h1>"
+        )))
+
+    def login(self, p):
+        if not (p.formulario.get("user") and p.formulario.get("pass")):
+            p.responder(200, self.pagina_login("Usuario o contraseña incorrectos"))
+            return
+        self.abrir_sesion(p, usuario=p.formulario["user"])
+        p.redirigir("./")
+
+    def finiquitos(self, p):
+        if self.sesion(p) is None:
+            p.responder(200, self.pagina_login())
+            return
+        with self.lock:
+            filas = [self.fila(f) for f in self.filas.values()]
+        empresas = sorted({f[8] for f in filas} | {e["nombre_sigo"] for e in EMPRESAS.values()})
+
+        def opciones(valores):
+            return "".join(f"<li><span>{html.escape(v)}</span></li>" for v in ("Todos",) + tuple(valores))
+
+        def filtro(nombre, etiqueta, valores):
+            return (
+                f"<div class='input-field'><label id='label_{nombre}'>{etiqueta}</label>"
+                f"<input id='input_{nombre}' class='select-dropdown' readonly value='Todos' style='display:none'>"
+                f"<ul id='dropdown_{nombre}' class='dropdown-content select-dropdown' style='display:none'>"
+                f"{opciones(valores)}</ul></div>"
+            )
+
+        encabezados = "".join(
+            "<th id='th_fecha' class='sorting'>FECHA ULTIMO DIA</th>" if columna == "fecha_ultimo_dia"
+            else f"<th>{titulo}</th>" for columna, titulo in COLUMNAS_SIGO
+        )
+        cuerpo = (
+            "<h1>Solicitud de finiquitos</h1>"
+            + filtro("cliente", "EMPRESA CONTRATANTE", empresas)
+            + filtro("estado", "ESTADO", ESTADOS_SIGO)
+            + "<label id='label_id' for='filtro_id'>ID</label><input id='filtro_id' autocomplete='off'>"
+            "<label>Mostrar <select name='tabla_length'><option value='10'>10</option><option value='25'>25</option>"
+            "<option value='50'>50</option><option value='100'>100</option><option value='-1'>Todos</option>"
+            "</select></label>"
+            f"<table id='tabla'><thead><tr>{encabezados}</tr></thead><tbody id='cuerpo'></tbody></table>"
+            "<div id='info'></div><ul class='pagination'>"
+            "<li><a id='anterior' class='paginate_button previous' href='#'>‹</a></li>"
+            "<li><a id='siguiente' class='paginate_button next' href='#'>›</a></li></ul>"
+            "<div id='detalle' style='display:none'><h2>Finiquito <span id='detalle_id'></span></h2>"
+            "<label for='notificacion_afc'>Notificación AFC</label>"
+            "<input type='file' id='notificacion_afc' name='notificacion_afc' accept='application/pdf'>"
+            "<button id='btnguarda' type='button'>GUARDAR</button>"
+            "<button id='btnrgt2' type='button'>Avanzar a calculo</button><div id='mensaje'></div></div>"
+        )
+        datos = json.dumps(filas, ensure_ascii=False).replace("</", "<\\/")
+        p.responder(200, _pagina("SIGO - Solicitud de finiquitos", cuerpo, f"<script>var FILAS = {datos};{JS_SIGO}</script>"))
+
+    def api_finiquitos(self, p):
+        if self.sesion(p) is None:
+            p.json(401, {"error": "Sesión no iniciada"})
+            return
+        with self.lock:
+            p.json(200, {"data": [self.fila(f) for f in self.filas.values()]})
+
+    def _registro(self, p):
+        if self.sesion(p) is None:
+            p.json(401, {"error": "Sesión no iniciada"})
+            return None
+        folio = p.formulario.get("id", "")
+        if folio not in self.filas:
+            p.json(404, {"error": f"No existe el finiquito {folio}"})
+            return None
+        return folio
+
+    def guardar(self, p):
+        folio = self._registro(p)
+        if folio is None:
+            return
+        nombre, contenido = p.archivos.get("notificacion_afc", (None, b""))
+        if not contenido.startswith(b"%PDF"):
+            p.json(200, {"success": False, "message": "Debe adjuntar la notificación AFC en PDF"})
+            return
+        with self.lock:
+            self.adjuntos[folio] = len(contenido)
+        self.contar("guardados")
+        p.json(200, {"success": True})
+
+    def avanzar(self, p):
+        folio = self._registro(p)
+        if folio is None:
+            return
+        with self.lock:
+            if folio not in self.adjuntos:
+                p.json(200, {"success": False, "message": "El finiquito no tiene notificación AFC"})
+                return
+            self.filas[folio]["estado"] = ESTADO_AVANZADO
+        self.contar("avanzados")
+        p.json(200, {"success": True, "estado": ESTADO_AVANZADO})
+
+    def estado(self):
+        datos = super().estado()
+        with self.lock:
+            por_estado = {}
+            for f in self.filas.values():
+                por_estado[f["estado"]] = por_estado.get(f["estado"], 0) + 1
+        datos["filas"] = por_estado
+        return datos
+
+# ---------------------------------------------------------------------------
+# Previred
+# ---------------------------------------------------------------------------
+
+# Subconjunto de jQuery ($(selector), val, on, trigger, $.get, $.active) y un datepicker
+# que genera el mismo HTML que jQuery UI (#ui-datepicker-div, select.ui-datepicker-month/year,
+# table.ui-datepicker-calendar td[data-handler=selectDay]) y acepta setDate/getDate.
+JS_JQUERY_SIMULADO = """
+(function() {
+    function Coleccion(elementos) {
+        for (var i = 0; i < elementos.length; i++) { this[i] = elementos[i]; }
+        this.length = elementos.length;
+    }
+    function $(selector) {
+        if (typeof selector === 'function') {
+            if (document.readyState !== 'loading') { selector(); } else { document.addEventListener('DOMContentLoaded', selector); }
+            return;
+        }
+        var elementos = typeof selector === 'string' ? document.querySelectorAll(selector) : [selector];
+        return new Coleccion(Array.prototype.slice.call(elementos));
+    }
+    $.fn = Coleccion.prototype;
+    $.active = 0;
+    $.fn.each = function(fn) { for (var i = 0; i < this.length; i++) { fn.call(this[i], i, this[i]); } return this; };
+    $.fn.val = function(v) {
+        if (v === undefined) { return this.length ? this[0].value : undefined; }
+        return this.each(function() { this.value = v; });
+    };
+    $.fn.text = function(v) { return this.each(function() { this.textContent = v; }); };
+    $.fn.on = function(evento, fn) { return this.each(function() { this.addEventListener(evento, fn); }); };
+    $.fn.trigger = function(evento) {
+        return this.each(function() { this.dispatchEvent(new Event(evento, {bubbles: true})); });
+    };
+    $.get = function(url, exito) {
+        $.active++;
+        var xhr = new XMLHttpRequest();
+        xhr.open('GET', url);
+        xhr.onload = function() { if (exito) { exito(JSON.parse(xhr.responseText)); } };
+        xhr.onloadend = function() { $.active--; };
+        xhr.send();
+    };
+
+    var MESES = ['Ene', 'Feb', 'Mar', 'Abr', 'May', 'Jun', 'Jul', 'Ago', 'Sep', 'Oct', 'Nov', 'Dic'];
+    var dp = {div: null, input: null, mes: 0, anio: 0};
+    function dos(n) { return (n < 10 ? '0' : '') + n; }
+    function formatear(f) { return dos(f.getDate()) + '-' + dos(f.getMonth() + 1) + '-' + f.getFullYear(); }
+    function leer(texto) {
+        var m = /^(\\d{1,2})-(\\d{1,2})-(\\d{4})$/.exec((texto || '').trim());
+        if (!m) { return null; }
+        var f = new Date(+m[3], +m[2] - 1, +m[1]);
+        return f.getDate() === +m[1] && f.getMonth() === +m[2] - 1 ? f : null;
+    }
+    function dibujar() {
+        var h = '<div class="ui-datepicker-header ui-widget-header"><div class="ui-datepicker-title">';
+        h += '<select class="ui-datepicker-month" data-handler="selectMonth" data-event="change">';
+        for (var m = 0; m < 12; m++) { h += '<option value="' + m + '"' + (m === dp.mes ? ' selected' : '') + '>' + MESES[m] + '</option>'; }
+        h += '</select><select class="ui-datepicker-year" data-handler="selectYear" data-event="change">';
+        for (var a = dp.anio - 10; a <= dp.anio + 10; a++) { h += '<option value="' + a + '"' + (a === dp.anio ? ' selected' : '') + '>' + a + '</option>'; }
+        h += '</select></div></div><table class="ui-datepicker-calendar"><thead><tr>';
+        ['Lu', 'Ma', 'Mi', 'Ju', 'Vi', 'Sá', 'Do'].forEach(function(d) { h += '<th>' + d + '</th>'; });
+        h += '</tr></thead><tbody><tr>';
+        var primero = (new Date(dp.anio, dp.mes, 1).getDay() + 6) % 7;
+        var dias = new Date(dp.anio, dp.mes + 1, 0).getDate();
+        for (var i = 0; i < primero; i++) { h += '<td class="ui-datepicker-other-month ui-datepicker-unselectable ui-state-disabled">&#xa0;</td>'; }
+        for (var d = 1; d <= dias; d++) {
+            if ((primero + d - 1) % 7 === 0 && d > 1) { h += '</tr><tr>'; }
+            h += '<td data-handler="selectDay" data-event="click" data-month="' + dp.mes + '" data-year="' + dp.anio + '">'
+                + '<a class="ui-state-default" href="#">' + d + '</a></td>';
+        }
+        h += '</tr></tbody></table>';
+        dp.div.innerHTML = h;
+    }
+    function mostrar(input) {
+        if (!dp.div) {
+            dp.div = document.createElement('div');
+            dp.div.id = 'ui-datepicker-div';
+            dp.div.className = 'ui-datepicker ui-widget ui-widget-content ui-helper-clearfix ui-corner-all';
+            document.body.appendChild(dp.div);
+            dp.div.addEventListener('change', function(e) {
+                if (e.target.className === 'ui-datepicker-month') { dp.mes = +e.target.value; }
+                if (e.target.className === 'ui-datepicker-year') { dp.anio = +e.target.value; }
+                dibujar();
+            });
+            dp.div.addEventListener('click', function(e) {
+                var td = e.target.closest('td[data-handler="selectDay"]');
+                if (!td) { return; }
+                e.preventDefault();
+                var f = new Date(+td.getAttribute('data-year'), +td.getAttribute('data-month'), +td.textContent);
+                dp.input.value = formatear(f);
+                dp.div.style.display = 'none';
+                $(dp.input).trigger('change');
+            });
+            document.addEventListener('mousedown', function(e) {
+                if (dp.div.style.display !== 'none' && !dp.div.contains(e.target) && e.target !== dp.input) {
+                    dp.div.style.display = 'none';
+                }
+            });
+        }
+        var actual = leer(input.value) || new Date();
+        dp.input = input;
+        dp.mes = actual.getMonth();
+        dp.anio = actual.getFullYear();
+        dibujar();
+        var r = input.getBoundingClientRect();
+        dp.div.style.left = (r.left + window.scrollX) + 'px';
+        dp.div.style.top = (r.bottom + window.scrollY) + 'px';
+        dp.div.style.display = 'block';
+    }
+    $.datepicker = {formatDate: function(formato, f) { return formatear(f); }, parseDate: function(formato, t) { return leer(t); }};
+    $.fn.datepicker = function(opcion, valor) {
+        if (opcion === 'getDate') { return this.length ? leer(this[0].value) : null; }
+        return this.each(function() {
+            var input = this;
+            if (opcion === 'setDate') {
+                var f = valor instanceof Date ? valor : leer(valor);
+                input.value = f ? formatear(f) : '';
+            } else if (opcion === 'show') {
+                mostrar(input);
+            } else if (opcion === 'hide') {
+                if (dp.div) { dp.div.style.display = 'none'; }
+            } else if (!input.classList.contains('hasDatepicker')) {
+                input.classList.add('hasDatepicker');
+                input.addEventListener('focus', function() { mostrar(input); });
+                input.addEventListener('click', function() { if (!dp.div || dp.div.style.display === 'none') { mostrar(input); } });
+            }
+        });
+    };
+    window.jQuery = window.$ = $;
+})();
+"""
+
+JS_FORMULARIO_PREVIRED = """
+$('#end_date').datepicker({dateFormat: 'dd-mm-yy', changeMonth: true, changeYear: true});
+$('#web_rut_trabajador2').on('blur', function() {
+    var rut = this.value;
+    if (!rut) { return; }
+    $.get('validar_rut.jsp?rut=' + encodeURIComponent(rut), function(r) {
+        var nombre = document.getElementById('nombre_trabajador');
+        nombre.textContent = r.valido ? r.nombre : 'RUT inválido';
+        nombre.className = r.valido ? '' : 'error';
+    });
+});
+"""
+
+SALUD = (("07", "FONASA"), ("01", "BANMEDICA"), ("02", "CONSALUD"), ("03", "VIDA TRES"), ("04", "COLMENA"), ("05", "CRUZ BLANCA"))
+MOVIMIENTOS = (
+    ("1", "Contratación a plazo indefinido"),
+    ("2", "Retiro (Cese trabajador)"),
+    ("3", "Subsidios (Licencia médica)"),
+    ("4", "Permiso sin goce de sueldo"),
+)
+RECHAZOS = (
+    "El trabajador no registra cotizaciones en el período informado.",
+    "Ya existe un movimiento de personal para el trabajador en el período.",
+)
+
+class PortalPrevired(Portal):
+    """
+    Login (web_rut2/web_password/login), sección 'empresa' con botón 'ingresar' por RUT,
+    módulo movPersonal, 'Ingreso Manual' (regularizacion_manual), formulario con datepicker,
+    declaración, comprobante con 'imprimir' (CtrlPdf.pdf) y 'continuar'. Cada formulario
+    lleva un token oculto que cambia en cada página, como los tokens de vista reales.
+    """
+
+    cookie = "JSESSIONID"
+
+    def __init__(self, tasa_rechazo=SIMULADOR_TASA_RECHAZO, **kwargs):
+        super().__init__(**kwargs)
+        self.tasa_rechazo = tasa_rechazo
+        self.certificados = {}
+        self.rutas = {
+            ("GET", "/wPortal/login/login.jsp"): self.login,
+            ("POST", "/wPortal/login/login.jsp"): self.login,
+            ("GET", "/wPortal/empresa/inicio.jsp"): self.empresa,
+            ("GET", "/wPortal/movimiento/inicio.jsp"): self.movimiento,
+            ("GET", "/wPortal/movimiento/manual.jsp"): self.manual,
+            ("POST", "/wPortal/movimiento/manual.jsp"): self.enviar_manual,
+            ("GET", "/wPortal/movimiento/validar_rut.jsp"): self.validar_rut,
+            ("POST", "/wPortal/movimiento/declaracion.jsp"): self.declaracion,
+            ("GET", "/wPortal/movimiento/CtrlPdf.pdf"): self.pdf,
+            ("GET", "/wPortal/static/jquery-simulado.js"): self.jquery,
+        }
+
+    def token(self, sesion):
+        sesion["token"] = secrets.token_urlsafe(12)
+        return f"<input type='hidden' name='token' value='{sesion['token']}'>"
+
+    def _sesion_valida(self, p, empresa=False):
+        sesion = self.sesion(p)
+        if sesion is None:
+            p.redirigir("/wPortal/login/login.jsp")
+            return None
+        if empresa and not sesion.get("empresa"):
+            p.redirigir("/wPortal/login/login.jsp")
+            return None
+        return sesion
+
+    def _token_valido(self, p, sesion):
+        if p.formulario.get("token") != sesion.get("token"):
+            p.responder(200, _pagina("Previred", (
+                "<div class='alert alert-danger' id='mensaje_error'>La sesión de trabajo expiró (token inválido).</div>"
+                "<a href='/wPortal/movimiento/inicio.jsp'>Volver</a>"
+            )))
+            return False
+        return True
+
+    def login(self, p):
+        if p.command == "POST":
+            if p.formulario.get("web_rut2") and p.formulario.get("web_password"):
+                self.abrir_sesion(p, usuario=p.formulario["web_rut2"])
+                p.redirigir("/wPortal/login/login.jsp")
+            else:
+                p.responder(200, self.pagina_login("Debe ingresar RUT y clave"))
+            return
+        if self.sesion(p) is None:
+            p.responder(200, self.pagina_login())
+            return
+        filas = "".join(
+            f"<tr><td>{html.escape(e['rut_previred'])}</td><td>{html.escape(e['nombre_previred'])}</td>"
+            f"<td><button class='ingresar' type='button' "
+            f"onclick=\"location.href='/wPortal/empresa/inicio.jsp?rut={quote(e['rut_previred'])}'\">Ingresar</button></td></tr>"
+            for e in EMPRESAS.values()
+        )
+        p.responder(200, _pagina("Previred - Inicio", (
+            "<h1>Mi Previred</h1><button id='empresa' type='button' "
+            "onclick=\"document.getElementById('tabla_empresas').style.display='table'\">Empresas</button>"
+            f"<table id='tabla_empresas' style='display:none'><tbody>{filas}</tbody></table>"
+        )))
+
+    def pagina_login(self, error=""):
+        aviso = f"<div class='alert alert-danger'>{html.escape(error)}</div>" if error else ""
+        return _pagina("Previred - Ingreso", (
+            f"<h1>Previred</h1>{aviso}<form method='post' action='/wPortal/login/login.jsp'>"
+            "<input id='web_rut2' name='web_rut2' placeholder='RUT'>"
+            "<input id='web_password' name='web_password' type='password' placeholder='Clave'>"
+            "<button id='login' type='submit'>Ingresar</button></form>"
+        ))
+
+    def empresa(self, p):
+        sesion = self._sesion_valida(p)
+        if sesion is None:
+            return
+        sesion["empresa"] = p.consulta.get("rut")
+        p.responder(200, _pagina("Previred - Empresa", (
+            f"<h1>Empresa {html.escape(sesion['empresa'] or '')}</h1>"
+            "<div class='modulo cotizaciones'><h3>Cotizaciones</h3><button id='pagar' type='button'>Pagar</button></div>"
+            "<div class='modulo movPersonal'><h3>Movimiento de Personal</h3>"
+            "<button id='btn_regulariza_retroactivo' type='button' "
+            "onclick=\"location.href='/wPortal/movimiento/inicio.jsp'\">Regularización retroactiva</button></div>"
+        )))
+
+    def movimiento(self, p):
+        if self._sesion_valida(p, empresa=True) is None:
+            return
+        p.responder(200, _pagina("Previred - Movimiento de Personal Retroactivo", (
+            "<h1>Movimiento de Personal Retroactivo</h1>"
+            "<button id='regularizacion_manual' type='button' "
+            "onclick=\"location.href='/wPortal/movimiento/manual.jsp'\">Ingreso Manual</button>"
+        )))
+
+    def formulario(self, sesion, error="", datos=None):
+        datos = datos or {}
+
+        def opciones(valores, elegido):
+            return "<option value=''>Seleccione</option>" + "".join(
+                f"<option value='{v}'{' selected' if v == elegido else ''}>{html.escape(t)}</option>" for v, t in valores
+            )
+
+        aviso = f"<div class='alert alert-danger' id='mensaje_error' role='alert'>{html.escape(error)}</div>" if error else ""
+        return _pagina("Previred - Ingreso Manual", (
+            f"<h1>Ingreso Manual</h1>{aviso}<form method='post' action='/wPortal/movimiento/manual.jsp'>"
+            + self.token(sesion)
+            + f"<label>RUT trabajador <input id='web_rut_trabajador2' name='web_rut_trabajador2' "
+            f"value='{html.escape(datos.get('web_rut_trabajador2', ''))}'></label><span id='nombre_trabajador'></span>"
+            f"<label>Salud <select id='web_combo_codigo_salud' name='web_combo_codigo_salud'>"
+            f"{opciones(SALUD, datos.get('web_combo_codigo_salud'))}</select></label>"
+            f"<label>Movimiento <select id='web_combo_movimiento_personal' name='web_combo_movimiento_personal'>"
+            f"{opciones(MOVIMIENTOS, datos.get('web_combo_movimiento_personal'))}</select></label>"
+            f"<label>Fecha hasta <input id='end_date' name='end_date' readonly "
+            f"value='{html.escape(datos.get('end_date', ''))}'></label>"
+            "<button id='continuar' type='submit'>Continuar</button></form>"
+        ), f"<script src='/wPortal/static/jquery-simulado.js'></script><script>{JS_FORMULARIO_PREVIRED}</script>")
+
+    def manual(self, p):
+        sesion = self._sesion_valida(p, empresa=True)
+        if sesion is not None:
+            p.responder(200, self.formulario(sesion))
+
+    def validar_rut(self, p):
+        rut = p.consulta.get("rut", "")
+        p.json(200, {"valido": rut_valido(rut), "nombre": f"TRABAJADOR {rut}" if rut_valido(rut) else ""})
+
+    def enviar_manual(self, p):
+        sesion = self._sesion_valida(p, empresa=True)
+        if sesion is None or not self._token_valido(p, sesion):
+            return
+        datos = p.formulario
+        error = ""
+        try:
+            fecha = datetime.strptime(datos.get("end_date", ""), "%d-%m-%Y").date()
+        except ValueError:
+            fecha = None
+        if not rut_valido(datos.get("web_rut_trabajador2", "")):
+            error = "El RUT del trabajador no es válido."
+        elif not datos.get("web_combo_codigo_salud"):
+            error = "Debe seleccionar el sistema de salud."
+        elif not datos.get("web_combo_movimiento_personal"):
+            error = "Debe seleccionar la causa del movimiento."
+        elif fecha is None:
+            error = "Debe ingresar la fecha hasta."
+        elif self.sortear(self.tasa_rechazo):
+            error = RECHAZOS[self.azar.randrange(len(RECHAZOS))]
+        if error:
+            self.contar("rechazos")
+            p.responder(200, self.formulario(sesion, error, datos))
+            return
+        sesion["borrador"] = {"rut": datos["web_rut_trabajador2"], "fecha": datos["end_date"]}
+        p.responder(200, _pagina("Previred - Declaración", (
+            "<h1>Confirmación</h1><form method='post' action='/wPortal/movimiento/declaracion.jsp'>"
+            + self.token(sesion)
+            + f"<p>RUT {html.escape(datos['web_rut_trabajador2'])}, retiro al {html.escape(datos['end_date'])}</p>"
+            "<label><input type='checkbox' id='web_chk_declaracion' name='web_chk_declaracion' value='S'> "
+            "Declaro que la información es fidedigna</label>"
+            "<button id='continuar' type='submit'>Continuar</button></form>"
+        )))
+
+    def declaracion(self, p):
+        sesion = self._sesion_valida(p, empresa=True)
+        if sesion is None or not self._token_valido(p, sesion):
+            return
+        borrador = sesion.get("borrador")
+        if not borrador or p.formulario.get("web_chk_declaracion") != "S":
+            p.responder(200, _pagina("Previred", (
+                "<div class='alert alert-danger' id='mensaje_error'>Debe aceptar la declaración.</div>"
+                "<a href='/wPortal/movimiento/manual.jsp'>Volver</a>"
+            )))
+            return
+        with self.lock:
+            numero = str(len(self.certificados) + 1)
+            self.certificados[numero] = dict(borrador, empresa=sesion["empresa"])
+        sesion["borrador"] = None
+        self.contar("comprobantes")
+        p.responder(200, _pagina("Previred - Comprobante", (
+            f"<h1>Movimiento registrado</h1><input type='hidden' name='certificado' value='{numero}'>"
+            f"<a href='/wPortal/movimiento/CtrlPdf.pdf?certificado={numero}'><span id='imprimir'>Imprimir</span></a>"
+            "<form method='get' action='/wPortal/movimiento/inicio.jsp'>"
+            "<button id='continuar' type='submit'>Continuar</button></form>"
+        )))
+
+    def pdf(self, p):
+        if self._sesion_valida(p, empresa=True) is None:
+            return
+        certificado = self.certificados.get(p.consulta.get("certificado", ""))
+        if certificado is None:
+            p.responder(404, _pagina("Previred", "<h1>Certificado no encontrado</h1>"))
+            return
+        contenido = generar_pdf([
+            "Certificado de Movimiento de Personal (simulado)",
+            f"Empresa: {certificado['empresa']}",
+            f"RUT trabajador: {certificado['rut']}",
+            f"Retiro (Cese trabajador) al {certificado['fecha']}",
+            f"Certificado N° {p.consulta['certificado']}",
+        ])
+        self.contar("pdf_descargados")
+        p.responder(200, contenido, "application/pdf", [("Content-Disposition", 'attachment; filename="CtrlPdf.pdf"')])
+
+    def jquery(self, p):
+        p.responder(200, JS_JQUERY_SIMULADO, "application/javascript; charset=utf-8")
+
+# Secuencia de previred_http.py (lo que capturar_har produciría) para este portal
+SECUENCIA_PREVIRED = [
+    {"nombre": "GET /wPortal/movimiento/manual.jsp", "metodo": "GET", "url": "/wPortal/movimiento/manual.jsp"},
+    {
+        "nombre": "POST /wPortal/movimiento/manual.jsp",
+        "metodo": "POST",
+        "url": "/wPortal/movimiento/manual.jsp",
+        "datos": {
+            "token": "{token}",
+            "web_rut_trabajador2": "{rut}",
+            "web_combo_codigo_salud": "07",
+            "web_combo_movimiento_personal": "2",
+            "end_date": "{fecha}",
+        },
+    },
+    {
+        "nombre": "POST /wPortal/movimiento/declaracion.jsp",
+        "metodo": "POST",
+        "url": "/wPortal/movimiento/declaracion.jsp",
+        "datos": {"token": "{token}", "web_chk_declaracion": "S"},
+    },
+    {
+        "nombre": "GET /wPortal/movimiento/CtrlPdf.pdf",
+        "metodo": "GET",
+        "url": "/wPortal/movimiento/CtrlPdf.pdf?certificado={certificado}",
+        "pdf": True,
+    },
+]
+
+class PortalesSimulados:
+    """
+    Levanta SIGO y Previred simulados en hilos (ThreadingHTTPServer).
+    """
+
+    def __init__(self, filas, host=SIMULADOR_HOST, puerto_sigo=SIMULADOR_PUERTO_SIGO,
+                 puerto_previred=SIMULADOR_PUERTO_PREVIRED, **config):
+        rechazo = config.pop("tasa_rechazo", SIMULADOR_TASA_RECHAZO)
+        self.sigo = PortalSIGO(filas, **config)
+        self.previred = PortalPrevired(tasa_rechazo=rechazo, **config)
+        self.servidores = []
+        for portal, puerto in ((self.sigo, puerto_sigo), (self.previred, puerto_previred)):
+            servidor = ThreadingHTTPServer((host, puerto), _Peticion)
+            servidor.daemon_threads = True
+            servidor.portal = portal
+            self.servidores.append(servidor)
+        self.host = host
+
+    @property
+    def url_sigo(self):
+        return f"http://{self.host}:{self.servidores[0].server_address[1]}/"
+
+    @property
+    def url_previred(self):
+        return f"http://{self.host}:{self.servidores[1].server_address[1]}/wPortal/login/login.jsp"
+
+    def entorno(self):
+        """
+        Variables de entorno para que los scripts (navegador y modos HTTP) usen estos portales.
+        """
+        return {
+            "SIGO_URL": self.url_sigo,
+            "SIGO_LOGIN_URL": self.url_sigo + "login",
+            "SIGO_LISTADO_URL": self.url_sigo + "api/finiquitos",
+            "SIGO_COLUMNA_ESTADO": "9",
+            "SIGO_GUARDAR_URL": self.url_sigo + "guardar",
+            "SIGO_AVANZAR_URL": self.url_sigo + "avanzar",
+            "PREVIRED_URL": self.url_previred,
+            # La validación del RUT de este portal marca el nombre del trabajador con la clase 'error'
+            "PREVIRED_SELECTOR_ERRORES_EXTRA": "#nombre_trabajador.error",
+        }
+
+    def guardar_secuencia(self, archivo):
+        """
+        Escribe SECUENCIA_PREVIRED para probar MODO_HTTP_PREVIRED contra este portal.
+        """
+        with open(archivo, "w", encoding="utf-8") as f:
+            json.dump(SECUENCIA_PREVIRED, f, ensure_ascii=False, indent=4)
+
+    def iniciar(self):
+        for servidor in self.servidores:
+            threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        logging.info(f"Portales simulados: SIGO {self.url_sigo} | Previred {self.url_previred}")
+        return self
+
+    def detener(self):
+        for servidor in self.servidores:
+            servidor.shutdown()
+            servidor.server_close()
+
+    def estado(self):
+        return {"sigo": self.sigo.estado(), "previred": self.previred.estado()}
+
+if __name__ == "__main__":
+    # python portales_simulados.py [cantidad de filas]  (o SIMULADOR_DATOS=filas.json)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+    if SIMULADOR_DATOS:
+        filas = cargar_filas(SIMULADOR_DATOS)
+    else:
+        filas = filas_de_ejemplo(int(sys.argv[1]) if len(sys.argv) > 1 else 30, semilla=SIMULADOR_SEMILLA)
+    portales = PortalesSimulados(filas).iniciar()
+    for nombre, valor in portales.entorno().items():
+        print(f"{nombre}={valor}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        portales.detener()
@@ -0,0 +1,206 @@
+import os
+import re
+import sys
+import json
+import time
+import logging
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlsplit, parse_qsl
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Secuencia de peticiones de 'Ingreso Manual' capturada una vez (ver capturar_har)
+SECUENCIA_FILE = os.getenv("PREVIRED_SECUENCIA", "previred_secuencia.json")
+TIMEOUT_HTTP = int(os.getenv("PREVIRED_HTTP_TIMEOUT", "30"))
+
+class ErrorPreviredHTTP(Exception):
+    """
+    La repetición HTTP no entregó el certificado; se debe volver al navegador.
+    """
+
+class _ParserTokens(HTMLParser):
+    """
+    Junta los <input type="hidden"> y los <meta name="csrf..."> de una página (nombre -> valor).
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.tokens = {}
+
+    def handle_starttag(self, tag, attrs):
+        a = dict(attrs)
+        if tag == "input" and (a.get("type") or "").lower() == "hidden" and a.get("name"):
+            self.tokens[a["name"]] = a.get("value") or ""
+        elif tag == "meta" and "csrf" in (a.get("name") or "").lower():
+            self.tokens[a["name"]] = a.get("content") or ""
+
+def extraer_tokens(html):
+    parser = _ParserTokens()
+    parser.feed(html)
+    parser.close()
+    return parser.tokens
+
+def variables_registro(reg):
+    """
+    Valores de un registro disponibles en la plantilla: {rut}, {rut_numero}, {dv}, {fecha}, {folio}.
+    """
+    rut = reg["rut"].replace(".", "")
+    numero, _, dv = rut.partition("-")
+    return {
+        "rut": rut,
+        "rut_numero": numero,
+        "dv": dv,
+        "fecha": reg["fecha_ultimo_dia"],
+        "folio": str(reg.get("id", "NOID")),
+    }
+
+class _Variables(dict):
+    def __missing__(self, clave):
+        raise ErrorPreviredHTTP(f"La plantilla usa '{{{clave}}}' pero no hay token ni dato con ese nombre.")
+
+def _rellenar(valor, variables):
+    if isinstance(valor, str):
+        # No se usa str.format: nombres como javax.faces.ViewState tienen puntos
+        return re.sub(r"\{([^{}]+)\}", lambda m: variables[m.group(1)], valor)
+    if isinstance(valor, dict):
+        return {k: _rellenar(v, variables) for k, v in valor.items()}
+    if isinstance(valor, list):
+        return [_rellenar(v, variables) for v in valor]
+    return valor
+
+class ClientePrevired:
+    """
+    requests.Session keep-alive con la sesión de un Firefox que ya está en 'Ingreso Manual'
+    de la empresa, que repite la secuencia capturada para cada registro.
+    """
+
+    def __init__(self, secuencia, pool=4):
+        self.secuencia = secuencia
+        self.session = requests.Session()
+        adaptador = HTTPAdapter(
+            pool_connections=pool,
+            pool_maxsize=pool,
+            max_retries=Retry(total=2, backoff_factor=0.3, status_forcelist=[502, 503, 504]),
+        )
+        self.session.mount("http://", adaptador)
+        self.session.mount("https://", adaptador)
+        self.tokens = {}
+        self.url_actual = None
+
+    @classmethod
+    def desde_archivo(cls, archivo=SECUENCIA_FILE):
+        with open(archivo, "r", encoding="utf-8") as f:
+            return cls(json.load(f))
+
+    def copiar_cookies(self, driver):
+        for c in driver.get_cookies():
+            self.session.cookies.set(c["name"], c["value"], domain=c.get("domain"), path=c.get("path", "/"))
+        try:
+            self.session.headers["User-Agent"] = driver.execute_script("return navigator.userAgent")
+        except Exception:
+            pass
+        # Tokens de la página actual (el formulario de 'Ingreso Manual')
+        self.url_actual = driver.current_url
+        self.tokens.update(extraer_tokens(driver.page_source))
+        logging.info(f"Sesión de Previred copiada al cliente HTTP ({len(self.tokens)} tokens iniciales).")
+
+    def ejecutar_paso(self, paso, variables):
+        url = urljoin(self.url_actual or paso["url"], _rellenar(paso["url"], variables))
+        kwargs = {"timeout": TIMEOUT_HTTP}
+        if paso.get("datos") is not None:
+            kwargs["data"] = _rellenar(paso["datos"], variables)
+        if self.url_actual:
+            kwargs["headers"] = {"Referer": self.url_actual}
+        r = self.session.request(paso.get("metodo", "GET"), url, **kwargs)
+        if not r.ok:
+            raise ErrorPreviredHTTP(f"Paso '{paso.get('nombre', url)}': HTTP {r.status_code}.")
+        if "login" in urlsplit(r.url).path.lower():
+            raise ErrorPreviredHTTP(f"Paso '{paso.get('nombre', url)}': la sesión de Previred expiró.")
+        if not paso.get("pdf"):
+            # Los tokens CSRF/de vista cambian en cada respuesta: se usan los más recientes
+            self.tokens.update(extraer_tokens(r.text))
+            self.url_actual = r.url
+        return r
+
+    def generar_certificado(self, reg):
+        """
+        Repite la secuencia para 'reg' y retorna los bytes del PDF.
+        """
+        inicio = time.perf_counter()
+        contenido = None
+        for paso in self.secuencia:
+            variables = _Variables(self.tokens)
+            variables.update(variables_registro(reg))
+            r = self.ejecutar_paso(paso, variables)
+            if paso.get("pdf"):
+                contenido = r.content
+        if not contenido or not contenido.startswith(b"%PDF"):
+            raise ErrorPreviredHTTP("La respuesta final no es un PDF.")
+        logging.info(
+            f"Certificado del folio {reg.get('id', 'NOID')} obtenido por HTTP: "
+            f"{len(contenido)} bytes en {time.perf_counter() - inicio:.2f}s."
+        )
+        return contenido
+
+def capturar_har(ruta_har, reg, archivo=SECUENCIA_FILE):
+    """
+    Convierte un HAR exportado desde Firefox (Red > Guardar todo como HAR), grabado al
+    procesar 'reg' a mano desde el click en 'Ingreso Manual' hasta 'Imprimir', en la
+    plantilla de secuencia:
+    - los valores del registro se reemplazan por {rut}, {fecha}, etc.;
+    - los parámetros cuyo valor venía en un campo oculto de una respuesta anterior
+      se reemplazan por {<nombre del campo>} (tokens CSRF / de sesión);
+    - la petición que retornó application/pdf se marca como "pdf" y cierra la secuencia.
+    """
+    with open(ruta_har, "r", encoding="utf-8") as f:
+        entradas = json.load(f)["log"]["entries"]
+
+    reemplazos = {v: f"{{{k}}}" for k, v in variables_registro(reg).items() if v}
+    vistos = {}  # valor de token -> nombre
+    secuencia = []
+    for e in entradas:
+        req, resp = e["request"], e["response"]
+        tipo = resp.get("content", {}).get("mimeType", "")
+        es_pdf = "pdf" in tipo
+        if req["method"] == "GET" and not es_pdf and "html" not in tipo:
+            continue  # recursos estáticos
+        url = req["url"]
+        for valor, marca in list(reemplazos.items()) + [(v, f"{{{n}}}") for v, n in vistos.items()]:
+            url = url.replace(f"={valor}", f"={marca}")  # parámetros de la query string
+        paso = {"nombre": f"{req['method']} {urlsplit(url).path}", "metodo": req["method"], "url": url}
+        if req["method"] == "POST":
+            texto = req.get("postData", {}).get("text", "")
+            params = req.get("postData", {}).get("params") or [
+                {"name": k, "value": v} for k, v in parse_qsl(texto, keep_blank_values=True)
+            ]
+            datos = {}
+            for p in params:
+                valor = p.get("value", "")
+                if valor in vistos:
+                    valor = f"{{{vistos[valor]}}}"
+                elif valor in reemplazos:
+                    valor = reemplazos[valor]
+                datos[p["name"]] = valor
+            paso["datos"] = datos
+        if es_pdf:
+            paso["pdf"] = True
+            secuencia.append(paso)
+            break
+        secuencia.append(paso)
+        for nombre, valor in extraer_tokens(resp.get("content", {}).get("text", "") or "").items():
+            if valor and len(valor) > 3:
+                vistos[valor] = nombre
+    else:
+        raise ErrorPreviredHTTP("El HAR no contiene ninguna respuesta application/pdf.")
+
+    with open(archivo, "w", encoding="utf-8") as f:
+        json.dump(secuencia, f, ensure_ascii=False, indent=4)
+    logging.info(f"Secuencia de {len(secuencia)} peticiones guardada en {archivo}.")
+    return secuencia
+
+if __name__ == "__main__":
+    # python previred_http.py captura.har '{"rut": "12.345.678-9", "fecha_ultimo_dia": "31-01-2025"}'
+    secuencia = capturar_har(sys.argv[1], json.loads(sys.argv[2]))
+    print(f"{len(secuencia)} pasos guardados en {SECUENCIA_FILE}")
@@ -0,0 +1,774 @@
+import os
+import json
+import time
+import logging
+import traceback
+from datetime import datetime
+from dotenv import load_dotenv
+
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.support.ui import WebDriverWait, Select
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import UnexpectedAlertPresentException
+
+from selenium.webdriver.firefox.service import Service as FirefoxService
+from selenium.webdriver.firefox.options import Options as FirefoxOptions
+from selenium.webdriver.firefox.firefox_profile import FirefoxProfile
+
+from empresas import obtener_empresa
+from resolver_drivers import resolver_geckodriver
+from cola_pdfs import cola_desde_entorno
+from enrutador_descargas import EnrutadorDescargas, sha256_archivo
+from cache_certificados import obtener_cache
+from planificador import planificar, ejecutar_plan
+from traza_webdriver import activar_desde_entorno as activar_traza_webdriver
+from metricas import paso, medido, contexto, registrar
+from previred_http import ClientePrevired
+from bitacora import obtener_bitacora
+from esperas import (
+    esperar_pagina_lista, esperar_ajax, esperar_dom_estable, esperar_valor, esperar_elemento, esperar_navegacion,
+)
+from errores_previred import (
+    SELECTOR_ERRORES, ErrorPrevired, detectar_error, error_de_alerta, error_desde_textos, o_error, reiniciar_formulario
+)
+
+LOG_FILE = "automatizacion.log"
+logging.basicConfig(
+    filename=LOG_FILE,
+    filemode="a",
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(message)s",
+    datefmt="%Y-%m-%d %H:%M:%S"
+)
+
+# PREVIRED_URL permite apuntar a otro servidor (p.ej. portales_simulados.py)
+URL_LOGIN_PREVIRED = os.getenv("PREVIRED_URL", "https://www.previred.com/wPortal/login/login.jsp")
+TIMEOUT_DESCARGA = int(os.getenv("TIMEOUT_DESCARGA", "60"))
+# MODO_HTTP_PREVIRED=1 repite con requests la secuencia capturada en PREVIRED_SECUENCIA
+# y usa el formulario del navegador solo para los registros que fallen
+MODO_HTTP_PREVIRED = os.getenv("MODO_HTTP_PREVIRED", "0") == "1"
+# FECHA_DIRECTA=0 vuelve a elegir la fecha navegando el datepicker (año, mes, día)
+FECHA_DIRECTA = os.getenv("FECHA_DIRECTA", "1") == "1"
+# LLENADO_LOTE=0 vuelve a completar el formulario campo por campo
+LLENADO_LOTE = os.getenv("LLENADO_LOTE", "1") == "1"
+# Tope de espera (ms) de la validación AJAX del RUT dentro del llenado en lote
+LLENADO_LOTE_TIMEOUT_MS = int(os.getenv("LLENADO_LOTE_TIMEOUT_MS", "10000"))
+
+SALUD = "FONASA"
+CAUSA_MOVIMIENTO = "Retiro (Cese trabajador)"
+
+# Fija la fecha con la API del datepicker (setDate), ejecuta su onSelect y dispara los
+# eventos del formulario. Retorna el valor del campo y la fecha que el widget quedó usando.
+JS_FIJAR_FECHA = """
+var input = document.getElementById(arguments[0]);
+var $ = window.jQuery;
+if (!input || !$ || !$.fn || !$.fn.datepicker) { return null; }
+var $input = $(input);
+$input.datepicker('setDate', new Date(arguments[1], arguments[2], arguments[3]));
+var onSelect = $input.datepicker('option', 'onSelect');
+if (typeof onSelect === 'function') { onSelect.call(input, input.value); }
+['input', 'change'].forEach(function(tipo) { input.dispatchEvent(new Event(tipo, {bubbles: true})); });
+var d = $input.datepicker('getDate');
+return {valor: input.value, anio: d ? d.getFullYear() : null, mes: d ? d.getMonth() : null, dia: d ? d.getDate() : null};
+"""
+
+def obtener_descarga_dir():
+    """
+    Carpeta de descargas: DESCARGA_DIR si está definida, si no ./descarga.
+    """
+    return os.getenv("DESCARGA_DIR", os.path.join(os.getcwd(), "descarga"))
+
+def seleccionar_fecha_jquery_ui(driver, fecha_str):
+    """
+    Selecciona 'fecha_str' (formato dd-mm-yyyy) en el datepicker jQuery UI que ya está visible.
+    """
+    logging.debug(f"Iniciando función seleccionar_fecha_jquery_ui con fecha: {fecha_str}")
+    try:
+        fecha = datetime.strptime(fecha_str, "%d-%m-%Y")
+        dia = fecha.day
+        mes = fecha.month - 1  # Ajuste para jQuery UI (meses en base 0)
+        anio = fecha.year
+        logging.debug(f"Fecha descompuesta: dia={dia}, mes={mes}, anio={anio}")
+    except Exception as e:
+        logging.error("Error al parsear la fecha: " + str(e))
+        raise
+
+    try:
+        select_year_elem = WebDriverWait(driver, 10).until(
+            EC.element_to_be_clickable((By.XPATH, "//select[@class='ui-datepicker-year']"))
+        )
+        Select(select_year_elem).select_by_value(str(anio))
+        logging.debug("Año seleccionado: " + str(anio))
+    except Exception as e:
+        logging.error("Error al seleccionar el año: " + str(e))
+        raise
+
+    try:
+        select_month_elem = WebDriverWait(driver, 10).until(
+            EC.element_to_be_clickable((By.XPATH, "//select[@class='ui-datepicker-month']"))
+        )
+        Select(select_month_elem).select_by_value(str(mes))
+        logging.debug("Mes seleccionado: " + str(mes))
+    except Exception as e:
+        logging.error("Error al seleccionar el mes: " + str(e))
+        raise
+
+    esperar_dom_estable(driver, ms=150, nombre="datepicker mes")
+
+    try:
+        day_xpath = (
+            f"//table[@class='ui-datepicker-calendar']"
+            f"//td[@data-handler='selectDay' and @data-month='{mes}' and @data-year='{anio}']/a[text()='{dia}']"
+        )
+        logging.debug("XPath para seleccionar el día: " + day_xpath)
+        day_elem = WebDriverWait(driver, 10).until(
+            EC.element_to_be_clickable((By.XPATH, day_xpath))
+        )
+        day_elem.click()
+        logging.debug("Día seleccionado: " + str(dia))
+    except Exception as e:
+        logging.error("Error al seleccionar el día: " + str(e))
+        raise
+
+    esperar_valor(driver, (By.ID, "end_date"), nombre="fecha hasta comprometida")
+    esperar_dom_estable(driver, ms=150, nombre="datepicker cerrado")
+
+# Completa RUT (con su blur, que dispara la validación AJAX), salud, causa y fecha (setDate) en
+# una sola llamada; espera a que terminen las peticiones y retorna los valores y errores visibles.
+JS_LLENAR_FORMULARIO = """
+var datos = arguments[0], limite = arguments[1], selectorErrores = arguments[2];
+var listo = arguments[arguments.length - 1];
+function el(id) { return document.getElementById(id); }
+function disparar(e, tipos) { tipos.forEach(function(t) { e.dispatchEvent(new Event(t, {bubbles: true})); }); }
+function visible(e) { return !!(e.offsetWidth || e.offsetHeight || e.getClientRects().length); }
+function texto(select) { var o = select.options[select.selectedIndex]; return o ? o.text.trim() : ''; }
+var rut = el('web_rut_trabajador2'), salud = el('web_combo_codigo_salud'),
+    causa = el('web_combo_movimiento_personal'), fecha = el('end_date');
+if (!rut || !salud || !causa || !fecha) { listo(null); return; }
+
+rut.focus();
+rut.value = datos.rut;
+disparar(rut, ['input', 'change']);
+var salio = false;
+rut.addEventListener('blur', function() { salio = true; }, {once: true});
+rut.blur();
+if (!salio) {  // sin foco de ventana (headless) blur() no dispara eventos
+    rut.dispatchEvent(new FocusEvent('blur'));
+    rut.dispatchEvent(new FocusEvent('focusout', {bubbles: true}));
+}
+
+[[salud, datos.salud], [causa, datos.causa]].forEach(function(par) {
+    var opcion = Array.from(par[0].options).find(function(o) { return o.text.trim() === par[1]; });
+    if (opcion) { par[0].value = opcion.value; disparar(par[0], ['input', 'change']); }
+});
+
+var $ = window.jQuery;
+var conWidget = !!($ && $.fn && $.fn.datepicker);
+if (conWidget) {
+    $(fecha).datepicker('setDate', new Date(datos.fecha[0], datos.fecha[1], datos.fecha[2]));
+    var onSelect = $(fecha).datepicker('option', 'onSelect');
+    if (typeof onSelect === 'function') { onSelect.call(fecha, fecha.value); }
+} else {
+    fecha.value = datos.texto_fecha;
+}
+disparar(fecha, ['input', 'change']);
+
+var inicio = Date.now();
+(function esperar() {
+    var pendiente = (window.jQuery ? window.jQuery.active : 0) > 0 || (window.__espera && window.__espera.pendientes > 0);
+    if (pendiente && Date.now() - inicio < limite) { setTimeout(esperar, 50); return; }
+    var d = conWidget ? $(fecha).datepicker('getDate') : null;
+    listo({
+        rut: rut.value, salud: texto(salud), causa: texto(causa), fecha: fecha.value,
+        fecha_widget: d ? [d.getFullYear(), d.getMonth(), d.getDate()] : null,
+        errores: Array.from(document.querySelectorAll(selectorErrores)).filter(visible)
+            .map(function(e) { return (e.innerText || '').trim(); }).filter(Boolean),
+        pendiente: !!pendiente
+    });
+})();
+"""
+
+def llenar_formulario_lote(driver, rut, fecha_str):
+    """
+    Completa todo el formulario en un solo execute_async_script. Retorna la foto del
+    formulario (valores, fecha del widget, errores visibles) o None si el script falló.
+    """
+    try:
+        fecha = datetime.strptime(fecha_str, "%d-%m-%Y")
+        datos = {
+            "rut": rut.replace(".", ""),
+            "salud": SALUD,
+            "causa": CAUSA_MOVIMIENTO,
+            "fecha": [fecha.year, fecha.month - 1, fecha.day],
+            "texto_fecha": fecha_str,
+        }
+        return driver.execute_async_script(JS_LLENAR_FORMULARIO, datos, LLENADO_LOTE_TIMEOUT_MS, SELECTOR_ERRORES)
+    except Exception as e:
+        logging.warning(f"No se pudo completar el formulario en lote: {str(e)}")
+        return None
+
+def diferencias_formulario(estado, rut, fecha_str):
+    """
+    Campos de la foto 'estado' que no quedaron con el valor esperado.
+    """
+    def normalizar(valor):
+        return (valor or "").replace(".", "").replace("-", "").strip().upper()
+
+    diferencias = []
+    if normalizar(estado.get("rut")) != normalizar(rut):
+        diferencias.append(f"rut={estado.get('rut')!r}")
+    if estado.get("salud") != SALUD:
+        diferencias.append(f"salud={estado.get('salud')!r}")
+    if estado.get("causa") != CAUSA_MOVIMIENTO:
+        diferencias.append(f"causa={estado.get('causa')!r}")
+    fecha = datetime.strptime(fecha_str, "%d-%m-%Y")
+    if estado.get("fecha_widget") is not None:
+        if list(estado["fecha_widget"]) != [fecha.year, fecha.month - 1, fecha.day]:
+            diferencias.append(f"fecha={estado.get('fecha')!r}")
+    elif estado.get("fecha") != fecha_str:
+        diferencias.append(f"fecha={estado.get('fecha')!r}")
+    if estado.get("pendiente"):
+        diferencias.append("validación AJAX sin terminar")
+    return diferencias
+
+def fijar_fecha_directa(driver, fecha_str, campo="end_date"):
+    """
+    Fija 'fecha_str' (dd-mm-yyyy) en un solo execute_script con datepicker('setDate').
+    Retorna True solo si el widget quedó con esa fecha y el campo con un valor.
+    """
+    try:
+        fecha = datetime.strptime(fecha_str, "%d-%m-%Y")
+        esperada = (fecha.year, fecha.month - 1, fecha.day)  # meses en base 0, como jQuery UI
+        r = driver.execute_script(JS_FIJAR_FECHA, campo, *esperada)
+    except Exception as e:
+        logging.warning(f"No se pudo fijar la fecha con setDate: {str(e)}")
+        return False
+    if not r or not r.get("valor") or (r.get("anio"), r.get("mes"), r.get("dia")) != esperada:
+        logging.warning(f"La fecha {fecha_str} no quedó comprometida con setDate ({r}); se usa el datepicker.")
+        return False
+    return True
+
+@medido("previred.iniciar_driver")
+def configurar_firefox(descarga_dir=None):
+    activar_traza_webdriver()
+    try:
+        profile = FirefoxProfile()
+        descarga_dir = descarga_dir or obtener_descarga_dir()
+        os.makedirs(descarga_dir, exist_ok=True)  # Carpeta donde se encuentran los PDFs
+        logging.debug(f"Directorio de descargas configurado: {descarga_dir}")
+
+        profile.set_preference("browser.download.folderList", 2)
+        profile.set_preference("browser.download.dir", descarga_dir)
+        profile.set_preference("browser.download.useDownloadDir", True)
+        profile.set_preference("browser.download.manager.showWhenStarting", False)
+        profile.set_preference("pdfjs.disabled", True)
+        profile.set_preference("browser.helperApps.neverAsk.saveToDisk", "application/pdf,application/octet-stream")
+        logging.debug("Preferencias de descarga configuradas.")
+
+        firefox_options = FirefoxOptions()
+        firefox_options.add_argument("--headless")
+        firefox_options.profile = profile
+        firefox_options.set_preference("dom.webdriver.enabled", False)
+        firefox_options.set_preference("useAutomationExtension", False)
+        logging.debug("Opciones de Firefox configuradas en modo headless.")
+
+        service = FirefoxService(resolver_geckodriver(), timeout=300)
+        driver = webdriver.Firefox(service=service, options=firefox_options)
+        logging.info("Driver de Firefox iniciado exitosamente.")
+        return driver
+    except Exception as e:
+        logging.error("Error al configurar Firefox: " + str(e))
+        raise
+
+@medido("previred.login")
+def login_previred(driver, user, password):
+    try:
+        logging.info("Accediendo a la página de login de Previred...")
+        driver.get(URL_LOGIN_PREVIRED)
+        driver.maximize_window()
+        logging.debug("Página de login cargada y ventana maximizada.")
+
+        logging.info("Realizando login en Previred...")
+        WebDriverWait(driver, 15).until(
+            EC.presence_of_element_located((By.ID, "web_rut2"))
+        ).send_keys(user)
+        driver.find_element(By.ID, "web_password").send_keys(password)
+        esperar_navegacion(driver, driver.find_element(By.ID, "login").click, nombre="login previred")
+        logging.info("Botón de login clickeado, esperando confirmación...")
+
+        WebDriverWait(driver, 20).until(
+            EC.presence_of_element_located((By.ID, "empresa"))
+        )
+        logging.info("Login exitoso. Se detectó la sección 'empresa'.")
+    except Exception as e:
+        logging.error("Error durante el login: " + str(e))
+        raise
+
+@medido("previred.volver_inicio")
+def volver_inicio_previred(driver, user, password):
+    """
+    Vuelve a la pantalla con la sección 'Empresas' reutilizando la sesión abierta.
+    Solo repite el login si la sesión ya no está activa.
+    """
+    driver.get(URL_LOGIN_PREVIRED)
+    try:
+        WebDriverWait(driver, 10).until(
+            EC.presence_of_element_located((By.ID, "empresa"))
+        )
+        logging.info("Sesión de Previred reutilizada.")
+    except Exception:
+        logging.info("La sesión de Previred expiró, repitiendo login...")
+        login_previred(driver, user, password)
+
+def volver_ingreso_manual(driver, empresa, user, password):
+    """
+    Vuelve a dejar 'driver' en 'Ingreso Manual' de 'empresa' desde cualquier pantalla.
+    """
+    volver_inicio_previred(driver, user, password)
+    seleccionar_empresa(driver, empresa)
+    acceder_movimiento_personal(driver)
+
+@medido("previred.seleccionar_empresa")
+def seleccionar_empresa(driver, empresa):
+    datos = obtener_empresa(empresa)
+    try:
+        logging.info("Accediendo a la sección 'Empresas'...")
+        driver.find_element(By.ID, "empresa").click()
+        logging.info("Sección 'Empresas' abierta.")
+
+        logging.info(f"Seleccionando la empresa '{datos['rut_previred']}'...")
+        empresa_xpath = f"//tr[td[contains(text(),'{datos['rut_previred']}')]]//button[@class='ingresar']"
+        WebDriverWait(driver, 15).until(
+            EC.element_to_be_clickable((By.XPATH, empresa_xpath))
+        ).click()
+        logging.info(f"Empresa {datos['nombre_previred']} seleccionada.")
+    except Exception as e:
+        logging.error("Error al seleccionar la empresa: " + str(e))
+        raise
+
+@medido("previred.movimiento_personal")
+def acceder_movimiento_personal(driver):
+    try:
+        logging.info("Accediendo a Movimiento de Personal Retroactivo...")
+        mov_personal_xpath = "//div[@class='modulo movPersonal']//button[contains(@id,'regulariza')]"
+        mov_personal_btn = WebDriverWait(driver, 15).until(
+            EC.element_to_be_clickable((By.XPATH, mov_personal_xpath))
+        )
+        esperar_navegacion(driver, mov_personal_btn.click, nombre="movimiento personal")
+        logging.info("Movimiento de Personal Retroactivo accedido.")
+
+        logging.info("Entrando a 'Ingreso Manual'...")
+        ingreso_manual_btn = WebDriverWait(driver, 15).until(
+            EC.element_to_be_clickable((By.ID, "regularizacion_manual"))
+        )
+        esperar_navegacion(driver, ingreso_manual_btn.click, nombre="ingreso manual")
+        logging.info("'Ingreso Manual' clickeado.")
+        esperar_pagina_lista(driver, nombre="ingreso manual")
+    except Exception as e:
+        logging.error("Error al acceder a Movimiento de Personal Retroactivo: " + str(e))
+        raise
+
+def llenar_formulario(driver, rut, fecha_str, folio_id):
+    """
+    Completa el formulario de 'Ingreso Manual' campo por campo. Retorna True si se completó.
+    """
+    try:
+        with paso("previred.rut"):
+            logging.debug("Ingresando RUT en el formulario...")
+            rut_input = WebDriverWait(driver, 15).until(
+                EC.element_to_be_clickable((By.ID, "web_rut_trabajador2"))
+            )
+            rut_input.clear()
+            rut_input.send_keys(rut.replace(".", ""))
+            esperar_ajax(driver, nombre="validación RUT", accion=lambda: rut_input.send_keys(Keys.TAB))
+            logging.info("RUT ingresado correctamente.")
+    except Exception as e:
+        logging.error(f"Error al ingresar el RUT para el registro {folio_id}: " + str(e))
+        return False
+
+    try:
+        with paso("previred.salud"):
+            logging.debug("Seleccionando sistema de salud 'FONASA'...")
+            salud_select_elem = WebDriverWait(driver, 10).until(
+                EC.element_to_be_clickable((By.ID, "web_combo_codigo_salud"))
+            )
+            Select(salud_select_elem).select_by_visible_text(SALUD)
+            logging.info("Sistema de salud seleccionado: FONASA.")
+    except Exception as e:
+        logging.error(f"Error al seleccionar el sistema de salud para el registro {folio_id}: " + str(e))
+        return False
+
+    try:
+        with paso("previred.causa"):
+            logging.debug("Seleccionando causa de movimiento 'Retiro (Cese trabajador)'...")
+            movimiento_select_elem = WebDriverWait(driver, 10).until(
+                EC.element_to_be_clickable((By.ID, "web_combo_movimiento_personal"))
+            )
+            Select(movimiento_select_elem).select_by_visible_text(CAUSA_MOVIMIENTO)
+            logging.info("Causa de movimiento seleccionada: Retiro (Cese trabajador).")
+    except Exception as e:
+        logging.error(f"Error al seleccionar la causa de movimiento para el registro {folio_id}: " + str(e))
+        return False
+
+    fecha_directa = False
+    if FECHA_DIRECTA:
+        with paso("previred.fecha_directa"):
+            fecha_directa = fijar_fecha_directa(driver, fecha_str)
+    if fecha_directa:
+        logging.info("Fecha fijada con setDate: " + fecha_str)
+    else:
+        try:
+            with paso("previred.abrir_datepicker"):
+                logging.debug("Haciendo click en el campo 'Fecha Hasta'...")
+                end_date_input = WebDriverWait(driver, 10).until(
+                    EC.element_to_be_clickable((By.ID, "end_date"))
+                )
+                end_date_input.click()
+                logging.info("Campo 'Fecha Hasta' clickeado.")
+                esperar_elemento(
+                    driver, EC.visibility_of_element_located((By.ID, "ui-datepicker-div")), nombre="datepicker visible"
+                )
+        except Exception as e:
+            logging.error(f"Error al hacer click en 'Fecha Hasta' para el registro {folio_id}: " + str(e))
+            return False
+
+        try:
+            with paso("previred.fecha"):
+                logging.debug("Seleccionando fecha utilizando el datepicker...")
+                seleccionar_fecha_jquery_ui(driver, fecha_str)
+                logging.info("Fecha seleccionada correctamente: " + fecha_str)
+        except Exception as e:
+            logging.error(f"Error al seleccionar la fecha para el registro {folio_id}: " + str(e))
+            return False
+    return True
+
+def rechazar_registro(driver, folio_id, error, url_formulario):
+    """
+    Previred mostró un error para el registro: deja el formulario en blanco para el
+    siguiente y lanza el ErrorPrevired (un alert inesperado se convierte en uno).
+    """
+    if not isinstance(error, ErrorPrevired):
+        error = error_de_alerta(driver, error)
+    logging.error(f"Previred rechazó el registro {folio_id} ({error.clase}, {error.origen}): {error.mensaje}")
+    with paso("previred.reinicio_formulario"):
+        error.formulario_listo = bool(url_formulario) and reiniciar_formulario(driver, url_formulario)
+    if not error.formulario_listo:
+        logging.warning(f"No se pudo dejar 'Ingreso Manual' en blanco tras el rechazo del registro {folio_id}.")
+    raise error
+
+def procesar_registro(driver, reg, idx, total, sesion, cola=None):
+    """
+    Genera y descarga el certificado de un registro. 'sesion' es la SesionDescarga
+    cuya carpeta usa este Firefox. Retorna la ruta del PDF publicado como <folio>.pdf,
+    o None si el registro no se pudo completar. Si Previred muestra un error (banner
+    o alert) se reinicia el formulario y se lanza ErrorPrevired sin agotar las esperas.
+    """
+    try:
+        url_formulario = driver.current_url
+    except Exception:
+        url_formulario = None
+    try:
+        folio_id = reg.get("id", "NOID")
+        rut = reg["rut"]
+        fecha_str = reg["fecha_ultimo_dia"]  # dd-mm-yyyy
+        logging.info(f"Registro {idx+1}/{total}: RUT: {rut}, Fecha Hasta: {fecha_str}, ID: {folio_id}")
+    except Exception as e:
+        logging.error("Error al leer el registro del JSON: " + str(e))
+        return None
+
+    lleno = False
+    if LLENADO_LOTE:
+        with paso("previred.formulario_lote"):
+            estado = llenar_formulario_lote(driver, rut, fecha_str)
+        error = error_desde_textos(estado.get("errores")) if estado else None
+        if error:
+            rechazar_registro(driver, folio_id, error, url_formulario)
+        diferencias = diferencias_formulario(estado, rut, fecha_str) if estado else ["sin respuesta del script"]
+        if diferencias:
+            logging.warning(f"Formulario en lote incompleto ({', '.join(diferencias)}); se completa campo por campo.")
+        else:
+            lleno = True
+            logging.info("Formulario completado en lote (RUT, salud, causa y fecha).")
+    if not lleno and not llenar_formulario(driver, rut, fecha_str, folio_id):
+        error = detectar_error(driver)
+        if error:
+            rechazar_registro(driver, folio_id, error, url_formulario)
+        return None
+
+    try:
+        with paso("previred.continuar1"):
+            logging.debug("Buscando el botón 'Continuar' (primer click)...")
+            continuar_btn = WebDriverWait(driver, 15).until(
+                EC.element_to_be_clickable((By.ID, "continuar"))
+            )
+            driver.execute_script("arguments[0].scrollIntoView(true);", continuar_btn)
+
+            def continuar():
+                try:
+                    continuar_btn.click()
+                    logging.info("Botón 'Continuar' clickeado (acción normal).")
+                except Exception as e:
+                    logging.warning(f"Error al hacer click en 'Continuar', intentando con JavaScript: {str(e)}")
+                    driver.execute_script("arguments[0].click();", continuar_btn)
+                    logging.info("Botón 'Continuar' clickeado (acción JS).")
+
+            esperar_navegacion(driver, continuar, nombre="continuar 1")
+    except UnexpectedAlertPresentException as e:
+        rechazar_registro(driver, folio_id, e, url_formulario)
+    except Exception as e:
+        logging.error(f"Error al interactuar con el botón 'Continuar' para el registro {folio_id}: " + str(e))
+        return None
+
+    try:
+        with paso("previred.declaracion"):
+            logging.debug("Buscando checkbox de declaración...")
+            chk_declaracion = WebDriverWait(driver, 10).until(
+                o_error(EC.element_to_be_clickable((By.ID, "web_chk_declaracion")))
+            )
+            chk_declaracion.click()
+            logging.info("Checkbox de declaración seleccionado.")
+    except (ErrorPrevired, UnexpectedAlertPresentException) as e:
+        rechazar_registro(driver, folio_id, e, url_formulario)
+    except Exception as e:
+        logging.error(f"Error al hacer click en el checkbox de declaración para el registro {folio_id}: " + str(e))
+        return None
+
+    try:
+        with paso("previred.continuar2"):
+            logging.debug("Buscando el segundo botón 'Continuar'...")
+            continuar2 = WebDriverWait(driver, 10).until(
+                o_error(EC.element_to_be_clickable((By.ID, "continuar")))
+            )
+            driver.execute_script("arguments[0].scrollIntoView(true);", continuar2)
+            esperar_navegacion(driver, continuar2.click, nombre="continuar 2")
+            logging.info("Segundo botón 'Continuar' clickeado.")
+    except (ErrorPrevired, UnexpectedAlertPresentException) as e:
+        rechazar_registro(driver, folio_id, e, url_formulario)
+    except Exception as e:
+        logging.error(f"Error al hacer click en el segundo botón 'Continuar' para el registro {folio_id}: " + str(e))
+        return None
+
+    try:
+        # La carpeta de la sesión queda vacía: el próximo PDF que llegue es de este folio
+        sesion.preparar(folio_id)
+    except Exception as e:
+        logging.error(f"No se pudo preparar la carpeta de descarga para el registro {folio_id}: " + str(e))
+        return None
+
+    try:
+        with paso("previred.imprimir"):
+            logging.debug("Buscando botón 'Imprimir' para descargar el PDF...")
+            imprimir_link = WebDriverWait(driver, 10).until(
+                o_error(EC.element_to_be_clickable((By.XPATH, "//a/span[@id='imprimir']")))
+            )
+            imprimir_link.click()
+            logging.info("Botón 'Imprimir' clickeado, descarga iniciada.")
+    except (ErrorPrevired, UnexpectedAlertPresentException) as e:
+        rechazar_registro(driver, folio_id, e, url_formulario)
+    except Exception as e:
+        logging.error(f"Error al hacer click en 'Imprimir' para el registro {folio_id}: " + str(e))
+        return None
+
+    ruta_pdf = None
+    try:
+        with paso("previred.descarga"):
+            logging.debug(f"Esperando hasta {TIMEOUT_DESCARGA}s a que la descarga finalice...")
+            ruta_pdf, _ = sesion.recibir(folio_id, timeout=TIMEOUT_DESCARGA)
+            if cola:
+                cola.publicar(folio_id, ruta_pdf)
+    except TimeoutError as e:
+        logging.warning(f"No se completó la descarga del registro {folio_id}: " + str(e))
+    except Exception as e:
+        logging.error(f"Error al enrutar el PDF para el registro {folio_id}: " + str(e))
+        return None
+
+    try:
+        with paso("previred.continuar_final"):
+            logging.debug("Buscando el botón 'Continuar' final para volver a 'Ingreso Manual'...")
+            continuar_final = WebDriverWait(driver, 20).until(
+                EC.element_to_be_clickable((By.ID, "continuar"))
+            )
+            continuar_final.click()
+            logging.info("Botón 'Continuar' final clickeado.")
+    except Exception as e:
+        logging.warning(f"Error al hacer click en el botón 'Continuar' final para el registro {folio_id}: " + str(e))
+        try:
+            esperar_navegacion(driver, driver.back, nombre="volver atrás")
+            logging.info("Ejecutado fallback: driver.back()")
+        except Exception as ex:
+            logging.error("Error al ejecutar fallback para el botón 'Continuar' final: " + str(ex))
+
+    try:
+        with paso("previred.ingreso_manual"):
+            logging.debug("Buscando botón 'Ingreso Manual' para continuar con el siguiente registro...")
+            ingreso_manual_btn = WebDriverWait(driver, 15).until(
+                EC.element_to_be_clickable((By.ID, "regularizacion_manual"))
+            )
+            esperar_navegacion(driver, ingreso_manual_btn.click, nombre="ingreso manual")
+            logging.info("Botón 'Ingreso Manual' clickeado para el siguiente registro.")
+            esperar_pagina_lista(driver, nombre="ingreso manual")
+    except Exception as e:
+        logging.warning(f"Error al hacer click en 'Ingreso Manual' para el siguiente registro: " + str(e))
+
+    return ruta_pdf
+
+def cliente_replay(driver):
+    """
+    ClientePrevired con la sesión de 'driver' (ya en 'Ingreso Manual') si MODO_HTTP_PREVIRED
+    está activo y existe la secuencia capturada; si no, None.
+    """
+    if not MODO_HTTP_PREVIRED:
+        return None
+    try:
+        cliente = ClientePrevired.desde_archivo()
+        cliente.copiar_cookies(driver)
+        return cliente
+    except Exception as e:
+        logging.warning(f"⚠ No se pudo preparar la repetición HTTP de Previred, se usa el navegador: {str(e)}")
+        return None
+
+def procesar_registro_http(cliente, reg, sesion, cola=None):
+    """
+    Obtiene el certificado de 'reg' sin pasar por el formulario. Retorna la ruta
+    publicada, o None si hay que usar el navegador.
+    """
+    folio_id = reg.get("id", "NOID")
+    try:
+        with paso("previred.http"):
+            contenido = cliente.generar_certificado(reg)
+        ruta_pdf, _ = sesion.enrutador.almacenar_contenido(contenido, folio_id)
+    except Exception as e:
+        logging.warning(f"⚠ Falló la repetición HTTP del registro {folio_id}, se usa el navegador: {str(e)}")
+        return None
+    if cola:
+        cola.publicar(folio_id, ruta_pdf)
+    return ruta_pdf
+
+def descargar_registro(driver, reg, idx, total, sesion, cola=None, cliente=None):
+    """
+    Obtiene el certificado de 'reg' (por HTTP si hay 'cliente', si no o si falla con el
+    formulario), lo agrega al caché y registra el avance en la bitácora. El caché ya se
+    consultó al planificar: 'reg' viene de Plan.descargar. Retorna la ruta del PDF o None; si Previred rechazó el registro lo deja en la
+    bitácora con su clase de error y relanza el ErrorPrevired.
+    """
+    folio_id = reg.get("id", "NOID")
+    bitacora = obtener_bitacora()
+    bitacora.marcar(folio_id, "enviado_previred", rut=reg.get("rut"), fecha=reg.get("fecha_ultimo_dia"))
+    intentos = bitacora.intento(folio_id, "previred")
+    with contexto(folio=folio_id):
+        inicio = time.perf_counter()
+        ruta_pdf = None
+        if cliente is not None:
+            ruta_pdf = procesar_registro_http(cliente, reg, sesion, cola)
+        if ruta_pdf is None:
+            try:
+                ruta_pdf = procesar_registro(driver, reg, idx, total, sesion, cola)
+            except ErrorPrevired as e:
+                segundos = time.perf_counter() - inicio
+                registrar("previred.registro", segundos, False, intentos - 1)
+                registrar("previred.rechazo", segundos, False, clase=e.clase, origen=e.origen)
+                bitacora.error(folio_id, f"Previred rechazó el registro [{e.clase}]: {e.mensaje}")
+                raise
+        registrar("previred.registro", time.perf_counter() - inicio, bool(ruta_pdf), intentos - 1)
+    if ruta_pdf:
+        sha = sha256_archivo(ruta_pdf)
+        obtener_cache(sesion.enrutador).registrar(reg, sha)
+        bitacora.marcar_descargado(folio_id, ruta_pdf, sha)
+    else:
+        bitacora.error(folio_id, "Previred: no se obtuvo el certificado")
+    return ruta_pdf
+
+def descargar_certificados(driver, registros, sesion, cola=None, cliente=None, reingresar=None):
+    """
+    Procesa todos los registros en un driver ya ubicado en 'Ingreso Manual'. Con
+    'cliente' (ClientePrevired) se intenta primero por HTTP. 'reingresar()' vuelve a
+    'Ingreso Manual' cuando un rechazo de Previred no dejó el formulario en blanco.
+    Retorna {folio_id: ruta_pdf} con los PDF descargados.
+    """
+    descargados = {}
+    for idx, reg in enumerate(registros):
+        try:
+            ruta_pdf = descargar_registro(driver, reg, idx, len(registros), sesion, cola, cliente)
+        except ErrorPrevired as e:
+            if not e.formulario_listo:
+                if reingresar is None:
+                    raise RuntimeError(f"el formulario quedó en un estado desconocido tras: {str(e)}")
+                logging.info("Volviendo a 'Ingreso Manual' tras el rechazo de Previred...")
+                reingresar()
+            continue
+        if ruta_pdf:
+            descargados[reg.get("id", "NOID")] = ruta_pdf
+    logging.info(f"Descargados {len(descargados)}/{len(registros)} certificados.")
+    return descargados
+
+def main(empresa):
+    logging.info(f"Inicio de previred_ingreso_{empresa}.py")
+    load_dotenv()
+    previred_user = os.getenv("PREVIRED_USER")
+    previred_pass = os.getenv("PREVIRED_PASS")
+    logging.debug("Variables de entorno cargadas: PREVIRED_USER y PREVIRED_PASS.")
+    cola = cola_desde_entorno()  # Modo pipeline: cada PDF pasa de inmediato a sigo_upload
+
+    # 1) Cargar el JSON
+    archivo_json = obtener_empresa(empresa)["archivo_json"]
+    try:
+        with open(archivo_json, "r", encoding="utf-8") as f:
+            registros = json.load(f)
+        logging.info(f"JSON cargado con {len(registros)} registros.")
+    except Exception as e:
+        logging.error("Error al cargar el archivo JSON: " + str(e))
+        return
+
+    enrutador = EnrutadorDescargas(obtener_descarga_dir())
+
+    # Solo pasan por Previred los folios sin certificado en caché ni subida completa
+    plan = ejecutar_plan(planificar(empresa, registros, enrutador), enrutador)
+    if cola:
+        for item in plan.subir:
+            cola.publicar(item["id"], item["ruta"])
+    if not plan.descargar:
+        logging.info("Ningún registro necesita Previred: no se abre Firefox.")
+        return
+    registros = plan.descargar
+
+    # Import diferido: pool_previred importa este módulo
+    from pool_previred import PoolPrevired, PREVIRED_WORKERS
+    if PREVIRED_WORKERS > 1:
+        try:
+            PoolPrevired(empresa, enrutador, previred_user, previred_pass, cola=cola).descargar(registros)
+        except Exception as e:
+            logging.error(f"Error general en previred_ingreso_{empresa}.py: " + str(e))
+            logging.error(traceback.format_exc())
+        logging.info("Pool de navegadores finalizado.")
+        return
+
+    # 2) Configurar Firefox para descargas automáticas de PDF en su propia carpeta de sesión
+    sesion = enrutador.nueva_sesion()
+    try:
+        driver = configurar_firefox(sesion.directorio)
+    except Exception as e:
+        logging.error("Error al configurar el driver de Firefox: " + str(e))
+        return
+
+    try:
+        login_previred(driver, previred_user, previred_pass)
+        seleccionar_empresa(driver, empresa)
+        acceder_movimiento_personal(driver)
+
+        # Procesar cada registro del JSON
+        descargar_certificados(
+            driver, registros, sesion, cola, cliente_replay(driver),
+            lambda: volver_ingreso_manual(driver, empresa, previred_user, previred_pass),
+        )
+
+        logging.info("Proceso completado para todos los registros.")
+    except Exception as e:
+        logging.error(f"Error general en previred_ingreso_{empresa}.py: " + str(e))
+        logging.error(traceback.format_exc())
+        print("Error:", e)
+    finally:
+        driver.quit()
+        sesion.cerrar()
+        logging.info("Driver cerrado y script finalizado.")
@@ -0,0 +1,165 @@
+import os
+import re
+import json
+import time
+import shutil
+import logging
+import platform
+import subprocess
+
+# Caché local de drivers: se consulta antes de cualquier acceso a la red.
+DRIVERS_CACHE_DIR = os.getenv(
+    "DRIVERS_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "automatizacion-previred", "drivers")
+)
+MANIFEST = "manifest.json"
+
+# Binarios con los que se intenta obtener la versión del navegador instalado
+NAVEGADORES = {
+    "firefox": ["firefox", "firefox-esr", r"C:\Program Files\Mozilla Firefox\firefox.exe"],
+    "edge": [
+        "microsoft-edge", "microsoft-edge-stable", "msedge",
+        r"C:\Program Files (x86)\Microsoft\Edge\Application\msedge.exe",
+    ],
+}
+
+# Versión mínima de Firefox soportada por cada geckodriver (según las notas de versión de Mozilla)
+GECKODRIVER_FIREFOX_MINIMO = {
+    "0.36": 128,
+    "0.35": 115,
+    "0.34": 115,
+    "0.33": 102,
+    "0.32": 102,
+}
+
+_resueltos = {}
+
+def _version(comando):
+    """
+    Ejecuta 'comando --version' y retorna la primera versión numérica encontrada, o None.
+    """
+    try:
+        salida = subprocess.run(
+            [comando, "--version"], capture_output=True, text=True, timeout=15
+        ).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    coincidencia = re.search(r"(\d+(?:\.\d+)+)", salida or "")
+    return coincidencia.group(1) if coincidencia else None
+
+def _mayor(version):
+    return int(version.split(".")[0]) if version else None
+
+def version_navegador(navegador):
+    """
+    Versión instalada de 'firefox' o 'edge', o None si no se encuentra.
+    """
+    for comando in NAVEGADORES[navegador]:
+        if shutil.which(comando) or os.path.exists(comando):
+            version = _version(comando)
+            if version:
+                return version
+    return None
+
+def es_compatible(driver, version_driver, version_nav):
+    """
+    Indica si el driver sirve para el navegador instalado. Si no se conoce
+    la versión del navegador, se acepta el driver (no hay con qué compararlo).
+    """
+    if not version_driver:
+        return False
+    if not version_nav:
+        return True
+    if driver == "msedgedriver":
+        return _mayor(version_driver) == _mayor(version_nav)
+    minimo = GECKODRIVER_FIREFOX_MINIMO.get(".".join(version_driver.split(".")[:2]))
+    return minimo is None or _mayor(version_nav) >= minimo
+
+def _leer_manifest():
+    try:
+        with open(os.path.join(DRIVERS_CACHE_DIR, MANIFEST), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _guardar_manifest(manifest):
+    os.makedirs(DRIVERS_CACHE_DIR, exist_ok=True)
+    ruta = os.path.join(DRIVERS_CACHE_DIR, MANIFEST)
+    with open(ruta + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=4)
+    os.replace(ruta + ".tmp", ruta)
+
+def _guardar_en_cache(driver, ruta_origen, version_driver, version_nav):
+    """
+    Copia el binario a la caché y lo registra en el manifest.
+    """
+    destino_dir = os.path.join(DRIVERS_CACHE_DIR, driver, version_driver)
+    os.makedirs(destino_dir, exist_ok=True)
+    destino = os.path.join(destino_dir, os.path.basename(ruta_origen))
+    if os.path.abspath(ruta_origen) != os.path.abspath(destino):
+        shutil.copy2(ruta_origen, destino)
+    manifest = _leer_manifest()
+    manifest[driver] = {
+        "ruta": destino,
+        "version": version_driver,
+        "navegador_version": version_nav,
+        "plataforma": platform.system(),
+        "guardado": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    _guardar_manifest(manifest)
+    return destino
+
+def _descargar(driver):
+    """
+    Único camino que usa la red: delega en webdriver_manager.
+    """
+    if driver == "geckodriver":
+        from webdriver_manager.firefox import GeckoDriverManager
+        return GeckoDriverManager().install()
+    from webdriver_manager.microsoft import EdgeChromiumDriverManager
+    return EdgeChromiumDriverManager().install()
+
+def resolver_driver(driver, navegador):
+    """
+    Retorna la ruta de 'driver' (geckodriver o msedgedriver) compatible con 'navegador'.
+    Orden: memoria del proceso -> caché en disco -> PATH -> descarga con webdriver_manager.
+    """
+    inicio = time.perf_counter()
+    if driver in _resueltos:
+        return _resueltos[driver]
+
+    version_nav = version_navegador(navegador)
+    ruta, origen = None, None
+
+    entrada = _leer_manifest().get(driver)
+    if entrada and os.path.isfile(entrada["ruta"]):
+        if es_compatible(driver, entrada["version"], version_nav):
+            ruta, origen = entrada["ruta"], "caché"
+        else:
+            logging.info(
+                f"{driver} {entrada['version']} en caché no es compatible con {navegador} {version_nav}."
+            )
+
+    if ruta is None:
+        en_path = shutil.which(driver)
+        version_path = _version(en_path) if en_path else None
+        if en_path and es_compatible(driver, version_path, version_nav):
+            ruta, origen = _guardar_en_cache(driver, en_path, version_path, version_nav), "PATH"
+
+    if ruta is None:
+        descargado = _descargar(driver)
+        version_desc = _version(descargado) or "desconocida"
+        ruta, origen = _guardar_en_cache(driver, descargado, version_desc, version_nav), "descarga"
+
+    _resueltos[driver] = ruta
+    logging.info(
+        f"{driver} resuelto desde {origen} en {time.perf_counter() - inicio:.2f}s: {ruta} "
+        f"({navegador} {version_nav or 'versión desconocida'})"
+    )
+    return ruta
+
+def resolver_geckodriver():
+    return resolver_driver("geckodriver", "firefox")
+
+def resolver_edgedriver():
+    return resolver_driver("msedgedriver", "edge")
@@ -3,12 +3,33 @@ import subprocess
 import logging
 import datetime
 import shutil
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from cola_pdfs import ColaPDF
+from bitacora import obtener_bitacora
+from enrutador_descargas import EnrutadorDescargas
+from cache_certificados import obtener_cache
+import metricas
 
 previred_user = os.environ["PREVIRED_USER"]
 previred_pass = os.environ["PREVIRED_PASS"]
 sigo_user = os.environ["SIGO_USER"]
 sigo_pass = os.environ["SIGO_PASS"]
 
+# Empresas en el orden en que se procesan en modo secuencial
+EMPRESAS = ["Asesorias", "Business", "EST"]
+
+# MODO_CONCURRENTE=1 ejecuta la cadena de cada empresa en su propio proceso
+MODO_CONCURRENTE = os.getenv("MODO_CONCURRENTE", "0") == "1"
+MAX_CADENAS_CONCURRENTES = int(os.getenv("MAX_CADENAS_CONCURRENTES", str(len(EMPRESAS))))
+# MODO_PIPELINE=1 sube cada PDF a SIGO apenas Previred lo descarga
+MODO_PIPELINE = os.getenv("MODO_PIPELINE", "0") == "1"
+# MODO_MOTOR=1 ejecuta todas las etapas en este mismo proceso (motor.py) en vez de subprocesos
+MODO_MOTOR = os.getenv("MODO_MOTOR", "0") == "1"
+
+# Los subprocesos heredan el identificador de corrida y escriben sus métricas bajo él
+os.environ["METRICAS_CORRIDA"] = metricas.CORRIDA
+
 descarga_dir = os.path.join(os.getcwd(), "descarga")
 os.makedirs(descarga_dir, exist_ok=True)
 
@@ -20,41 +41,111 @@ logging.basicConfig(
     format="%(asctime)s [%(levelname)s] %(message)s",
     datefmt="%Y-%m-%d %H:%M:%S"
 )
-logging.info("Borrando PDF antiguos antes de iniciar ...")
-for f in os.listdir(descarga_dir):
-    if f.lower().endswith(".pdf"):
-        os.remove(os.path.join(descarga_dir, f))
 
-def run_script(script_path):
+def limpiar_descargas(directorio, conservar=()):
+    """
+    Aplica la retención del caché de certificados en 'directorio' y en sus subcarpetas
+    por empresa: solo se borran los PDF vencidos o que exceden el tamaño máximo, y los
+    que no pertenecen al caché. Los folios de 'conservar' (descargados pero aún no
+    avanzados) nunca se borran.
+    """
+    logging.info(f"Aplicando retención de PDF antes de iniciar (se conservan {len(conservar)} pendientes de subida)...")
+    for d in [directorio] + [os.path.join(directorio, empresa) for empresa in EMPRESAS]:
+        if os.path.isdir(d):
+            obtener_cache(EnrutadorDescargas(d)).aplicar_retencion(conservar=conservar)
+
+def run_script(script_path, env=None):
     """
     Ejecuta un script de Python y loguea el resultado.
     """
     logging.info(f"Iniciando: {script_path}")
+    inicio = datetime.datetime.now()
+    ok = True
     try:
-        subprocess.check_call(["python", script_path])
+        subprocess.check_call(["python", script_path], env=env)
         logging.info(f"Finalizado con éxito: {script_path}")
     except subprocess.CalledProcessError as e:
+        ok = False
         logging.error(f"Error en {script_path}: {str(e)}")
+    metricas.registrar(f"script.{script_path}", (datetime.datetime.now() - inicio).total_seconds(), ok)
+
+def run_pipeline(productor, consumidor, cola, env=None):
+    """
+    Ejecuta 'productor' (descarga) y 'consumidor' (subida) al mismo tiempo, conectados por 'cola'.
+    Al terminar el productor se cierra la cola para que el consumidor finalice.
+    """
+    cola.reiniciar()
+    env = dict(env or os.environ, COLA_PDFS=cola.ruta)
+    logging.info(f"Iniciando pipeline: {productor} -> {consumidor}")
+    proc_consumidor = subprocess.Popen(["python", consumidor], env=env)
+    try:
+        run_script(productor, env)
+    finally:
+        cola.cerrar()
+    codigo = proc_consumidor.wait()
+    if codigo == 0:
+        logging.info(f"Finalizado con éxito: {consumidor}")
+    else:
+        logging.error(f"Error en {consumidor}: código de salida {codigo}")
 
+def ejecutar_cadena(empresa, directorio=None):
+    """
+    Ejecuta la cadena sigo_login -> previred_ingreso -> sigo_upload de una empresa.
+    Si se indica 'directorio', los scripts descargan y leen los PDF desde ahí (DESCARGA_DIR).
+    """
+    env = None
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+        env = dict(os.environ, DESCARGA_DIR=directorio)
 
-def main():
-    logging.info("==== INICIO AUTOMATIZACION ====")
+    logging.info(f"== Inicio cadena {empresa} (pid {os.getpid()}) ==")
+    run_script(f"sigo_login_{empresa}.py", env)       # Genera finiquitos_filtrados_{empresa}.json
+    if MODO_PIPELINE:
+        cola = ColaPDF(os.path.join(directorio or descarga_dir, f"cola_pdfs_{empresa}.jsonl"))
+        run_pipeline(f"previred_ingreso_{empresa}.py", f"sigo_upload_{empresa}.py", cola, env)
+    else:
+        run_script(f"previred_ingreso_{empresa}.py", env) # Descarga PDFs
+        run_script(f"sigo_upload_{empresa}.py", env)      # Sube PDFs
+    logging.info(f"== Fin cadena {empresa} ==")
+    return empresa
+
+def ejecutar_concurrente(empresas, max_workers):
+    """
+    Ejecuta la cadena de cada empresa en un proceso independiente, con su propia
+    carpeta de descarga (descarga/<empresa>), limitando las cadenas simultáneas a 'max_workers'.
+    """
+    logging.info(f"Modo concurrente: {len(empresas)} cadenas, máximo {max_workers} simultáneas.")
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futuros = {
+            executor.submit(ejecutar_cadena, empresa, os.path.join(descarga_dir, empresa)): empresa
+            for empresa in empresas
+        }
+        for futuro in as_completed(futuros):
+            empresa = futuros[futuro]
+            try:
+                futuro.result()
+            except Exception as e:
+                logging.error(f"Error en la cadena {empresa}: {str(e)}")
 
-    # Asesorias
-    run_script("sigo_login_Asesorias.py")       # Genera finiquitos_filtrados_Asesorias.json
-    run_script("previred_ingreso_Asesorias.py") # Descarga PDFs
-    run_script("sigo_upload_Asesorias.py")      # Sube PDFs
 
-    # Business
-    run_script("sigo_login_Business.py")       # Genera finiquitos_filtrados_Business.json
-    run_script("previred_ingreso_Business.py") # Descarga PDFs
-    run_script("sigo_upload_Business.py")      # Sube PDFs
+def main():
+    logging.info("==== INICIO AUTOMATIZACION ====")
+    inicio = datetime.datetime.now()
+    # La bitácora permite retomar una corrida caída: sus PDF pendientes de subir no se borran
+    limpiar_descargas(descarga_dir, obtener_bitacora().folios_en_estado("descargado", "subido"))
 
-    # EST
-    run_script("sigo_login_EST.py")       # Genera finiquitos_filtrados_EST.json
-    run_script("previred_ingreso_EST.py") # Descarga PDFs
-    run_script("sigo_upload_EST.py")      # Sube PDFs
+    if MODO_MOTOR:
+        from motor import ejecutar_motor
+        ejecutar_motor(EMPRESAS, descarga_dir, pipeline=MODO_PIPELINE)
+    elif MODO_CONCURRENTE:
+        ejecutar_concurrente(EMPRESAS, max(1, MAX_CADENAS_CONCURRENTES))
+    else:
+        for empresa in EMPRESAS:
+            ejecutar_cadena(empresa)
 
+    metricas.registrar("corrida.total", (datetime.datetime.now() - inicio).total_seconds())
+    metricas.exportar_prometheus()
+    logging.info(f"Duración total: {datetime.datetime.now() - inicio}")
     logging.info("==== FIN AUTOMATIZACION ====")
 
 if __name__ == "__main__":
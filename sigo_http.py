@@ -0,0 +1,442 @@
+import os
+import re
+import json
+import time
+import logging
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from empresas import obtener_empresa
+
+URL_SIGO = os.getenv("SIGO_URL", "http://34.56.196.212/MVS_SIGO/")
+# Endpoint (HTML o JSON) detrás de 'Solicitud de finiquitos'. Si no se define, se toma
+# el href del enlace del menú.
+SIGO_LISTADO_URL = os.getenv("SIGO_LISTADO_URL")
+# Acción del formulario de login. Si no se define, el login se hace con el navegador.
+SIGO_LOGIN_URL = os.getenv("SIGO_LOGIN_URL")
+# Índice de la columna ESTADO en la tabla; sin él se busca el encabezado 'ESTADO' del listado.
+SIGO_COLUMNA_ESTADO = os.getenv("SIGO_COLUMNA_ESTADO")
+# Registros pedidos por página cuando el listado pagina en el servidor (DataTables server-side)
+SIGO_HTTP_POR_PAGINA = int(os.getenv("SIGO_HTTP_POR_PAGINA", "500"))
+# Límite de seguridad para las páginas HTML enlazadas con 'siguiente'
+SIGO_HTTP_MAX_PAGINAS = int(os.getenv("SIGO_HTTP_MAX_PAGINAS", "500"))
+COOKIES_FILE = os.getenv("SIGO_COOKIES_FILE", "sigo_cookies.json")
+TIMEOUT_HTTP = int(os.getenv("SIGO_HTTP_TIMEOUT", "30"))
+# Acciones de los formularios detrás de "Guardar" (btnguarda) y "Avanzar a calculo" (btnrgt2).
+# Sin ellas la subida se hace siempre con el navegador.
+SIGO_GUARDAR_URL = os.getenv("SIGO_GUARDAR_URL")
+SIGO_AVANZAR_URL = os.getenv("SIGO_AVANZAR_URL")
+SIGO_CAMPO_ID = os.getenv("SIGO_CAMPO_ID", "id")
+SIGO_CAMPO_ARCHIVO = os.getenv("SIGO_CAMPO_ARCHIVO", "notificacion_afc")
+# Claves de las filas-objeto del listado JSON en el orden de las columnas de la tabla (separadas
+# por coma). Sin ellas se usa 'columns[].data' de la respuesta.
+SIGO_COLUMNAS_JSON = os.getenv("SIGO_COLUMNAS_JSON")
+
+class ErrorSIGOHTTP(Exception):
+    """
+    El camino HTTP no pudo entregar el listado; se debe volver al navegador.
+    """
+
+# Textos de los enlaces de paginación hacia la página siguiente
+TEXTOS_SIGUIENTE = ("siguiente", "next", "›", "»", ">")
+# "Mostrando 1 a 10 de 250 registros" / "... de un total de 250 registros"
+PATRON_TOTAL = re.compile(r"\bde\s+(?:un\s+total\s+de\s+)?([\d.,]+)\s+registros", re.IGNORECASE)
+
+class _ParserTabla(HTMLParser):
+    """
+    Extrae el texto de cada <td> de las filas de <tbody>, los encabezados <th>, los
+    enlaces <a> de la página y la paginación (enlace 'siguiente' y total informado).
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.filas = []
+        self.encabezados = []
+        self.enlaces = []
+        self.hay_tabla = False
+        self.hay_paginacion = False
+        self.siguiente = None
+        self._textos = []
+        self._en_tbody = 0
+        self._fila = None
+        self._celda = None
+        self._encabezado = None
+        self._enlace = None
+
+    def handle_starttag(self, tag, attrs):
+        atributos = dict(attrs)
+        if re.search(r"pagina|paginate", atributos.get("class") or ""):
+            self.hay_paginacion = True
+        if tag == "table":
+            self.hay_tabla = True
+        elif tag == "tbody":
+            self._en_tbody += 1
+        elif tag == "tr" and self._en_tbody:
+            self._fila = []
+        elif tag == "td" and self._fila is not None:
+            self._celda = []
+        elif tag == "th" and not self._en_tbody:
+            self._encabezado = []
+        elif tag == "br" and self._celda is not None:
+            self._celda.append("\n")
+        elif tag == "a":
+            self._enlace = [atributos.get("href"), [], atributos]
+
+    def handle_endtag(self, tag):
+        if tag == "tbody":
+            self._en_tbody = max(0, self._en_tbody - 1)
+        elif tag == "td" and self._celda is not None:
+            self._fila.append(re.sub(r"[ \t\r\f\v]+", " ", "".join(self._celda)).strip())
+            self._celda = None
+        elif tag == "tr" and self._fila is not None:
+            self.filas.append(self._fila)
+            self._fila = None
+        elif tag == "th" and self._encabezado is not None:
+            self.encabezados.append(" ".join("".join(self._encabezado).split()))
+            self._encabezado = None
+        elif tag == "a" and self._enlace is not None:
+            href, texto, atributos = self._enlace
+            self.enlaces.append((href, "".join(texto).strip()))
+            self._enlace = None
+            if _es_siguiente(href, "".join(texto).strip(), atributos):
+                self.siguiente = href
+
+    def handle_data(self, data):
+        self._textos.append(data)
+        if self._celda is not None:
+            self._celda.append(data)
+        if self._encabezado is not None:
+            self._encabezado.append(data)
+        if self._enlace is not None:
+            self._enlace[1].append(data)
+
+    @property
+    def total(self):
+        """
+        Total de registros que informa la página, o None si no lo dice.
+        """
+        m = PATRON_TOTAL.search(" ".join("".join(self._textos).split()))
+        return int(re.sub(r"[.,]", "", m.group(1))) if m else None
+
+def _es_siguiente(href, texto, atributos):
+    """
+    True si el enlace lleva a la página siguiente por URL (no solo con JavaScript).
+    """
+    if not href or href.startswith(("#", "javascript")):
+        return False
+    clases = (atributos.get("class") or "").lower()
+    return atributos.get("rel") == "next" or "next" in clases.split() or texto.lower() in TEXTOS_SIGUIENTE
+
+def parsear_html(html):
+    parser = _ParserTabla()
+    parser.feed(html)
+    parser.close()
+    return parser
+
+def claves_desde_json(datos):
+    """
+    Claves de las filas-objeto en el orden de las columnas de la tabla: SIGO_COLUMNAS_JSON
+    o 'columns[].data' de DataTables. None si no hay un orden explícito.
+    """
+    if SIGO_COLUMNAS_JSON:
+        return [c.strip() for c in SIGO_COLUMNAS_JSON.split(",")]
+    if isinstance(datos, dict) and isinstance(datos.get("columns"), list):
+        claves = [c.get("data") if isinstance(c, dict) else None for c in datos["columns"]]
+        if claves and all(isinstance(c, str) for c in claves):
+            return claves
+    return None
+
+def filas_desde_json(datos, claves=None):
+    """
+    Acepta una lista de filas o el formato de DataTables ({"data": [...]}) y retorna
+    listas de textos por celda, igual que la tabla HTML. Las filas-objeto se ordenan
+    por 'claves' (o claves_desde_json): el resto del código lee las celdas por índice,
+    así que sin un orden explícito se lanza ErrorSIGOHTTP en vez de confiar en el del JSON.
+    """
+    claves = claves or claves_desde_json(datos)
+    if isinstance(datos, dict):
+        datos = datos.get("data") or datos.get("aaData") or []
+    filas = []
+    for fila in datos:
+        if isinstance(fila, dict):
+            if not claves:
+                raise ErrorSIGOHTTP(
+                    "El listado JSON trae filas-objeto sin orden de columnas (columns[].data o SIGO_COLUMNAS_JSON)."
+                )
+            fila = [fila.get(k) for k in claves]
+        filas.append([re.sub(r"<[^>]+>", "", str(c if c is not None else "")).strip() for c in fila])
+    return filas
+
+def encabezados_desde_json(datos):
+    """
+    Nombres de columna del JSON: la lista 'columns' de DataTables o, si no viene, las
+    claves de claves_desde_json (en el mismo orden que las celdas de filas_desde_json).
+    """
+    if isinstance(datos, dict) and isinstance(datos.get("columns"), list):
+        return [str(c.get("title") or c.get("name") or c.get("data") or "") if isinstance(c, dict) else str(c)
+                for c in datos["columns"]]
+    return claves_desde_json(datos) or []
+
+def total_desde_json(datos):
+    """
+    Total de registros de un DataTables server-side (recordsFiltered/recordsTotal o sus
+    nombres antiguos), o None si la respuesta trae el listado completo.
+    """
+    if not isinstance(datos, dict):
+        return None
+    for clave in ("recordsFiltered", "iTotalDisplayRecords", "recordsTotal", "iTotalRecords"):
+        if datos.get(clave) is not None:
+            return int(datos[clave])
+    return None
+
+class ClienteSIGO:
+    """
+    requests.Session con pool de conexiones keep-alive y la sesión (cookies) de SIGO.
+    """
+
+    def __init__(self, base_url=URL_SIGO, pool=int(os.getenv("SIGO_HTTP_POOL", "8"))):
+        self.base_url = base_url
+        self.encabezados = []
+        self.session = requests.Session()
+        adaptador = HTTPAdapter(
+            pool_connections=pool,
+            pool_maxsize=pool,
+            max_retries=Retry(total=2, backoff_factor=0.3, status_forcelist=[502, 503, 504]),
+        )
+        self.session.mount("http://", adaptador)
+        self.session.mount("https://", adaptador)
+
+    def copiar_cookies(self, driver):
+        """
+        Copia las cookies y el User-Agent de un driver de Selenium con sesión iniciada.
+        """
+        for c in driver.get_cookies():
+            self.session.cookies.set(c["name"], c["value"], domain=c.get("domain"), path=c.get("path", "/"))
+        try:
+            self.session.headers["User-Agent"] = driver.execute_script("return navigator.userAgent")
+        except Exception:
+            pass
+        logging.info(f"{len(driver.get_cookies())} cookies copiadas desde el navegador a la sesión HTTP.")
+
+    def guardar_cookies(self, archivo=COOKIES_FILE):
+        with open(archivo, "w", encoding="utf-8") as f:
+            json.dump(requests.utils.dict_from_cookiejar(self.session.cookies), f)
+
+    def cargar_cookies(self, archivo=COOKIES_FILE):
+        if not os.path.exists(archivo):
+            return False
+        with open(archivo, "r", encoding="utf-8") as f:
+            self.session.cookies.update(json.load(f))
+        return True
+
+    def get(self, url, **kwargs):
+        kwargs.setdefault("timeout", TIMEOUT_HTTP)
+        return self.session.get(urljoin(self.base_url, url), **kwargs)
+
+    def post(self, url, **kwargs):
+        kwargs.setdefault("timeout", TIMEOUT_HTTP)
+        return self.session.post(urljoin(self.base_url, url), **kwargs)
+
+    def es_pagina_login(self, html):
+        return 'id="btnLogn"' in html or "id='btnLogn'" in html
+
+    def login(self, usuario, contraseña):
+        """
+        Login directo por HTTP (solo si SIGO_LOGIN_URL está definida). Retorna True si quedó autenticado.
+        """
+        if not SIGO_LOGIN_URL:
+            return False
+        r = self.post(SIGO_LOGIN_URL, data={"user": usuario, "pass": contraseña})
+        ok = r.ok and not self.es_pagina_login(r.text)
+        logging.info(f"Login HTTP en SIGO: {'exitoso' if ok else 'fallido'} (HTTP {r.status_code}).")
+        return ok
+
+    def url_listado(self):
+        """
+        SIGO_LISTADO_URL, o el href del enlace 'Solicitud de finiquitos' de la página principal.
+        """
+        if SIGO_LISTADO_URL:
+            return SIGO_LISTADO_URL
+        r = self.get(self.base_url)
+        for href, texto in parsear_html(r.text).enlaces:
+            if texto == "Solicitud de finiquitos" and href and not href.startswith(("#", "javascript")):
+                return urljoin(r.url, href)
+        raise ErrorSIGOHTTP("No se encontró el enlace 'Solicitud de finiquitos' en la página principal.")
+
+    def _get_listado(self, url, **kwargs):
+        r = self.get(url, **kwargs)
+        if not r.ok:
+            raise ErrorSIGOHTTP(f"HTTP {r.status_code} al obtener {url}.")
+        if "json" not in r.headers.get("Content-Type", "") and self.es_pagina_login(r.text):
+            raise ErrorSIGOHTTP("La sesión HTTP no está autenticada (se recibió la página de login).")
+        return r
+
+    def _filas_json(self, url, r):
+        datos = r.json()
+        # Las páginas siguientes de DataTables no repiten 'columns': se usa el orden de la primera
+        claves = claves_desde_json(datos)
+        filas = filas_desde_json(datos, claves)
+        self.encabezados = encabezados_desde_json(datos)
+        total = total_desde_json(datos)
+        # Sin total el JSON trae todo (lista simple o DataTables del lado del cliente)
+        while total is not None and len(filas) < total:
+            r = self._get_listado(url, params={"start": len(filas), "length": SIGO_HTTP_POR_PAGINA})
+            pagina = filas_desde_json(r.json(), claves)
+            if not pagina:
+                raise ErrorSIGOHTTP(f"El listado informa {total} registros pero se obtuvieron {len(filas)}.")
+            filas.extend(pagina)
+        return filas
+
+    def _filas_html(self, url, r):
+        parser = parsear_html(r.text)
+        if not parser.hay_tabla:
+            raise ErrorSIGOHTTP(f"La respuesta de {url} no contiene una tabla.")
+        self.encabezados = parser.encabezados
+        filas, total = list(parser.filas), parser.total
+        visitadas = {r.url}
+        while parser.siguiente and len(visitadas) < SIGO_HTTP_MAX_PAGINAS:
+            siguiente = urljoin(r.url, parser.siguiente)
+            if siguiente in visitadas:
+                break
+            visitadas.add(siguiente)
+            r = self._get_listado(siguiente)
+            parser = parsear_html(r.text)
+            filas.extend(parser.filas)
+        if total is not None and len(filas) < total:
+            raise ErrorSIGOHTTP(f"El listado informa {total} registros pero se obtuvieron {len(filas)}.")
+        if total is None and parser.hay_paginacion and len(visitadas) == 1:
+            raise ErrorSIGOHTTP("El listado está paginado y no informa su total: no se puede saber si está completo.")
+        return filas
+
+    def obtener_filas(self):
+        """
+        Descarga el listado completo y retorna sus filas (listas de textos por celda);
+        deja sus nombres de columna en self.encabezados. Sigue la paginación del servidor
+        (DataTables server-side o enlaces 'siguiente'). Si no puede asegurar que recorrió
+        todos los registros lanza ErrorSIGOHTTP para que se use el navegador.
+        """
+        url = self.url_listado()
+        inicio = time.perf_counter()
+        r = self._get_listado(url)
+        if "json" in r.headers.get("Content-Type", ""):
+            filas = self._filas_json(url, r)
+        else:
+            filas = self._filas_html(url, r)
+        logging.info(f"Listado HTTP: {len(filas)} filas en {time.perf_counter() - inicio:.2f}s.")
+        return filas
+
+    def verificar_respuesta(self, r, accion):
+        """
+        Lanza ErrorSIGOHTTP si la respuesta de 'accion' no indica éxito.
+        """
+        if not r.ok:
+            raise ErrorSIGOHTTP(f"{accion}: HTTP {r.status_code}.")
+        if "json" in r.headers.get("Content-Type", ""):
+            datos = r.json()
+            if isinstance(datos, dict) and (datos.get("error") or datos.get("success") is False):
+                raise ErrorSIGOHTTP(f"{accion}: {datos.get('error') or datos.get('message') or datos}.")
+        elif self.es_pagina_login(r.text):
+            raise ErrorSIGOHTTP(f"{accion}: la sesión HTTP no está autenticada.")
+
+    def guardar_pdf(self, record_id, ruta_pdf):
+        """
+        Repite el POST de "Guardar" (multipart con el PDF) para 'record_id'.
+        """
+        if not (SIGO_GUARDAR_URL and SIGO_AVANZAR_URL):
+            raise ErrorSIGOHTTP("SIGO_GUARDAR_URL / SIGO_AVANZAR_URL no están definidas.")
+        inicio = time.perf_counter()
+        with open(ruta_pdf, "rb") as f:
+            r = self.post(
+                SIGO_GUARDAR_URL,
+                data={SIGO_CAMPO_ID: record_id},
+                files={SIGO_CAMPO_ARCHIVO: (os.path.basename(ruta_pdf), f, "application/pdf")},
+            )
+        self.verificar_respuesta(r, f"Guardar {record_id}")
+        logging.info(f"PDF del ID {record_id} guardado por HTTP en {time.perf_counter() - inicio:.2f}s.")
+
+    def avanzar(self, record_id):
+        """
+        Repite el POST de "Avanzar a calculo" para 'record_id' (con el PDF ya guardado).
+        """
+        if not SIGO_AVANZAR_URL:
+            raise ErrorSIGOHTTP("SIGO_AVANZAR_URL no está definida.")
+        r = self.post(SIGO_AVANZAR_URL, data={SIGO_CAMPO_ID: record_id})
+        self.verificar_respuesta(r, f"Avanzar a calculo {record_id}")
+        logging.info(f"ID {record_id} avanzado a cálculo por HTTP.")
+
+def columna_estado(encabezados):
+    """
+    Índice de la columna ESTADO: SIGO_COLUMNA_ESTADO o el encabezado 'ESTADO' del listado.
+    Sin ninguno lanza ErrorSIGOHTTP (adivinarla aceptaría filas por otra celda).
+    """
+    if SIGO_COLUMNA_ESTADO:
+        return int(SIGO_COLUMNA_ESTADO)
+    normalizados = [e.strip().upper() for e in encabezados or []]
+    if "ESTADO" in normalizados:
+        return normalizados.index("ESTADO")
+    raise ErrorSIGOHTTP("No se conoce la columna ESTADO: defina SIGO_COLUMNA_ESTADO.")
+
+def filtrar_empresa_estado(filas, nombre_empresa, columna, estado="Solicitado"):
+    """
+    Aplica en Python los filtros que el navegador hace con los dropdowns EMPRESA y ESTADO.
+    """
+    for cols in filas:
+        if len(cols) < 12 or cols[8].strip() != nombre_empresa:
+            continue
+        if len(cols) > columna and cols[columna].strip() == estado:
+            yield cols
+
+def listar_finiquitos_http(cliente, empresa, fecha_limite):
+    """
+    Lista los finiquitos 'Solicitado' de la empresa usando solo HTTP.
+    """
+    # Import diferido: sigo_login importa este módulo en su main
+    from sigo_login import filtrar_filas
+    filas = cliente.obtener_filas()
+    columna = columna_estado(cliente.encabezados)
+    # La tabla HTTP llega sin ordenar por fecha: se filtra cada fila
+    filas = filtrar_empresa_estado(filas, obtener_empresa(empresa)["nombre_sigo"], columna)
+    return list(filtrar_filas(filas, fecha_limite))
+
+def autenticar(cliente, usuario, contraseña):
+    """
+    Autentica 'cliente' con login HTTP o, si no está configurado o falla, con el
+    navegador (una sola vez) copiando sus cookies. Guarda las cookies para la próxima corrida.
+    """
+    if not cliente.login(usuario, contraseña):
+        from sigo_login import configurar_edge, login_sigo
+        driver = configurar_edge()
+        try:
+            login_sigo(driver, usuario, contraseña)
+            cliente.copiar_cookies(driver)
+        finally:
+            driver.quit()
+    cliente.guardar_cookies()
+
+def listar_sin_navegador(empresa, usuario, contraseña, fecha_limite, cliente=None):
+    """
+    Retorna la lista de finiquitos obtenida por HTTP, o None si hay que usar el navegador.
+    Sin 'cliente', primero prueba las cookies guardadas y solo si no sirven inicia sesión.
+    """
+    try:
+        if cliente is None:
+            cliente = ClienteSIGO()
+            if cliente.cargar_cookies():
+                try:
+                    registros = listar_finiquitos_http(cliente, empresa, fecha_limite)
+                    logging.info(f"Listado de {empresa} obtenido por HTTP con cookies guardadas: {len(registros)} registros.")
+                    return registros
+                except (ErrorSIGOHTTP, requests.RequestException) as e:
+                    logging.info(f"Las cookies guardadas de SIGO no sirven: {str(e)}")
+                    cliente.session.cookies.clear()
+            autenticar(cliente, usuario, contraseña)
+        registros = listar_finiquitos_http(cliente, empresa, fecha_limite)
+        logging.info(f"Listado de {empresa} obtenido por HTTP: {len(registros)} registros.")
+        return registros
+    except Exception as e:
+        logging.warning(f"⚠ Falló el listado HTTP de SIGO, se usa el navegador: {str(e)}")
+        return None
@@ -0,0 +1,531 @@
+import os
+import time
+import json
+import itertools
+import logging
+import traceback
+from datetime import datetime, date
+from dotenv import load_dotenv
+
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+from selenium.common.exceptions import WebDriverException
+from selenium.webdriver.edge.service import Service as EdgeService
+from selenium.webdriver.edge.options import Options as EdgeOptions
+# Para esperas explícitas
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+from empresas import obtener_empresa
+from esperas import esperar_pagina_lista, esperar_dom_estable, esperar_navegacion, instrumentar
+from resolver_drivers import resolver_edgedriver
+from bitacora import obtener_bitacora
+from traza_webdriver import activar_desde_entorno as activar_traza_webdriver
+from metricas import medido
+
+# Definimos el nombre del archivo de log
+LOG_FILE = "automatizacion.log"
+
+# Configuración de logging con modo 'append'
+logging.basicConfig(
+    filename=LOG_FILE,
+    filemode="a",
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(message)s",
+    datefmt="%Y-%m-%d %H:%M:%S"
+)
+
+URL_SIGO = os.getenv("SIGO_URL", "http://34.56.196.212/MVS_SIGO/")
+# MODO_HTTP_SIGO=1 obtiene el listado con requests (sin renderizar la página) y usa el navegador solo como respaldo
+MODO_HTTP_SIGO = os.getenv("MODO_HTTP_SIGO", "0") == "1"
+# "masiva": toda la tabla en un execute_script; "celdas": find_elements + .text por celda
+EXTRACCION_TABLA = os.getenv("EXTRACCION_TABLA", "masiva")
+
+# innerText reproduce lo que entrega WebElement.text (texto visible de la celda)
+JS_FILAS_TABLA = """
+return Array.from(document.querySelectorAll('table tbody tr')).map(function(tr) {
+    return Array.from(tr.querySelectorAll('td')).map(function(td) { return td.innerText; });
+});
+"""
+
+# CORTE_POR_ORDEN=0 desactiva el corte anticipado basado en el orden por FECHA ULTIMO DIA
+CORTE_POR_ORDEN = os.getenv("CORTE_POR_ORDEN", "1") == "1"
+
+# Dirección del orden según el encabezado FECHA ULTIMO DIA ('asc', 'desc' o null)
+JS_DIRECCION_ORDEN = """
+var th = Array.from(document.querySelectorAll('th')).find(function(t) {
+    return (t.innerText || '').indexOf('FECHA ULTIMO DIA') >= 0;
+});
+if (!th) { return null; }
+var aria = th.getAttribute('aria-sort');
+if (aria === 'ascending') { return 'asc'; }
+if (aria === 'descending') { return 'desc'; }
+var c = th.className || '';
+if (/(^|\\s|_|-)asc(ending)?($|\\s)/.test(c)) { return 'asc'; }
+if (/(^|\\s|_|-)desc(ending)?($|\\s)/.test(c)) { return 'desc'; }
+return null;
+"""
+
+# Límite de seguridad para el recorrido de páginas
+MAX_PAGINAS = int(os.getenv("MAX_PAGINAS", "500"))
+
+# Elige el mayor tamaño de página ofrecido (DataTables u otro <select> de "mostrar N").
+# Retorna el tamaño elegido o null si la tabla no tiene selector.
+JS_MAXIMO_POR_PAGINA = """
+var $ = window.jQuery;
+if ($ && $.fn.dataTable && $('table.dataTable').length) {
+    var api = $('table.dataTable').first().DataTable();
+    if (api.page.len() !== -1) { api.page.len(-1).draw(false); }
+    return -1;
+}
+var select = document.querySelector("select[name$='_length'], select.page-size, select[name*='por_pagina'], select[name*='pageSize']");
+if (!select) { return null; }
+var mejor = null, mejorValor = 0;
+Array.from(select.options).forEach(function(o) {
+    var v = parseInt(o.value, 10);
+    var valor = v < 0 ? Infinity : v;
+    if (!isNaN(v) && valor > mejorValor) { mejor = o; mejorValor = valor; }
+});
+if (!mejor || select.value === mejor.value) { return mejor ? mejor.value : null; }
+select.value = mejor.value;
+select.dispatchEvent(new Event('change', {bubbles: true}));
+if ($) { $(select).trigger('change'); }
+return mejor.value;
+"""
+
+# Hace click en "siguiente" si existe y no está deshabilitado. Retorna true si avanzó.
+JS_PAGINA_SIGUIENTE = """
+var candidatos = Array.from(document.querySelectorAll(
+    ".paginate_button.next, ul.pagination li a, .pagination a, a[aria-label='Next'], button[aria-label='Next']"
+));
+var textos = ['chevron_right', '›', '»', '>', 'siguiente', 'next'];
+for (var i = 0; i < candidatos.length; i++) {
+    var a = candidatos[i];
+    var texto = (a.innerText || '').trim().toLowerCase();
+    var esSiguiente = a.classList.contains('next') || textos.indexOf(texto) >= 0
+        || (a.getAttribute('aria-label') || '').toLowerCase() === 'next';
+    if (!esSiguiente) { continue; }
+    var li = a.closest('li');
+    if (a.classList.contains('disabled') || (li && li.classList.contains('disabled')) || a.disabled) {
+        return false;
+    }
+    a.click();
+    return true;
+}
+return false;
+"""
+
+@medido("sigo.iniciar_driver")
+def configurar_edge():
+    """
+    Inicia Edge en modo headless.
+    """
+    activar_traza_webdriver()
+    edge_service = EdgeService(resolver_edgedriver())
+    edge_options = EdgeOptions()
+    edge_options.add_argument("--headless")
+    return webdriver.Edge(service=edge_service, options=edge_options)
+
+@medido("sigo.login")
+def login_sigo(driver, usuario, contraseña):
+    """
+    Inicia sesión en SIGO.
+    """
+    driver.get(URL_SIGO)
+    driver.maximize_window()
+
+    logging.info("Iniciando sesión en SIGO...")
+    WebDriverWait(driver, 15).until(
+        EC.presence_of_element_located((By.ID, "user"))
+    ).send_keys(usuario)
+    driver.find_element(By.ID, "pass").send_keys(contraseña)
+
+    esperar_navegacion(driver, driver.find_element(By.ID, "btnLogn").click, nombre="login sigo")
+
+@medido("sigo.navegar_finiquitos")
+def navegar_solicitud_finiquitos(driver):
+    """
+    Abre la pantalla 'Solicitud de finiquitos' desde el menú.
+    """
+    logging.info("Navegando hacia 'Solicitud de finiquitos'...")
+    enlace = WebDriverWait(driver, 15).until(
+        EC.element_to_be_clickable((By.LINK_TEXT, "Solicitud de finiquitos"))
+    )
+    esperar_navegacion(driver, enlace.click, nombre="solicitud de finiquitos")
+    esperar_pagina_lista(driver, nombre="solicitud de finiquitos")
+
+@medido("sigo.seleccionar_empresa")
+def seleccionar_empresa_sigo(driver, nombre_empresa):
+    """
+    Selecciona 'nombre_empresa' en el dropdown EMPRESA CONTRATANTE.
+    """
+    try:
+        empresa_label = WebDriverWait(driver, 10).until(
+            EC.element_to_be_clickable((By.ID, "label_cliente"))
+        )
+        empresa_label.click()
+        logging.info("📌 Se hizo clic en 'EMPRESA CONTRATANTE'.")
+
+        WebDriverWait(driver, 10).until(
+            EC.visibility_of_element_located((By.ID, "input_cliente"))
+        )
+
+        input_cliente = WebDriverWait(driver, 5).until(
+            EC.element_to_be_clickable((By.ID, "input_cliente"))
+        )
+        esperar_dom_estable(driver, ms=200, nombre="dropdown empresa", accion=input_cliente.click)
+
+        empresa_opcion_xpath = f"//ul[contains(@class, 'dropdown-content')]/li/span[text()='{nombre_empresa}']"
+
+        try:
+            empresa_opcion = WebDriverWait(driver, 10).until(
+                EC.element_to_be_clickable((By.XPATH, empresa_opcion_xpath))
+            )
+            empresa_opcion.click()
+        except:
+            logging.warning("⚠ Intentando seleccionar Empresa usando JavaScript...")
+            driver.execute_script(
+                f"document.evaluate(\"{empresa_opcion_xpath}\", document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue.click();"
+            )
+
+        logging.info("✅ Empresa seleccionada correctamente.")
+
+    except Exception as e:
+        screenshot_path = os.path.join(os.getcwd(), "error_empresa.png")
+        driver.save_screenshot(screenshot_path)
+        error_details = traceback.format_exc()
+        logging.error(f"❌ Error al seleccionar empresa: {str(e)}\n{error_details}")
+
+@medido("sigo.seleccionar_estado")
+def seleccionar_estado(driver, estado="Solicitado"):
+    """
+    Selecciona 'estado' en el dropdown ESTADO.
+    """
+    try:
+        estado_label = WebDriverWait(driver, 10).until(
+            EC.element_to_be_clickable((By.ID, "label_estado"))
+        )
+        estado_label.click()
+        logging.info("✅ Se hizo clic en 'ESTADO'.")
+
+        WebDriverWait(driver, 10).until(
+            EC.visibility_of_element_located((By.ID, "input_estado"))
+        )
+
+        input_estado = WebDriverWait(driver, 5).until(
+            EC.element_to_be_clickable((By.ID, "input_estado"))
+        )
+        input_estado.click()
+        logging.info("✅ Se hizo clic en input_estado.")
+
+        estado_opcion_xpath = f"//ul[contains(@class, 'dropdown-content')]/li/span[text()='{estado}']"
+        instrumentar(driver)  # antes del click: la espera debe ver el AJAX del filtro
+        try:
+            estado_opcion = WebDriverWait(driver, 10).until(
+                EC.element_to_be_clickable((By.XPATH, estado_opcion_xpath))
+            )
+            estado_opcion.click()
+        except:
+            driver.execute_script(
+                f"document.evaluate(\"{estado_opcion_xpath}\", document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue.click();"
+            )
+
+        esperar_pagina_lista(driver, nombre="filtro estado")
+        logging.info("✅ Estado seleccionado correctamente.")
+
+    except Exception as e:
+        screenshot_path = os.path.join(os.getcwd(), "error_estado.png")
+        driver.save_screenshot(screenshot_path)
+        error_details = traceback.format_exc()
+        logging.error(f"❌ Error al seleccionar Estado: {str(e)}\n{error_details}")
+
+@medido("sigo.ordenar_por_fecha")
+def ordenar_por_fecha(driver):
+    """
+    Click 2 veces en FECHA ULTIMO DIA para ordenar.
+    """
+    try:
+        th_fecha = WebDriverWait(driver, 10).until(
+            EC.element_to_be_clickable((By.XPATH, "//th[contains(text(), 'FECHA ULTIMO DIA')]"))
+        )
+        # Primer click
+        esperar_dom_estable(driver, ms=200, nombre="orden fecha 1", accion=th_fecha.click)
+        # Segundo click (la tabla pudo re-renderizar el encabezado)
+        th_fecha = WebDriverWait(driver, 10).until(
+            EC.element_to_be_clickable((By.XPATH, "//th[contains(text(), 'FECHA ULTIMO DIA')]"))
+        )
+        esperar_dom_estable(driver, ms=200, nombre="orden fecha 2", accion=th_fecha.click)
+        logging.info("📌 Se ordenó por FECHA ULTIMO DIA correctamente (doble clic).")
+    except Exception as e:
+        logging.warning(f"⚠ No se pudo hacer doble clic en la columna FECHA ULTIMO DIA: {str(e)}")
+
+def leer_filas_tabla(driver):
+    """
+    Lee todas las filas de la tabla en un solo execute_script.
+    Retorna una lista de filas, cada una con el texto de sus celdas.
+    """
+    return driver.execute_script(JS_FILAS_TABLA)
+
+def leer_filas_tabla_celdas(driver):
+    """
+    Lectura celda por celda (varios round-trips por fila). Solo se usa como respaldo.
+    """
+    filas = []
+    for row in driver.find_elements(By.CSS_SELECTOR, "table tbody tr"):
+        filas.append([col.text for col in row.find_elements(By.TAG_NAME, "td")])
+    return filas
+
+def filtrar_filas(filas, fecha_limite):
+    """
+    Convierte las filas de la tabla en registros y entrega (generador) los con
+    fecha último día <= fecha_limite.
+    """
+    for cols in filas:
+        if len(cols) < 12:
+            continue  # Evita filas no válidas (encabezados, etc.)
+
+        id_str = cols[1].strip()
+        rut = cols[2].strip()
+        empresa = cols[8].strip()
+        fecha_ultimo_dia_str = cols[11].strip()  # Formato "dd-mm-yyyy"
+
+        # Convertir fecha a datetime para comparar
+        try:
+            fecha_ultimo_dia = datetime.strptime(fecha_ultimo_dia_str, "%d-%m-%Y").date()
+        except ValueError:
+            logging.warning(f"No se pudo parsear la fecha: {fecha_ultimo_dia_str} (RUT: {rut})")
+            continue
+
+        # Verificar si la fecha es <= fecha_limite (hoy)
+        if fecha_ultimo_dia <= fecha_limite:
+            logging.info(f"RUT: {rut}, Empresa: {empresa}, Fecha: {fecha_ultimo_dia_str} => Registro ACEPTADO (fecha <= límite).")
+            yield {
+                "id": id_str,
+                "rut": rut,
+                "empresa": empresa,
+                "fecha_ultimo_dia": fecha_ultimo_dia_str
+            }
+        else:
+            logging.info(f"RUT: {rut}, Empresa: {empresa}, Fecha: {fecha_ultimo_dia_str} => Registro DESCARTADO (fecha > límite).")
+
+def leer_pagina(driver):
+    """
+    Filas de la página visible: lectura masiva, o celda por celda si falla o así se configuró.
+    """
+    if EXTRACCION_TABLA == "masiva":
+        try:
+            return leer_filas_tabla(driver)
+        except WebDriverException as e:
+            logging.warning(f"⚠ Falló la lectura masiva de la tabla, se lee celda por celda: {str(e)}")
+    return leer_filas_tabla_celdas(driver)
+
+def iterar_paginas(driver):
+    """
+    Generador con las filas de cada página de la tabla (una lista por página). Primero elige
+    el mayor tamaño de página disponible y luego avanza con el botón 'siguiente' hasta la última.
+    Si el consumidor deja de pedir páginas, no se hacen más clicks.
+    """
+    instrumentar(driver)  # antes del cambio de tamaño, para que la espera vea su AJAX
+    maximo = driver.execute_script(JS_MAXIMO_POR_PAGINA)
+    if maximo:
+        logging.info(f"Tamaño de página de la tabla ajustado a {maximo}.")
+        esperar_pagina_lista(driver, ms=200, nombre="tamaño de página")
+
+    pagina = 1
+    firma_anterior = None
+    total = 0
+    try:
+        while True:
+            inicio = time.perf_counter()
+            filas = leer_pagina(driver)
+            firma = "|".join(filas[0]) if filas else ""
+            if pagina > 1 and firma == firma_anterior:
+                logging.warning(f"La página {pagina} repite el contenido de la anterior; se detiene el recorrido.")
+                break
+            total += len(filas)
+            logging.info(f"Página {pagina}: {len(filas)} filas leídas en {time.perf_counter() - inicio:.2f}s.")
+            yield filas
+
+            if pagina >= MAX_PAGINAS:
+                break
+            instrumentar(driver)
+            if not driver.execute_script(JS_PAGINA_SIGUIENTE):
+                break
+            esperar_pagina_lista(driver, ms=200, nombre="página siguiente", pagina=pagina + 1)
+            firma_anterior = firma
+            pagina += 1
+    finally:
+        logging.info(f"Tabla recorrida: {pagina} página(s), {total} filas ({EXTRACCION_TABLA}).")
+
+def fecha_fila(cols):
+    """
+    FECHA ULTIMO DIA de una fila como date, o None si la fila no es válida.
+    """
+    if len(cols) < 12:
+        return None
+    try:
+        return datetime.strptime(cols[11].strip(), "%d-%m-%Y").date()
+    except ValueError:
+        return None
+
+def fechas_fila(filas):
+    return [f for f in (fecha_fila(cols) for cols in filas) if f is not None]
+
+def pagina_en_orden(filas, direccion, anterior=None):
+    """
+    True si las fechas de 'filas' (precedidas por 'anterior', la última fecha de la
+    página previa) respetan 'direccion'.
+    """
+    fechas = ([anterior] if anterior else []) + fechas_fila(filas)
+    if direccion == "asc":
+        return all(a <= b for a, b in zip(fechas, fechas[1:]))
+    return all(a >= b for a, b in zip(fechas, fechas[1:]))
+
+def detectar_direccion_orden(driver, filas):
+    """
+    'asc', 'desc' o None según el indicador del encabezado (aria-sort o clases
+    sorting_asc/sorting_desc). Sin indicador retorna None: ordenar_por_fecha solo
+    advierte si falla, y unas fechas en orden en la primera página no prueban que la
+    tabla esté ordenada. También retorna None si esas fechas contradicen el encabezado.
+    """
+    try:
+        direccion = driver.execute_script(JS_DIRECCION_ORDEN)
+    except WebDriverException as e:
+        logging.debug(f"No se pudo leer la dirección de orden del encabezado: {str(e)}")
+        return None
+    if direccion and not pagina_en_orden(filas, direccion):
+        logging.warning(f"⚠ El encabezado indica orden '{direccion}' pero la primera página no lo respeta.")
+        return None
+    return direccion or None
+
+def iterar_finiquitos(driver, fecha_limite):
+    """
+    Generador de los registros aceptados de todas las páginas. Aprovecha el orden por
+    FECHA ULTIMO DIA confirmado por el encabezado: en orden ascendente se detiene en la
+    primera fecha posterior al límite (sin pedir más páginas); en descendente salta sin
+    procesar las páginas cuya última fila aún es posterior al límite. Cada página se
+    verifica contra ese orden antes de cortar; si alguna no lo respeta, o no hay orden
+    confirmado, se revisa todo.
+    """
+    logging.info(f"Fecha límite (hoy) en el sistema: {fecha_limite}")
+    paginas = iterar_paginas(driver)
+    primera = next(paginas, [])
+    direccion = detectar_direccion_orden(driver, primera) if CORTE_POR_ORDEN else None
+    logging.info(f"Orden de FECHA ULTIMO DIA: {direccion or 'sin confirmar, se recorre toda la tabla'}.")
+
+    omitidas = 0
+    ultima = None
+    for filas in itertools.chain([primera], paginas):
+        if direccion and not pagina_en_orden(filas, direccion, ultima):
+            logging.warning("⚠ Una página no respeta el orden por FECHA ULTIMO DIA; se recorre el resto completo.")
+            direccion = None
+        fechas = fechas_fila(filas)
+        ultima = fechas[-1] if fechas else ultima
+        if direccion == "asc":
+            for i, cols in enumerate(filas):
+                fecha = fecha_fila(cols)
+                if fecha is not None and fecha > fecha_limite:
+                    logging.info(
+                        f"Corte anticipado: {cols[11].strip()} > {fecha_limite}; "
+                        f"se omite el resto de la tabla ({len(filas) - i} filas en esta página)."
+                    )
+                    paginas.close()
+                    return
+                yield from filtrar_filas([cols], fecha_limite)
+        elif direccion == "desc":
+            if fechas and fechas[-1] > fecha_limite:
+                omitidas += len(filas)
+                logging.info(f"Página omitida completa: su última fecha ({fechas[-1]}) es posterior al límite.")
+                continue
+            if omitidas:
+                logging.info(f"{omitidas} filas con fecha posterior al límite omitidas sin procesar.")
+                omitidas = 0
+            yield from filtrar_filas(filas, fecha_limite)
+        else:
+            yield from filtrar_filas(filas, fecha_limite)
+
+@medido("sigo.extraer")
+def extraer_finiquitos(driver, fecha_limite):
+    """
+    Lee la tabla de finiquitos y retorna los registros con fecha último día <= fecha_limite.
+    """
+    return list(iterar_finiquitos(driver, fecha_limite))
+
+def preparar_listado(driver, empresa):
+    """
+    Con la sesión de SIGO abierta, filtra por empresa y estado 'Solicitado' y ordena por fecha.
+    """
+    navegar_solicitud_finiquitos(driver)
+    seleccionar_empresa_sigo(driver, obtener_empresa(empresa)["nombre_sigo"])
+    seleccionar_estado(driver, "Solicitado")
+    ordenar_por_fecha(driver)
+
+def listar_finiquitos(driver, empresa, fecha_limite=None):
+    """
+    Con la sesión de SIGO abierta, filtra por empresa y estado 'Solicitado'
+    y retorna los finiquitos a procesar.
+    """
+    preparar_listado(driver, empresa)
+    return extraer_finiquitos(driver, fecha_limite or date.today())
+
+@medido("sigo.extraer_y_guardar")
+def guardar_incremental(registros, archivo_json):
+    """
+    Escribe cada registro apenas se lee en <archivo_json>l (JSONL, una línea por registro,
+    legible mientras avanza el recorrido) y al terminar genera 'archivo_json' a partir
+    de ese archivo, sin acumular la lista en memoria. Retorna la cantidad de registros.
+    """
+    archivo_jsonl = archivo_json + "l"
+    cantidad = 0
+    with open(archivo_jsonl, "w", encoding="utf-8") as f:
+        for reg in registros:
+            f.write(json.dumps(reg, ensure_ascii=False) + "\n")
+            f.flush()
+            cantidad += 1
+
+    tmp = archivo_json + ".tmp"
+    with open(archivo_jsonl, "r", encoding="utf-8") as origen, open(tmp, "w", encoding="utf-8") as destino:
+        destino.write("[")
+        for i, linea in enumerate(origen):
+            destino.write(",\n    " if i else "\n    ")
+            destino.write(linea.rstrip("\n"))
+        destino.write("\n]" if cantidad else "]")
+    os.replace(tmp, archivo_json)
+    logging.info(f"Se guardó el archivo JSON con {cantidad} registros filtrados.")
+    return cantidad
+
+def main(empresa):
+    load_dotenv()
+    usuario = os.getenv("SIGO_USER")
+    contraseña = os.getenv("SIGO_PASS")
+
+    # 1) FECHA LÍMITE = HOY (automático)
+    fecha_limite = date.today()
+
+    if MODO_HTTP_SIGO:
+        from sigo_http import listar_sin_navegador
+        registros = listar_sin_navegador(empresa, usuario, contraseña, fecha_limite)
+        if registros is not None:
+            guardar_incremental(
+                obtener_bitacora().registrar_extraidos(empresa, registros), obtener_empresa(empresa)["archivo_json"]
+            )
+            logging.info("Script finalizado (listado por HTTP).")
+            return
+
+    driver = configurar_edge()
+
+    try:
+        login_sigo(driver, usuario, contraseña)
+        preparar_listado(driver, empresa)
+
+        # --- GUARDAR EN ARCHIVO JSON (a medida que se recorren las páginas) ---
+        registros = obtener_bitacora().registrar_extraidos(empresa, iterar_finiquitos(driver, fecha_limite))
+        guardar_incremental(registros, obtener_empresa(empresa)["archivo_json"])
+
+    except Exception as e:
+        print(f"Ocurrió un error general en el script: {e}")
+        logging.error(f"Error general en el script: {str(e)}")
+    finally:
+        # Si deseas cerrar el navegador al finalizar, descomenta la línea
+        # driver.quit()
+        logging.info("Script finalizado.")
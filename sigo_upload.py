@@ -0,0 +1,292 @@
+import os
+import json
+import time
+import logging
+import traceback
+from dotenv import load_dotenv
+
+from selenium.webdriver.common.by import By
+# Para esperas explícitas
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+from empresas import obtener_empresa
+from cola_pdfs import cola_desde_entorno
+from esperas import esperar_pagina_lista, esperar_dom_estable, esperar_valor, instrumentar
+from sigo_login import configurar_edge, login_sigo, navegar_solicitud_finiquitos
+from sigo_http import ClienteSIGO
+from bitacora import obtener_bitacora
+from metricas import paso, contexto, registrar
+
+# Configuración de logging
+LOG_FILE = "automatizacion.log"
+logging.basicConfig(
+    filename=LOG_FILE,
+    filemode="a",
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(message)s",
+    datefmt="%Y-%m-%d %H:%M:%S"
+)
+
+# MODO_HTTP_SUBIDA=1 sube cada PDF con POST multipart (SIGO_GUARDAR_URL / SIGO_AVANZAR_URL)
+# y deja el navegador como respaldo para los registros que fallen
+MODO_HTTP_SUBIDA = os.getenv("MODO_HTTP_SUBIDA", "0") == "1"
+
+def subir_registro(driver, record_id, descarga_dir):
+    """
+    Sube el PDF de 'record_id' y lo avanza a cálculo. Retorna True si se completó.
+    """
+    logging.info(f"Procesando subida para ID: {record_id}")
+
+    # 0) Asegurarse de que el campo de filtro (filtro_id) esté visible.
+    # Si no lo está, intentar hacer click en "label_id" o forzar su visualización.
+    try:
+        filtro_input = driver.find_element(By.ID, "filtro_id")
+        if not filtro_input.is_displayed():
+            instrumentar(driver)
+            try:
+                label = WebDriverWait(driver, 10).until(
+                    EC.element_to_be_clickable((By.ID, "label_id"))
+                )
+                label.click()
+                logging.info("Se hizo click en 'label_id' para mostrar el filtro.")
+            except Exception:
+                # Forzar visualización usando JavaScript
+                driver.execute_script("document.getElementById('label_id').style.display = 'block';")
+                label = driver.find_element(By.ID, "label_id")
+                label.click()
+                logging.info("Forzado click en 'label_id' via JS para mostrar el filtro.")
+            esperar_dom_estable(driver, ms=150, nombre="mostrar filtro")
+    except Exception as e:
+        logging.warning(f"No se pudo verificar la visibilidad del filtro: {str(e)}")
+
+    # 1) Ingresar el número de ID en el campo de filtro
+    with paso("sigo.filtrar"):
+        filtro_input = WebDriverWait(driver, 15).until(
+            EC.visibility_of_element_located((By.ID, "filtro_id"))
+        )
+        try:
+            filtro_input.clear()
+        except Exception:
+            driver.execute_script("arguments[0].value = '';", filtro_input)
+        esperar_valor(driver, (By.ID, "filtro_id"), "", nombre="filtro vacío")
+        instrumentar(driver)  # antes de escribir: la espera de 'tabla filtrada' debe ver su AJAX
+        filtro_input.send_keys(record_id)
+        logging.info(f"Ingresado ID {record_id} en el filtro.")
+
+        # 2) Esperar a que aparezca la celda con ese ID en la tabla
+        try:
+            cell = WebDriverWait(driver, 20).until(
+                EC.presence_of_element_located((By.XPATH, f"//table//td[text()='{record_id}']"))
+            )
+            logging.info(f"Registro con ID {record_id} visible en la tabla.")
+        except Exception as e:
+            logging.warning(f"El registro con ID {record_id} no apareció en la tabla. Se omite este registro.")
+            return False
+        esperar_pagina_lista(driver, ms=200, nombre="tabla filtrada")
+
+        # 2.1) Hacer clic en la fila (o la celda) que contiene el ID
+        row_element = cell.find_element(By.XPATH, "./..")
+        esperar_pagina_lista(driver, nombre="detalle finiquito", accion=row_element.click)
+        logging.info(f"Clic en la fila del ID {record_id}.")
+
+    # Guardar ya se hizo (navegador o HTTP) y falló solo el avance: no se vuelve a subir el PDF
+    guardado = obtener_bitacora().alcanzo(record_id, "subido")
+    if guardado:
+        logging.info(f"El PDF del ID {record_id} ya está guardado en SIGO según la bitácora; solo se avanza.")
+    else:
+        # 3) Ubicar el input para subir archivo (id="notificacion_afc")
+        with paso("sigo.adjuntar"):
+            upload_input = WebDriverWait(driver, 15).until(
+                EC.presence_of_element_located((By.ID, "notificacion_afc"))
+            )
+            file_path = os.path.join(descarga_dir, f"{record_id}.pdf")
+            if os.path.exists(file_path):
+                upload_input.send_keys(file_path)
+                logging.info(f"Archivo {file_path} subido para ID {record_id}.")
+            else:
+                logging.warning(f"Archivo {file_path} no encontrado para ID {record_id}. Se omite este registro.")
+                return False
+
+        # 4) Clic en "GUARDAR" (id="btnguarda")
+        with paso("sigo.guardar"):
+            try:
+                guardar_btn = WebDriverWait(driver, 15).until(
+                    EC.element_to_be_clickable((By.ID, "btnguarda"))
+                )
+                guardado = esperar_pagina_lista(driver, nombre="guardar", accion=guardar_btn.click)
+                logging.info(f"Clic en 'Guardar' para ID {record_id}.")
+                if guardado:
+                    obtener_bitacora().marcar(record_id, "subido")
+                else:
+                    # Sin confirmación el folio queda 'descargado' y el próximo intento vuelve a adjuntar
+                    logging.warning(f"No se confirmó el guardado del PDF del ID {record_id}; no se marca como subido.")
+            except Exception as e:
+                logging.warning(f"No se encontró el botón 'Guardar' (btnguarda). {str(e)}")
+
+    # 5) Clic en "Avanzar a calculo" (id="btnrgt2")
+    with paso("sigo.avanzar"):
+        avanzar_btn = WebDriverWait(driver, 15).until(
+            EC.element_to_be_clickable((By.ID, "btnrgt2"))
+        )
+        # Espera a que se procese la subida
+        esperar_pagina_lista(driver, timeout=20, nombre="avanzar a cálculo", accion=avanzar_btn.click)
+        logging.info(f"Clic en 'Avanzar a calculo' para ID {record_id}.")
+
+    # 6) Limpiar el campo de filtro para el siguiente registro
+    with paso("sigo.limpiar_filtro"):
+        filtro_input = WebDriverWait(driver, 10).until(
+            EC.visibility_of_element_located((By.ID, "filtro_id"))
+        )
+        instrumentar(driver)
+        try:
+            filtro_input.clear()
+        except Exception:
+            driver.execute_script("arguments[0].value = '';", filtro_input)
+        esperar_pagina_lista(driver, ms=200, nombre="limpiar filtro")
+    return True
+
+def subir_registro_http(cliente, record_id, descarga_dir):
+    """
+    Sube el PDF de 'record_id' sin pasar por la interfaz y lo avanza a cálculo. Como en el
+    navegador, el folio queda 'subido' tras Guardar; si la bitácora ya lo marca así, solo
+    se avanza. Retorna True si SIGO lo aceptó.
+    """
+    file_path = os.path.join(descarga_dir, f"{record_id}.pdf")
+    bitacora = obtener_bitacora()
+    guardado = bitacora.alcanzo(record_id, "subido")
+    if not guardado and not os.path.exists(file_path):
+        return False
+    try:
+        with paso("sigo.http"):
+            if not guardado:
+                cliente.guardar_pdf(record_id, file_path)
+                bitacora.marcar(record_id, "subido")
+            cliente.avanzar(record_id)
+        return True
+    except Exception as e:
+        logging.warning(f"⚠ Falló la subida HTTP del ID {record_id}, se usa el navegador: {str(e)}")
+        return False
+
+def cliente_subida(driver):
+    """
+    ClienteSIGO con las cookies de 'driver' si MODO_HTTP_SUBIDA está activo; si no, None.
+    """
+    if not MODO_HTTP_SUBIDA:
+        return None
+    cliente = ClienteSIGO()
+    cliente.copiar_cookies(driver)
+    return cliente
+
+def subir_folio(driver, record_id, descarga_dir, cliente=None):
+    """
+    Sube y avanza a cálculo 'record_id' (por HTTP si hay 'cliente', si no o si falla con
+    el navegador) registrando el avance en la bitácora. Los folios que la bitácora
+    ya marca como avanzados se omiten. Retorna True si el folio quedó avanzado.
+    """
+    bitacora = obtener_bitacora()
+    if bitacora.alcanzo(record_id, "avanzado"):
+        logging.info(f"ID {record_id} ya avanzado a cálculo según la bitácora, se omite.")
+        return True
+    intentos = bitacora.intento(record_id, "sigo")
+    inicio = time.perf_counter()
+    try:
+        with contexto(folio=record_id):
+            if cliente is not None and subir_registro_http(cliente, record_id, descarga_dir):
+                ok = True
+            else:
+                ok = subir_registro(driver, record_id, descarga_dir)
+    except Exception as e:
+        registrar("sigo.registro", time.perf_counter() - inicio, False, intentos - 1, folio=record_id)
+        bitacora.error(record_id, f"SIGO: {str(e)}")
+        raise
+    registrar("sigo.registro", time.perf_counter() - inicio, ok, intentos - 1, folio=record_id)
+    if ok:
+        bitacora.marcar(record_id, "avanzado")
+    else:
+        bitacora.error(record_id, "SIGO: no se completó la subida")
+    return ok
+
+def subir_certificados(driver, registros, descarga_dir, cliente=None):
+    """
+    Sube los PDF de 'registros' (lista o generador de dicts con "id") en la pantalla
+    'Solicitud de finiquitos' ya abierta. Con 'cliente' (ClienteSIGO) se intenta primero
+    por HTTP. Retorna la lista de IDs subidos.
+    """
+    subidos = []
+    for reg in registros:
+        record_id = reg["id"]
+        if subir_folio(driver, record_id, descarga_dir, cliente):
+            subidos.append(record_id)
+    logging.info("Proceso de subida completado para todos los registros.")
+    return subidos
+
+def cargar_registros(empresa):
+    """
+    Registros a subir: la cola del pipeline si está activa, si no el JSON de la empresa.
+    """
+    cola = cola_desde_entorno()
+    if cola:
+        # Modo pipeline: se sube cada PDF apenas previred_ingreso lo publica
+        logging.info(f"Modo pipeline: consumiendo PDFs desde {cola.ruta}.")
+        return cola.consumir()
+    registros_file = obtener_empresa(empresa)["archivo_json"]
+    with open(registros_file, "r", encoding="utf-8") as f:
+        lista_resultados = json.load(f)
+    logging.info(f"Se encontraron {len(lista_resultados)} registros en {registros_file}.")
+    bitacora = obtener_bitacora()
+    pendientes = [reg for reg in lista_resultados if not bitacora.alcanzo(reg["id"], "avanzado")]
+    if len(pendientes) < len(lista_resultados):
+        logging.info(f"{len(lista_resultados) - len(pendientes)} registros ya avanzados a cálculo según la bitácora.")
+    return pendientes
+
+def main(empresa):
+    load_dotenv()
+    usuario = os.getenv("SIGO_USER")
+    contraseña = os.getenv("SIGO_PASS")
+    descarga_dir = os.getenv("DESCARGA_DIR", os.path.join(os.getcwd(), "descarga"))
+    os.makedirs(descarga_dir, exist_ok=True)  # Carpeta donde se encuentran los PDFs
+
+    try:
+        lista_resultados = cargar_registros(empresa)
+    except Exception as e:
+        logging.error(f"Ocurrió un error en el script: {str(e)}\n{traceback.format_exc()}")
+        print(f"Error: {e}")
+        return
+    if isinstance(lista_resultados, list) and not lista_resultados:
+        logging.info("Ningún registro pendiente de subida: no se abre Edge.")
+        return
+
+    # Import diferido: pool_sigo importa este módulo
+    from pool_sigo import PoolSIGO, SIGO_SESIONES
+    if SIGO_SESIONES > 1:
+        try:
+            PoolSIGO(descarga_dir, usuario, contraseña).subir(lista_resultados)
+        except Exception as e:
+            logging.error(f"Ocurrió un error en el script: {str(e)}\n{traceback.format_exc()}")
+            print(f"Error: {e}")
+        logging.info("Script finalizado.")
+        return
+
+    # Iniciar Edge con webdriver_manager
+    driver = configurar_edge()
+
+    try:
+        # 1. Acceder a SIGO y login
+        logging.info("Accediendo a SIGO...")
+        login_sigo(driver, usuario, contraseña)
+
+        # --- Navegar a 'Solicitud de finiquitos' ---
+        navegar_solicitud_finiquitos(driver)
+
+        # ================================
+        # SECCIÓN: SUBIR ARCHIVOS A SIGO
+        # ================================
+        subir_certificados(driver, lista_resultados, descarga_dir, cliente_subida(driver))
+
+    except Exception as e:
+        logging.error(f"Ocurrió un error en el script: {str(e)}\n{traceback.format_exc()}")
+        print(f"Error: {e}")
+    finally:
+        driver.quit()
+        logging.info("Script finalizado.")
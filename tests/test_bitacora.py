@@ -0,0 +1,47 @@
+from bitacora import Bitacora
+
+def test_marcar_no_retrocede_el_estado(tmp_path):
+    b = Bitacora(str(tmp_path / "bitacora.sqlite3"))
+    b.marcar("1", "extraido", empresa="EST", rut="1-9")
+    b.marcar("1", "descargado")
+    b.marcar("1", "enviado_previred")
+    assert b.estado("1") == "descargado"
+    assert b.alcanzo("1", "enviado_previred")
+    assert b.alcanzo("1", "descargado")
+    assert not b.alcanzo("1", "subido")
+
+def test_folio_desconocido(tmp_path):
+    b = Bitacora(str(tmp_path / "bitacora.sqlite3"))
+    assert b.estado("404") is None
+    assert not b.alcanzo("404", "extraido")
+
+def test_avanzar_limpia_el_ultimo_error(tmp_path):
+    b = Bitacora(str(tmp_path / "bitacora.sqlite3"))
+    b.marcar("1", "enviado_previred")
+    b.error("1", "Previred: no se obtuvo el certificado")
+    assert b._ejecutar("SELECT ultimo_error FROM folios WHERE folio = '1'")[0][0]
+    b.marcar("1", "descargado")
+    assert b._ejecutar("SELECT ultimo_error FROM folios WHERE folio = '1'")[0][0] is None
+
+def test_intentos_por_etapa(tmp_path):
+    b = Bitacora(str(tmp_path / "bitacora.sqlite3"))
+    b.marcar("1", "extraido")
+    assert b.intento("1", "previred") == 1
+    assert b.intento("1", "previred") == 2
+    assert b.intento("1", "sigo") == 1
+
+def test_marcar_descargado_guarda_el_hash(tmp_path):
+    b = Bitacora(str(tmp_path / "bitacora.sqlite3"))
+    pdf = tmp_path / "1.pdf"
+    pdf.write_bytes(b"%PDF-1.4\n%%EOF\n")
+    b.marcar_descargado("1", str(pdf))
+    sha, ruta = b._ejecutar("SELECT sha256, ruta_pdf FROM folios WHERE folio = '1'")[0]
+    assert len(sha) == 64 and ruta == str(pdf)
+
+def test_registrar_extraidos_y_resumen(tmp_path):
+    b = Bitacora(str(tmp_path / "bitacora.sqlite3"))
+    registros = [{"id": "1", "rut": "1-9"}, {"id": "2", "rut": "2-7"}]
+    assert list(b.registrar_extraidos("EST", registros)) == registros
+    b.marcar("2", "avanzado")
+    assert b.resumen() == {"extraido": 1, "avanzado": 1}
+    assert b.folios_en_estado("avanzado") == {"2"}
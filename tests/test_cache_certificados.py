@@ -0,0 +1,84 @@
+import os
+import time
+import sqlite3
+
+from cache_certificados import CacheCertificados
+from enrutador_descargas import EnrutadorDescargas
+
+def pdf(n, relleno=0):
+    return f"%PDF-1.4\n% certificado {n}\n".encode() + b"0" * relleno + b"\n%%EOF\n"
+
+def preparar(tmp_path, *folios, relleno=0):
+    enrutador = EnrutadorDescargas(str(tmp_path / "descarga"))
+    cache = CacheCertificados(enrutador)
+    for folio in folios:
+        _, sha = enrutador.almacenar_contenido(pdf(folio, relleno), folio)
+        cache.registrar({"id": folio, "empresa": "EST", "rut": f"{folio}-K", "fecha_ultimo_dia": "31-01-2026"}, sha)
+    return enrutador, cache
+
+def usado_hace(cache, folio, dias):
+    cache._ejecutar("UPDATE certificados SET usado = ? WHERE folio = ?", (time.time() - dias * 86400, folio))
+
+def folios(cache):
+    return {f for (f,) in cache._ejecutar("SELECT folio FROM certificados")}
+
+def test_buscar_por_rut_y_fecha_publica_con_el_folio_nuevo(tmp_path):
+    enrutador, cache = preparar(tmp_path, "1")
+    ruta, _ = cache.buscar({"id": "9", "empresa": "EST", "rut": "1-k", "fecha_ultimo_dia": "31-01-2026"})
+    assert ruta == os.path.join(enrutador.descarga_dir, "9.pdf")
+    assert folios(cache) == {"1", "9"}
+
+def test_rut_y_fecha_no_cruzan_empresas(tmp_path):
+    _, cache = preparar(tmp_path, "1")
+    assert cache.consultar({"id": "9", "empresa": "Business", "rut": "1-K", "fecha_ultimo_dia": "31-01-2026"}) is None
+    assert cache.consultar({"id": "9", "rut": "1-K", "fecha_ultimo_dia": "31-01-2026"}) is None
+
+def test_migra_caché_sin_empresa(tmp_path):
+    enrutador = EnrutadorDescargas(str(tmp_path / "descarga"))
+    con = sqlite3.connect(os.path.join(enrutador.almacen_dir, "cache.sqlite3"))
+    con.executescript(
+        "CREATE TABLE certificados (folio TEXT PRIMARY KEY, rut TEXT, fecha TEXT, sha256 TEXT NOT NULL, "
+        "bytes INTEGER NOT NULL, creado REAL NOT NULL, usado REAL NOT NULL);"
+        "INSERT INTO certificados VALUES ('1', '1-K', '31-01-2026', 'x', 1, 0, 0);"
+    )
+    con.close()
+    cache = CacheCertificados(enrutador)
+    assert cache._ejecutar("SELECT folio, empresa FROM certificados") == [("1", None)]
+    assert cache._candidatos({"id": "9", "empresa": "EST", "rut": "1-K", "fecha_ultimo_dia": "31-01-2026"}) == []
+
+def test_consultar_no_publica_ni_modifica(tmp_path):
+    enrutador, cache = preparar(tmp_path, "1")
+    os.remove(os.path.join(enrutador.descarga_dir, "1.pdf"))
+    assert cache.consultar({"id": "1"}) is not None
+    assert cache.consultar({"id": "9", "empresa": "EST", "rut": "1-K", "fecha_ultimo_dia": "31-01-2026"}) is not None
+    assert not os.path.exists(os.path.join(enrutador.descarga_dir, "1.pdf"))
+    assert folios(cache) == {"1"}
+
+def test_buscar_descarta_certificados_dañados(tmp_path):
+    enrutador, cache = preparar(tmp_path, "1")
+    sha = cache._ejecutar("SELECT sha256 FROM certificados")[0][0]
+    os.remove(os.path.join(enrutador.descarga_dir, "1.pdf"))
+    with open(enrutador.ruta_almacen(sha), "wb") as f:
+        f.write(b"%PDF-1.4 truncado")
+    assert cache.buscar({"id": "1"}) is None
+    assert folios(cache) == set()
+
+def test_retencion_por_antigüedad(tmp_path):
+    enrutador, cache = preparar(tmp_path, "1", "2", "3")
+    usado_hace(cache, "1", 40)
+    usado_hace(cache, "2", 40)
+    cache.aplicar_retencion(max_dias=30, max_mb=100, conservar={"2"})
+    assert folios(cache) == {"2", "3"}
+    assert sorted(os.listdir(enrutador.descarga_dir)) == [".almacen", ".sesiones", "2.pdf", "3.pdf"]
+
+def test_retencion_por_tamaño_quita_los_menos_usados(tmp_path):
+    enrutador, cache = preparar(tmp_path, "1", "2", "3", relleno=400 * 1024)
+    usado_hace(cache, "1", 3)
+    usado_hace(cache, "2", 1)
+    usado_hace(cache, "3", 2)
+    # ~400 KB por certificado: 1 MB alcanza para dos
+    cache.aplicar_retencion(max_dias=30, max_mb=1)
+    assert folios(cache) == {"2", "3"}
+    shas = {sha for (sha,) in cache._ejecutar("SELECT sha256 FROM certificados")}
+    en_almacen = {f[:-4] for _, _, archivos in os.walk(enrutador.almacen_dir) for f in archivos if f.endswith(".pdf")}
+    assert en_almacen == shas
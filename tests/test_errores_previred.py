@@ -0,0 +1,75 @@
+import pytest
+from selenium.common.exceptions import NoAlertPresentException, NoSuchElementException, UnexpectedAlertPresentException
+
+from errores_previred import ErrorPrevired, clasificar_error, detectar_error, error_desde_textos, o_error
+from portales_simulados import RECHAZOS
+
+class DriverFalso:
+    """
+    Responde a JS_ERRORES_VISIBLES con 'errores'; con alerta='texto' el script falla
+    como cuando hay un alert abierto.
+    """
+
+    def __init__(self, errores=(), alerta=None):
+        self.errores = list(errores)
+        self.alerta = alerta
+
+    def execute_script(self, js, *args):
+        if self.alerta is not None:
+            e = UnexpectedAlertPresentException("alert abierto")
+            e.alert_text = self.alerta
+            raise e
+        return self.errores
+
+    @property
+    def switch_to(self):
+        raise NoAlertPresentException("sin alert")
+
+@pytest.mark.parametrize("texto, clase", [
+    # Mensajes del formulario de portales_simulados.PortalPrevired.enviar_manual
+    ("El RUT del trabajador no es válido.", "rut_invalido"),
+    ("RUT inválido", "rut_invalido"),
+    ("Debe seleccionar el sistema de salud.", "campos_incompletos"),
+    ("Debe seleccionar la causa del movimiento.", "campos_incompletos"),
+    ("Debe ingresar la fecha hasta.", "campos_incompletos"),
+    ("Debe ingresar el RUT del trabajador.", "campos_incompletos"),
+    ("La fecha hasta no es válida.", "fecha_invalida"),
+    ("Dígito verificador incorrecto", "rut_invalido"),
+    ("Su sesión ha expirado, vuelva a ingresar.", "sesion_expirada"),
+    ("Error inesperado", "otro"),
+])
+def test_clasificar_error(texto, clase):
+    assert clasificar_error(texto) == clase
+
+def test_rechazos_del_portal_simulado_son_permanentes():
+    clases = {clasificar_error(texto) for texto in RECHAZOS}
+    assert clases == {"sin_cotizaciones", "duplicado"}
+    for texto in RECHAZOS:
+        assert error_desde_textos([texto]).permanente
+
+def test_campos_incompletos_no_es_permanente():
+    assert not error_desde_textos(["Debe ingresar la fecha hasta."]).permanente
+
+def test_error_desde_textos():
+    assert error_desde_textos([]) is None
+    assert error_desde_textos(["", None]) is None
+    error = error_desde_textos(["RUT inválido", "Otro aviso"])
+    assert error.clase == "rut_invalido"
+    assert error.mensaje == "RUT inválido; Otro aviso"
+    assert not error.formulario_listo
+
+def test_detectar_error():
+    assert detectar_error(DriverFalso()) is None
+    assert detectar_error(DriverFalso(["RUT inválido"])).origen == "banner"
+    error = detectar_error(DriverFalso(alerta="Dígito verificador incorrecto"))
+    assert (error.clase, error.origen) == ("rut_invalido", "alert")
+
+def test_o_error_lanza_si_hay_error_y_la_condicion_no_se_cumple():
+    def sin_elemento(driver):
+        raise NoSuchElementException("web_chk_declaracion")
+
+    assert o_error(sin_elemento)(DriverFalso()) is False
+    assert o_error(lambda d: "elemento")(DriverFalso(["RUT inválido"])) == "elemento"
+    with pytest.raises(ErrorPrevired) as e:
+        o_error(sin_elemento)(DriverFalso(["Ya existe un movimiento de personal para el trabajador en el período."]))
+    assert e.value.clase == "duplicado"
@@ -0,0 +1,67 @@
+import os
+import json
+
+import pytest
+
+import metricas
+
+@pytest.fixture
+def archivos(tmp_path, monkeypatch):
+    monkeypatch.setattr(metricas, "METRICAS_FILE", str(tmp_path / "metricas.jsonl"))
+    return tmp_path
+
+def eventos(archivos):
+    with open(archivos / "metricas.jsonl", encoding="utf-8") as f:
+        return [json.loads(linea) for linea in f]
+
+def test_cuantil_por_rango_más_cercano():
+    valores = list(range(1, 101))
+    assert [metricas._cuantil(valores, q) for q in metricas.CUANTILES] == [50, 95, 99]
+    assert metricas._cuantil([7], 0.99) == 7
+
+def test_paso_registra_éxito_fallo_y_contexto(archivos):
+    with metricas.contexto(empresa="EST"):
+        with metricas.paso("a"):
+            assert metricas.paso_actual() == "a"
+        with pytest.raises(ValueError):
+            with metricas.paso("b", reintentos=2):
+                raise ValueError("x")
+    assert metricas.paso_actual() is None
+    a, b = eventos(archivos)
+    assert (a["paso"], a["ok"], a["empresa"]) == ("a", True, "EST")
+    assert (b["paso"], b["ok"], b["reintentos"]) == ("b", False, 2)
+
+def test_exportar_prometheus(archivos):
+    for i in range(1, 101):
+        metricas.registrar("x", i / 100, ok=i != 100, reintentos=1 if i <= 3 else 0)
+    metricas.registrar("otra", 5.0)
+    with open(archivos / "metricas.jsonl", "a", encoding="utf-8") as f:
+        f.write(json.dumps({"corrida": "otra-corrida", "paso": "x", "segundos": 99, "ok": True}) + "\n")
+        f.write("línea dañada\n")
+    destino = archivos / "metricas.prom"
+    metricas.exportar_prometheus(metricas.CORRIDA, str(destino))
+    lineas = destino.read_text(encoding="utf-8").splitlines()
+    assert 'automatizacion_paso_segundos{paso="x",quantile="0.5"} 0.5' in lineas
+    assert 'automatizacion_paso_segundos{paso="x",quantile="0.95"} 0.95' in lineas
+    assert 'automatizacion_paso_segundos{paso="x",quantile="0.99"} 0.99' in lineas
+    assert 'automatizacion_paso_segundos_count{paso="x"} 100' in lineas
+    assert 'automatizacion_paso_segundos_sum{paso="x"} 50.5' in lineas
+    assert 'automatizacion_paso_fallos_total{paso="x"} 1' in lineas
+    assert 'automatizacion_paso_reintentos_total{paso="x"} 3' in lineas
+    assert 'automatizacion_paso_segundos_count{paso="otra"} 1' in lineas
+
+def test_rotar_conserva_las_corridas_más_recientes(tmp_path):
+    for i in range(4):
+        ruta = tmp_path / f"corrida-{i}.jsonl"
+        ruta.write_text("{}\n", encoding="utf-8")
+        os.utime(ruta, (i, i))
+    (tmp_path / "otro.txt").write_text("x", encoding="utf-8")
+    metricas.rotar(conservar=2, directorio=str(tmp_path))
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["corrida-2.jsonl", "corrida-3.jsonl", "otro.txt"]
+
+def test_exportar_desde_otro_origen(tmp_path):
+    origen = tmp_path / "hija.jsonl"
+    origen.write_text(json.dumps({"corrida": "c1", "paso": "x", "segundos": 1, "ok": True}) + "\n", encoding="utf-8")
+    destino = tmp_path / "metricas.prom"
+    metricas.exportar_prometheus("c1", str(destino), str(origen))
+    assert 'automatizacion_paso_segundos_count{paso="x"} 1' in destino.read_text(encoding="utf-8").splitlines()
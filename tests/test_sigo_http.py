@@ -0,0 +1,21 @@
+import pytest
+
+from sigo_http import ErrorSIGOHTTP, encabezados_desde_json, filas_desde_json
+
+def test_filas_objeto_ordenadas_por_columns_data():
+    datos = {
+        "columns": [{"data": "id", "title": "ID"}, {"data": "estado", "title": "ESTADO"}],
+        "data": [{"estado": "Solicitado", "id": "<b>7</b>"}],
+    }
+    assert filas_desde_json(datos) == [["7", "Solicitado"]]
+    assert encabezados_desde_json(datos) == ["ID", "ESTADO"]
+
+def test_páginas_siguientes_usan_las_claves_de_la_primera():
+    assert filas_desde_json({"data": [{"estado": "x", "id": "8"}]}, ["id", "estado"]) == [["8", "x"]]
+
+def test_filas_objeto_sin_orden_explícito_se_rechazan():
+    with pytest.raises(ErrorSIGOHTTP):
+        filas_desde_json({"data": [{"id": "7", "estado": "Solicitado"}]})
+
+def test_filas_lista_se_conservan():
+    assert filas_desde_json([["1", None, " a "]]) == [["1", "", "a"]]
@@ -0,0 +1,90 @@
+import os
+import json
+import time
+import atexit
+import logging
+import threading
+
+from selenium.webdriver.remote.remote_connection import RemoteConnection
+
+from metricas import etiquetas_actuales, paso_actual
+
+# TRAZA_WEBDRIVER=1 registra cada comando WebDriver (ida y vuelta HTTP al driver)
+TRAZA_WEBDRIVER = os.getenv("TRAZA_WEBDRIVER", "0") == "1"
+TRAZA_FILE = os.getenv("TRAZA_FILE", "traza_webdriver.jsonl")
+
+_lock = threading.Lock()
+_execute_original = None
+# (empresa, "folio X" o "paso Y") -> {"comandos": n, "segundos": s, "por_comando": {nombre: [n, s]}}
+_resumen = {}
+
+def _registrar(comando, duracion, ok):
+    etiquetas = etiquetas_actuales()
+    evento = {
+        "comando": comando,
+        "ms": round(duracion * 1000, 2),
+        "ok": ok,
+        "paso": paso_actual(),
+        "empresa": etiquetas.get("empresa"),
+        "folio": etiquetas.get("folio"),
+        "hilo": threading.current_thread().name,
+        "ts": time.time(),
+    }
+    # Fuera de un registro (login, extracción...) se agrupa por paso
+    clave = (evento["empresa"], f"folio {evento['folio']}" if evento["folio"] else f"paso {evento['paso'] or '-'}")
+    with _lock:
+        with open(TRAZA_FILE, "a", encoding="utf-8") as f:
+            f.write(json.dumps(evento, ensure_ascii=False) + "\n")
+        datos = _resumen.setdefault(clave, {"comandos": 0, "segundos": 0.0, "por_comando": {}})
+        datos["comandos"] += 1
+        datos["segundos"] += duracion
+        por_comando = datos["por_comando"].setdefault(comando, [0, 0.0])
+        por_comando[0] += 1
+        por_comando[1] += duracion
+
+def _execute_trazado(self, command, params):
+    inicio = time.perf_counter()
+    try:
+        respuesta = _execute_original(self, command, params)
+    except BaseException:
+        _registrar(command, time.perf_counter() - inicio, False)
+        raise
+    _registrar(command, time.perf_counter() - inicio, True)
+    return respuesta
+
+def activar():
+    """
+    Intercepta RemoteConnection.execute (todos los drivers del proceso). Idempotente.
+    """
+    global _execute_original
+    with _lock:
+        if _execute_original is not None:
+            return
+        _execute_original = RemoteConnection.execute
+        RemoteConnection.execute = _execute_trazado
+    atexit.register(imprimir_resumen)
+    logging.info(f"Traza de comandos WebDriver activa: {TRAZA_FILE}")
+
+def activar_desde_entorno():
+    if TRAZA_WEBDRIVER:
+        activar()
+
+def imprimir_resumen():
+    """
+    Cantidad de comandos y tiempo total por registro, con los tres comandos más costosos.
+    """
+    with _lock:
+        filas = sorted(_resumen.items(), key=lambda item: -item[1]["segundos"])
+    if not filas:
+        return
+    lineas = ["Resumen de comandos WebDriver por registro:"]
+    for (empresa, origen), datos in filas:
+        costosos = sorted(datos["por_comando"].items(), key=lambda item: -item[1][1])[:3]
+        detalle = ", ".join(f"{nombre} x{n} {s:.2f}s" for nombre, (n, s) in costosos)
+        lineas.append(
+            f"  {empresa or '-'} / {origen}: "
+            f"{datos['comandos']} comandos, {datos['segundos']:.2f}s ({detalle})"
+        )
+    texto = "\n".join(lineas)
+    print(texto)
+    logging.info(texto)